@@ -0,0 +1,983 @@
+"""
+Command-line entry point to process and inspect a selection of the programs.
+
+The programs are selected with the same filters as get_programs(). Only the selected programs are processed,
+so a single new manifesto can be processed without touching all the other programs.
+
+How to use:
+
+    python -m src.cli process --election-date 2023-11 --workers 4
+    python -m src.cli process --party VVD --dry-run
+    python -m src.cli process --cooperative --workers 2
+    python -m src.cli status --election-type TK
+    python -m src.cli metrics --election-type GR --region Utrecht --output utrecht.csv
+    python -m src.cli preflight --election-date 1948-07
+    python -m src.cli duplicates
+    python -m src.cli frequencies --workers 4
+    python -m src.cli metrics --party D66 --output d66.csv
+    python -m src.cli metrics --stream --max-memory 2048 --output all.csv
+    python -m src.cli compare --election-date 2017-03 --statistic flesch_douma_index --output 2017.csv
+    python -m src.cli keyness --party VVD --election-date 2023-11 --against-election-date 2023-11 --limit 25
+    python -m src.cli keyness --election-type GR --region Utrecht --against-election-type GR --against-region Zeist
+    python -m src.cli reuse --election-date 2023-11 --output reuse.csv
+    python -m src.cli reuse --election-date 1971-04 --joined
+    python -m src.cli preview --sample-size 100 --output preview.csv
+    python -m src.cli profile --window 500 --unit words --output-dir profiles
+
+Subcommands:
+  - process: Processes the selected programs, exits with a non-zero status when a program fails.
+  - status: Shows for each processing stage whether the output of the selected programs is cached.
+  - preflight: Probes whether the selected programs have a usable text layer, programs without one are skipped.
+  - duplicates: Lists the selected programs with identical pdf files, which are processed only once.
+  - frequencies: Processes the selected programs and builds the lemma frequency table of the sophistication metrics.
+  - metrics: Processes the selected programs and writes their metrics as csv.
+  - compare: Processes the selected programs and tests the differences in readability between every pair as csv.
+  - keyness: Processes the selected programs and other programs and writes the characteristic words of each as csv.
+  - reuse: Processes the selected programs and their previous programs and writes the reused sentences as csv.
+  - preview: Estimates the readability of the selected programs from a sample of their sentences, with error bars.
+  - profile: Processes the selected programs and exports their rolling readability profiles.
+
+"""
+
+import argparse
+import contextlib
+import csv
+import sys
+from typing import TYPE_CHECKING, TextIO
+
+if TYPE_CHECKING:
+    from src.process_data import Program
+
+EXIT_OK = 0
+"""Exit status when the command succeeded"""
+
+EXIT_FAILURE = 1
+"""Exit status when one or more programs could not be processed"""
+
+EXIT_NO_PROGRAMS = 2
+"""Exit status when no program matches the filters"""
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the command-line interface.
+
+    Returns:
+        The argument parser.
+    """
+    # The filters are shared by all subcommands
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--election-type", help="The type of the election, for example TK.")
+    filters.add_argument("--election-date", help="The date of the election, for example 2023-11.")
+    filters.add_argument("--party", help="The party of the program, also matches members of joined programs.")
+    filters.add_argument("--region", help="The municipality or province of the program, for GR and PS elections.")
+    filters.add_argument("--tag", dest="tags", action="append", help="A tag the program must have, can be repeated.")
+
+    joined = filters.add_mutually_exclusive_group()
+    joined.add_argument("--joined", dest="joined_issue", action="store_const", const=True, help="Only joined programs.")
+    joined.add_argument(
+        "--not-joined", dest="joined_issue", action="store_const", const=False, help="Exclude joined programs."
+    )
+    filters.set_defaults(joined_issue=None)
+
+    # The memory options are shared by the subcommands that process programs
+    memory = argparse.ArgumentParser(add_help=False)
+    memory.add_argument(
+        "--stream", action="store_true", help="Release the text and doc of each program after it has been saved."
+    )
+    memory.add_argument(
+        "--max-memory", type=int, help="The memory ceiling in MB, processed programs are released when exceeded."
+    )
+    memory.add_argument(
+        "--memory-limit", type=int, help="The memory limit in MB, processing stops when it is exceeded."
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli", description="Process and inspect a selection of the programs."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    process = subparsers.add_parser("process", parents=[filters, memory], help="Process the selected programs.")
+    process.add_argument("--workers", type=int, default=1, help="The number of processes to use. (default: 1)")
+    process.add_argument(
+        "--page-workers",
+        type=int,
+        default=1,
+        help="The number of processes to extract the pages of a single large pdf. (default: 1)",
+    )
+    process.add_argument("--dry-run", action="store_true", help="Only show which programs would be processed.")
+    process.add_argument(
+        "--cooperative",
+        action="store_true",
+        help="Split the programs with other processes or hosts that share the processed folder.",
+    )
+    process.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=600.0,
+        help="The number of seconds a claimed program is reserved without renewal, with --cooperative. (default: 600)",
+    )
+    process.add_argument(
+        "--lease-dir",
+        help="The directory of the lease files, shared by all workers, with --cooperative. (default: processed/leases)",
+    )
+    process.set_defaults(handler=command_process)
+
+    status = subparsers.add_parser("status", parents=[filters], help="Show the cache status of the selected programs.")
+    status.set_defaults(handler=command_status)
+
+    preflight = subparsers.add_parser(
+        "preflight", parents=[filters], help="Probe whether the selected programs have a usable text layer."
+    )
+    preflight.set_defaults(handler=command_preflight)
+
+    duplicates = subparsers.add_parser(
+        "duplicates", parents=[filters], help="List the selected programs with identical pdf files."
+    )
+    duplicates.set_defaults(handler=command_duplicates)
+
+    metrics = subparsers.add_parser(
+        "metrics", parents=[filters, memory], help="Write the metrics of the selected programs."
+    )
+    metrics.add_argument("--workers", type=int, default=1, help="The number of processes to use. (default: 1)")
+    metrics.add_argument("--metric", dest="metrics", action="append", help="A metric to compute, can be repeated.")
+    metrics.add_argument("--output", help="The csv file to write the metrics to. (default: stdout)")
+    metrics.set_defaults(handler=command_metrics)
+
+    compare = subparsers.add_parser(
+        "compare", parents=[filters, memory], help="Test the differences in readability between the selected programs."
+    )
+    compare.add_argument("--workers", type=int, default=1, help="The number of processes to use. (default: 1)")
+    compare.add_argument(
+        "--statistic", dest="statistics", action="append", help="A statistic to compare, can be repeated."
+    )
+    compare.add_argument(
+        "--resamples",
+        type=int,
+        default=2000,
+        help="The number of permutations and bootstrap resamples. (default: 2000)",
+    )
+    compare.add_argument(
+        "--confidence", type=float, default=0.95, help="The confidence level of the intervals. (default: 0.95)"
+    )
+    compare.add_argument("--seed", type=int, default=0, help="The seed of the resampling. (default: 0)")
+    compare.add_argument("--output", help="The csv file to write the comparisons to. (default: stdout)")
+    compare.set_defaults(handler=command_compare)
+
+    frequencies = subparsers.add_parser(
+        "frequencies",
+        parents=[filters, memory],
+        help="Build the lemma frequency table of the lexical sophistication from the selected programs.",
+    )
+    frequencies.add_argument("--workers", type=int, default=1, help="The number of processes to use. (default: 1)")
+    frequencies.add_argument(
+        "--word-list", help="Build the table from a list of words and their counts instead of the programs."
+    )
+    frequencies.add_argument("--output", help="The path of the table. (default: processed/lemmas.npz)")
+    frequencies.set_defaults(handler=command_frequencies)
+
+    keyness = subparsers.add_parser(
+        "keyness",
+        parents=[filters, memory],
+        help="Write the words that are characteristic for the selected programs compared to other programs.",
+    )
+    keyness.add_argument("--workers", type=int, default=1, help="The number of processes to use. (default: 1)")
+    keyness.add_argument("--against-election-type", help="The type of the election of the programs to compare with.")
+    keyness.add_argument("--against-election-date", help="The date of the election of the programs to compare with.")
+    keyness.add_argument("--against-party", help="The party of the programs to compare with.")
+    keyness.add_argument("--against-region", help="The municipality or province of the programs to compare with.")
+    keyness.add_argument(
+        "--against-tag", dest="against_tags", action="append", help="A tag the programs to compare with must have."
+    )
+    keyness.add_argument(
+        "--method", default="log_odds", help="The measure of keyness, log_odds or log_likelihood. (default: log_odds)"
+    )
+    keyness.add_argument(
+        "--min-count", type=int, default=5, help="The minimal number of occurrences of a word. (default: 5)"
+    )
+    keyness.add_argument(
+        "--limit", type=int, default=50, help="The number of words per group, 0 for all words. (default: 50)"
+    )
+    keyness.add_argument("--output", help="The csv file to write the words to. (default: stdout)")
+    keyness.set_defaults(handler=command_keyness)
+
+    reuse = subparsers.add_parser(
+        "reuse",
+        parents=[filters, memory],
+        help="Write how many sentences the selected programs reuse from the previous programs of their parties.",
+    )
+    reuse.add_argument("--workers", type=int, default=1, help="The number of processes to use. (default: 1)")
+    reuse.add_argument(
+        "--min-similarity",
+        type=float,
+        default=0.6,
+        help="The minimal fraction of shared words of near-exact matches, 0 for only exact matches. (default: 0.6)",
+    )
+    reuse.add_argument("--output", help="The csv file to write the reuse to. (default: stdout)")
+    reuse.set_defaults(handler=command_reuse)
+
+    preview = subparsers.add_parser(
+        "preview", parents=[filters], help="Estimate the readability of the selected programs from a sample."
+    )
+    preview.add_argument(
+        "--sample-size", type=int, default=200, help="The number of sentences to parse per program. (default: 200)"
+    )
+    preview.add_argument(
+        "--strata", type=int, default=10, help="The number of strata the sample is drawn from. (default: 10)"
+    )
+    preview.add_argument(
+        "--statistic", dest="statistics", action="append", help="A statistic to estimate, can be repeated."
+    )
+    preview.add_argument(
+        "--resamples", type=int, default=1000, help="The number of bootstrap resamples. (default: 1000)"
+    )
+    preview.add_argument(
+        "--confidence", type=float, default=0.95, help="The confidence level of the intervals. (default: 0.95)"
+    )
+    preview.add_argument("--seed", type=int, default=0, help="The seed of the sampling. (default: 0)")
+    preview.add_argument("--output", help="The csv file to write the estimates to. (default: stdout)")
+    preview.set_defaults(handler=command_preview)
+
+    profile = subparsers.add_parser(
+        "profile", parents=[filters, memory], help="Export the rolling readability profiles of the selected programs."
+    )
+    profile.add_argument("--workers", type=int, default=1, help="The number of processes to use. (default: 1)")
+    profile.add_argument("--window", type=int, default=50, help="The size of the windows. (default: 50)")
+    profile.add_argument(
+        "--step", type=int, default=1, help="The number of sentences between the starts of windows. (default: 1)"
+    )
+    profile.add_argument(
+        "--unit",
+        choices=["sentences", "words"],
+        default="sentences",
+        help="The unit of the window size. (default: sentences)",
+    )
+    profile.add_argument("--output-dir", required=True, help="The folder to write a profile per program to.")
+    profile.set_defaults(handler=command_profile)
+
+    return parser
+
+
+def select(args: argparse.Namespace) -> list["Program"]:
+    """Select the programs matching the filters in the arguments.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        The selected programs, sorted by election type, election date and party.
+    """
+    from src import process_data  # pylint: disable=import-outside-toplevel
+
+    process_data.load_corpus(process_data.DISCOVERY_CACHE_PATH)
+    programs = process_data.select_programs(
+        election_type=args.election_type,
+        party=args.party,
+        election_date=args.election_date,
+        joined_issue=args.joined_issue,
+        tags=args.tags,
+        region=args.region,
+    )
+
+    # Programs of national elections have no region, they are sorted before the regions
+    return sorted(programs, key=lambda p: (p.election_type, p.election_date, p.region or "", p.party.name, p.tags))
+
+
+def memory_ceiling(args: argparse.Namespace) -> int | None:
+    """Return the memory ceiling in bytes from the arguments.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        The memory ceiling in bytes, or None if there is no ceiling.
+    """
+    return None if args.max_memory is None else args.max_memory * 1024**2
+
+
+def memory_limit(args: argparse.Namespace) -> int | None:
+    """Return the memory limit in bytes from the arguments.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        The memory limit in bytes, or None if there is no limit.
+    """
+    return None if args.memory_limit is None else args.memory_limit * 1024**2
+
+
+def report_failures(failures: list[tuple["Program", Exception]]) -> int:
+    """Print the programs that could not be processed. Programs that were skipped because they have no usable text
+    layer are listed separately and do not count as failures.
+
+    Args:
+        failures (list[tuple[Program, Exception]]): The failed programs and their exceptions.
+
+    Returns:
+        The exit status.
+    """
+    from src.preflight import NotExtractableError  # pylint: disable=import-outside-toplevel
+
+    # Programs without a usable text layer are skipped on purpose, which is not a failure
+    skipped = [(p, e) for p, e in failures if isinstance(e, NotExtractableError)]
+    failures = [(p, e) for p, e in failures if not isinstance(e, NotExtractableError)]
+
+    if skipped:
+        print(f"{len(skipped)} program(s) were skipped, they have no usable text layer:", file=sys.stderr)
+        for _, reason in skipped:
+            print(f"  {reason}", file=sys.stderr)
+
+    if not failures:
+        return EXIT_OK
+
+    print(f"{len(failures)} program(s) could not be processed:", file=sys.stderr)
+    for program, exception in failures:
+        print(f"  {program}: {exception!r}", file=sys.stderr)
+
+    return EXIT_FAILURE
+
+
+def command_process(args: argparse.Namespace, programs: list["Program"]) -> int:
+    """Process the selected programs.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    from src import process_data  # pylint: disable=import-outside-toplevel
+
+    if args.dry_run:
+        for p in programs:
+            cached = all(p.cache_status().values())
+            print(f"{'cached' if cached else 'process'}\t{p}")
+        return EXIT_OK
+
+    print(f"Will process {len(programs)} programs")
+
+    # The worker processes get the value from this process when they are started, also when they are spawned
+    process_data.PAGE_WORKERS = args.page_workers
+
+    if args.cooperative:
+        failures = process_data.process_programs_cooperatively(
+            programs, workers=args.workers, lease_seconds=args.lease_seconds, lease_directory=args.lease_dir
+        )
+        return report_failures(failures)
+
+    try:
+        failures = process_data.process_programs(
+            programs,
+            workers=args.workers,
+            stream=args.stream,
+            memory_ceiling=memory_ceiling(args),
+            memory_limit=memory_limit(args),
+        )
+    except MemoryError as exception:
+        print(exception, file=sys.stderr)
+        return EXIT_FAILURE
+
+    return report_failures(failures)
+
+
+def command_status(args: argparse.Namespace, programs: list["Program"]) -> int:  # pylint: disable=unused-argument
+    """Show for each processing stage whether the output of the selected programs is cached.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    for i, p in enumerate(programs):
+        status = p.cache_status()
+
+        if i == 0:
+            print("\t".join([*status, "program"]))
+
+        print("\t".join(["yes" if cached else "no" for cached in status.values()] + [str(p)]))
+
+    return EXIT_OK
+
+
+def command_preflight(args: argparse.Namespace, programs: list["Program"]) -> int:  # pylint: disable=unused-argument
+    """Probe whether the selected programs have a usable text layer. The result is cached, so each pdf is probed once.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    print("\t".join(["verdict", "pages", "characters/page", "garbage", "program"]))
+    failures: list[tuple["Program", Exception]] = []
+
+    for p in programs:
+        try:
+            result = p.preflight()
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            failures.append((p, exception))
+            continue
+
+        print(f"{result.verdict}\t{result.pages}\t{result.characters_per_page:.0f}\t{result.garbage_ratio:.2f}\t{p}")
+
+    return report_failures(failures)
+
+
+def command_duplicates(args: argparse.Namespace, programs: list["Program"]) -> int:  # pylint: disable=unused-argument
+    """List the groups of selected programs with identical pdf files, which are processed only once.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    from src import process_data  # pylint: disable=import-outside-toplevel
+
+    groups = process_data.duplicate_groups(programs)
+
+    for group in groups:
+        print(f"{group[0].source_hash[:12]}\t" + "\t".join(str(p) for p in group))
+
+    print(f"{len(groups)} group(s) of identical pdf files, {sum(len(g) - 1 for g in groups)} duplicate(s)")
+    return EXIT_OK
+
+
+def command_frequencies(args: argparse.Namespace, programs: list["Program"]) -> int:
+    """Process the selected programs and build the lemma frequency table of the lexical sophistication from them, or
+    from a word list.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    from src import process_data, sophistication  # pylint: disable=import-outside-toplevel
+
+    path = args.output or sophistication.TABLE_PATH
+
+    if args.word_list:
+        try:
+            table = sophistication.build_table([sophistication.word_list_counts(args.word_list)])
+        except (OSError, ValueError) as exception:
+            print(exception, file=sys.stderr)
+            return EXIT_FAILURE
+
+        sophistication.write_table(table, path)
+        print(f"Wrote the frequencies of {len(table.ids)} lemmas to {path}")
+        return EXIT_OK
+
+    try:
+        failures = process_data.process_programs(
+            programs,
+            workers=args.workers,
+            stream=args.stream,
+            memory_ceiling=memory_ceiling(args),
+            memory_limit=memory_limit(args),
+        )
+    except MemoryError as exception:
+        print(exception, file=sys.stderr)
+        return EXIT_FAILURE
+
+    failed = {id(p) for p, _ in failures}
+    counts = []
+
+    for p in programs:
+        if id(p) in failed:
+            continue
+
+        assert p.doc is not None
+        counts.append(sophistication.lemma_counts(p.doc))
+
+        if args.stream:
+            p.release()
+
+    try:
+        table = sophistication.build_table(counts)
+    except ValueError as exception:
+        print(exception, file=sys.stderr)
+        return report_failures(failures) or EXIT_FAILURE
+
+    sophistication.write_table(table, path)
+    print(f"Wrote the frequencies of {len(table.ids)} lemmas in {len(counts)} program(s) to {path}")
+
+    return report_failures(failures)
+
+
+def command_metrics(args: argparse.Namespace, programs: list["Program"]) -> int:
+    """Process the selected programs and write their metrics as csv.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    from src import metrics, process_data  # pylint: disable=import-outside-toplevel
+
+    names = args.metrics or list(metrics.PROGRAM_METRICS)
+    unknown = [name for name in names if name not in metrics.PROGRAM_METRICS]
+    if unknown:
+        print(
+            f"Unknown metric(s): {', '.join(unknown)}. Choose from: {', '.join(metrics.PROGRAM_METRICS)}",
+            file=sys.stderr,
+        )
+        return EXIT_FAILURE
+
+    # Keep the progress bar out of the csv when the metrics are written to stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            failures = process_data.process_programs(
+                programs,
+                workers=args.workers,
+                stream=args.stream,
+                memory_ceiling=memory_ceiling(args),
+                memory_limit=memory_limit(args),
+            )
+    except MemoryError as exception:
+        print(exception, file=sys.stderr)
+        return EXIT_FAILURE
+
+    failed = {id(p) for p, _ in failures}
+
+    output: contextlib.AbstractContextManager[TextIO] = (
+        open(args.output, "w", encoding="utf-8", newline="") if args.output else contextlib.nullcontext(sys.stdout)
+    )
+
+    with output as f:
+        writer = csv.writer(f)
+        writer.writerow(["election_type", "election_date", "region", "party", "tags", *names])
+
+        for p in programs:
+            if id(p) in failed or p.doc is None:
+                continue
+
+            values = metrics.compute_metrics(p.doc, names)
+            writer.writerow(
+                [p.election_type, p.election_date, p.region or "", p.party, " ".join(p.tags), *values.values()]
+            )
+
+            # The doc has been reloaded from the cache, release it again
+            if args.stream:
+                p.release()
+
+    return report_failures(failures)
+
+
+def command_compare(args: argparse.Namespace, programs: list["Program"]) -> int:
+    """Process the selected programs and test the differences in readability between every pair as csv.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    from src import process_data, significance  # pylint: disable=import-outside-toplevel
+
+    names = args.statistics or list(significance.STATISTICS)
+    unknown = [name for name in names if name not in significance.STATISTICS]
+    if unknown:
+        print(
+            f"Unknown statistic(s): {', '.join(unknown)}. Choose from: {', '.join(significance.STATISTICS)}",
+            file=sys.stderr,
+        )
+        return EXIT_FAILURE
+
+    # Keep the progress bar out of the csv when the comparisons are written to stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            failures = process_data.process_programs(
+                programs,
+                workers=args.workers,
+                stream=args.stream,
+                memory_ceiling=memory_ceiling(args),
+                memory_limit=memory_limit(args),
+            )
+    except MemoryError as exception:
+        print(exception, file=sys.stderr)
+        return EXIT_FAILURE
+
+    failed = {id(p) for p, _ in failures}
+    processed = [p for p in programs if id(p) not in failed]
+
+    if len(processed) < 2:
+        print("At least two processed programs are necessary for a comparison", file=sys.stderr)
+        return report_failures(failures) or EXIT_FAILURE
+
+    comparisons = significance.compare_programs(
+        processed, names, resamples=args.resamples, confidence=args.confidence, seed=args.seed
+    )
+
+    output: contextlib.AbstractContextManager[TextIO] = (
+        open(args.output, "w", encoding="utf-8", newline="") if args.output else contextlib.nullcontext(sys.stdout)
+    )
+
+    with output as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "first",
+                "second",
+                "statistic",
+                "first_value",
+                "second_value",
+                "difference",
+                "p_value",
+                "ci_low",
+                "ci_high",
+            ]
+        )
+
+        for c in comparisons:
+            writer.writerow(
+                [
+                    c.first,
+                    c.second,
+                    c.statistic,
+                    c.first_value,
+                    c.second_value,
+                    c.difference,
+                    c.p_value,
+                    c.ci_low,
+                    c.ci_high,
+                ]
+            )
+
+    return report_failures(failures)
+
+
+def command_keyness(args: argparse.Namespace, programs: list["Program"]) -> int:
+    """Process the selected programs and the programs to compare with and write the keyness of their words as csv.
+    Without --against filters, the selected programs are compared with all other programs.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    from src import keyness, process_data  # pylint: disable=import-outside-toplevel
+
+    if args.method not in keyness.METHODS:
+        print(f"Unknown method: {args.method}. Choose from: {', '.join(keyness.METHODS)}", file=sys.stderr)
+        return EXIT_FAILURE
+
+    selected = {id(p) for p in programs}
+    against = [
+        p
+        for p in process_data.select_programs(
+            election_type=args.against_election_type,
+            party=args.against_party,
+            election_date=args.against_election_date,
+            joined_issue=None,
+            tags=args.against_tags,
+            region=args.against_region,
+        )
+        if id(p) not in selected
+    ]
+
+    if not against:
+        print("No program to compare with matches the given filters", file=sys.stderr)
+        return EXIT_NO_PROGRAMS
+
+    # Keep the progress bar out of the csv when the words are written to stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            failures = process_data.process_programs(
+                programs + against,
+                workers=args.workers,
+                stream=args.stream,
+                memory_ceiling=memory_ceiling(args),
+                memory_limit=memory_limit(args),
+            )
+    except MemoryError as exception:
+        print(exception, file=sys.stderr)
+        return EXIT_FAILURE
+
+    failed = {id(p) for p, _ in failures}
+    groups = []
+
+    for group in (programs, against):
+        counts = []
+        for p in group:
+            if id(p) in failed:
+                continue
+
+            counts.append(p.term_counts())
+
+            # The doc may have been reloaded from the cache to count the words, release it again
+            if args.stream:
+                p.release()
+
+        groups.append(keyness.merge_counts(counts))
+
+    try:
+        terms = keyness.keyness(
+            groups[0], groups[1], method=args.method, min_count=args.min_count, limit=args.limit or None
+        )
+    except ValueError as exception:
+        print(exception, file=sys.stderr)
+        return report_failures(failures) or EXIT_FAILURE
+
+    output: contextlib.AbstractContextManager[TextIO] = (
+        open(args.output, "w", encoding="utf-8", newline="") if args.output else contextlib.nullcontext(sys.stdout)
+    )
+
+    with output as f:
+        writer = csv.writer(f)
+        writer.writerow(["word", "selected_count", "against_count", args.method])
+        writer.writerows([t.word, t.first_count, t.second_count, t.score] for t in terms)
+
+    return report_failures(failures)
+
+
+def command_reuse(args: argparse.Namespace, programs: list["Program"]) -> int:
+    """Process the selected programs and the programs they may reuse sentences from, see reuse.source_programs(), and
+    write for each pair the reused sentences as csv. The sentences of a joined program are also attributed to the
+    member whose program they are most likely taken from.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    from src import process_data, reuse  # pylint: disable=import-outside-toplevel
+
+    candidates = process_data.select_programs()
+    sources = {id(p): reuse.source_programs(p, candidates) for p in programs}
+
+    for p in programs:
+        if not sources[id(p)]:
+            print(f"No earlier program of {p.party} to compare {p} with", file=sys.stderr)
+
+    programs = [p for p in programs if sources[id(p)]]
+    if not programs:
+        return EXIT_NO_PROGRAMS
+
+    # A source may be selected itself or be the source of several programs, process it once
+    unique = list({id(p): p for p in programs + [s for p in programs for s in sources[id(p)]]}.values())
+
+    # Keep the progress bar out of the csv when the reuse is written to stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            failures = process_data.process_programs(
+                unique,
+                workers=args.workers,
+                stream=args.stream,
+                memory_ceiling=memory_ceiling(args),
+                memory_limit=memory_limit(args),
+            )
+    except MemoryError as exception:
+        print(exception, file=sys.stderr)
+        return EXIT_FAILURE
+
+    failed = {id(p) for p, _ in failures}
+    fingerprints = {}
+
+    for p in unique:
+        if id(p) in failed:
+            continue
+
+        fingerprints[id(p)] = p.sentence_fingerprints()
+
+        # The doc may have been reloaded from the cache to fingerprint the sentences, release it again
+        if args.stream:
+            p.release()
+
+    min_similarity = args.min_similarity or None
+    output: contextlib.AbstractContextManager[TextIO] = (
+        open(args.output, "w", encoding="utf-8", newline="") if args.output else contextlib.nullcontext(sys.stdout)
+    )
+
+    with output as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "program",
+                "source",
+                "sentences",
+                "exact",
+                "near",
+                "reused_ratio",
+                "attributed",
+                "passages",
+                "longest_passage",
+            ]
+        )
+
+        for p in programs:
+            available = [s for s in sources[id(p)] if id(s) in fingerprints]
+            if id(p) not in fingerprints or not available:
+                continue
+
+            attributed = reuse.attribute_sentences(
+                fingerprints[id(p)], [fingerprints[id(s)] for s in available], min_similarity
+            )
+
+            for i, source in enumerate(available):
+                report = reuse.compare_fingerprints(fingerprints[id(p)], fingerprints[id(source)], min_similarity)
+                writer.writerow(
+                    [
+                        p,
+                        source,
+                        report.sentences,
+                        report.exact,
+                        report.near,
+                        report.reused_ratio,
+                        int((attributed == i).sum()),
+                        len(report.passages),
+                        max((passage.length for passage in report.passages), default=0),
+                    ]
+                )
+
+    return report_failures(failures)
+
+
+def command_preview(args: argparse.Namespace, programs: list["Program"]) -> int:
+    """Estimate the readability of the selected programs from a sample of their sentences and write it as csv.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    from src import preview, significance  # pylint: disable=import-outside-toplevel
+
+    names = args.statistics or list(significance.STATISTICS)
+    unknown = [name for name in names if name not in significance.STATISTICS]
+    if unknown:
+        print(
+            f"Unknown statistic(s): {', '.join(unknown)}. Choose from: {', '.join(significance.STATISTICS)}",
+            file=sys.stderr,
+        )
+        return EXIT_FAILURE
+
+    # Keep the progress bar out of the csv when the estimates are written to stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        estimates, failures = preview.preview_programs(
+            programs,
+            names,
+            sample_size=args.sample_size,
+            strata=args.strata,
+            resamples=args.resamples,
+            confidence=args.confidence,
+            seed=args.seed,
+        )
+
+    output: contextlib.AbstractContextManager[TextIO] = (
+        open(args.output, "w", encoding="utf-8", newline="") if args.output else contextlib.nullcontext(sys.stdout)
+    )
+
+    with output as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "program",
+                "statistic",
+                "estimate",
+                "standard_error",
+                "ci_low",
+                "ci_high",
+                "sampled_sentences",
+                "sentences",
+            ]
+        )
+
+        for e in estimates:
+            writer.writerow(
+                [
+                    e.program,
+                    e.statistic,
+                    e.estimate,
+                    e.standard_error,
+                    e.ci_low,
+                    e.ci_high,
+                    e.sampled_sentences,
+                    e.sentences,
+                ]
+            )
+
+    return report_failures(failures)
+
+
+def command_profile(args: argparse.Namespace, programs: list["Program"]) -> int:
+    """Process the selected programs and export their rolling readability profiles.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        programs (list[Program]): The selected programs.
+
+    Returns:
+        The exit status.
+    """
+    from src import process_data, readability_profile  # pylint: disable=import-outside-toplevel
+
+    try:
+        failures = process_data.process_programs(
+            programs,
+            workers=args.workers,
+            stream=args.stream,
+            memory_ceiling=memory_ceiling(args),
+            memory_limit=memory_limit(args),
+        )
+    except MemoryError as exception:
+        print(exception, file=sys.stderr)
+        return EXIT_FAILURE
+
+    failed = {id(p) for p, _ in failures}
+    paths = readability_profile.export_profiles(
+        [p for p in programs if id(p) not in failed],
+        args.output_dir,
+        args.window,
+        step=args.step,
+        unit=args.unit,
+        release=args.stream,
+    )
+
+    print(f"Exported {len(paths)} profile(s) to {args.output_dir}")
+    return report_failures(failures)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command-line interface.
+
+    Args:
+        argv (list[str] | None): The arguments, the arguments of the process if None. (default: {None})
+
+    Returns:
+        The exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    # Cooperative workers do not keep the programs in memory, so the memory options do not apply
+    if getattr(args, "cooperative", False) and (
+        args.stream or args.max_memory is not None or args.memory_limit is not None
+    ):
+        parser.error("--cooperative cannot be combined with --stream, --max-memory or --memory-limit")
+
+    programs = select(args)
+    if not programs:
+        print("No program matches the given filters", file=sys.stderr)
+        return EXIT_NO_PROGRAMS
+
+    return int(args.handler(args, programs))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Harness that compares the speed and text quality of the pdf backends on the manifests.
+
+Each available backend extracts the text of every manifest. The speed is reported in pages per second. The quality is
+reported as the word overlap with the text of the reference backend (pypdf by default): the number of words the
+texts have in common, divided by the number of words in the longest text. A backend that misses or garbles text
+scores lower. Files that cannot be extracted by a backend are counted as failures.
+
+How to use:
+
+    python -m src.compare_backends
+    python -m src.compare_backends --backend pypdf --backend pdfium --limit 20 --output comparison.csv
+
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from src import utils
+from src.pdf_backends import BACKENDS, PypdfBackend, get_backend
+
+_manifest_path: str = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "data", "manifests")
+
+
+@dataclass(slots=True)
+class BackendReport:
+    """A data class to collect the results of a backend."""
+
+    backend: str
+    files: int = 0
+    failures: int = 0
+    pages: int = 0
+    seconds: float = 0.0
+    overlaps: list[float] = field(default_factory=list)
+
+    @property
+    def pages_per_second(self) -> float:
+        """The number of extracted pages per second."""
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def mean_overlap(self) -> float:
+        """The mean word overlap with the reference backend."""
+        return sum(self.overlaps) / len(self.overlaps) if self.overlaps else 0.0
+
+
+def word_overlap(text: str, reference: str) -> float:
+    """Calculate the word overlap between a text and a reference text. Whitespace and layout are ignored, so
+    backends that order the words on a line the same way score equally.
+
+    Args:
+        text (str): The text.
+        reference (str): The reference text.
+
+    Returns:
+        The number of words in common divided by the number of words in the longest text, 1.0 if both are empty.
+    """
+    words, reference_words = Counter(text.split()), Counter(reference.split())
+    longest = max(sum(words.values()), sum(reference_words.values()))
+
+    if not longest:
+        return 1.0
+
+    return sum((words & reference_words).values()) / longest
+
+
+def compare(paths: list[str], backends: list[str], reference: str) -> tuple[list[BackendReport], list[list[object]]]:
+    """Extract the text of the files with every backend and compare it to the reference backend.
+
+    Args:
+        paths (list[str]): The paths to the pdf files.
+        backends (list[str]): The names of the backends to compare.
+        reference (str): The name of the reference backend, which is also extracted.
+
+    Returns:
+        The report of each backend and a row with the results per file and backend.
+    """
+    names = list(dict.fromkeys([reference, *backends]))
+    reports = {name: BackendReport(name) for name in names}
+    rows: list[list[object]] = []
+
+    for i, path in enumerate(paths):
+        utils.progress(i, len(paths), os.path.relpath(path, _manifest_path))
+        reference_text: str | None = None
+
+        for name in names:
+            report = reports[name]
+            report.files += 1
+
+            try:
+                start = time.perf_counter()
+                pages = get_backend(name).extract_pages(path)
+                seconds = time.perf_counter() - start
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                report.failures += 1
+                rows.append([path, name, "", "", "", repr(exception)])
+                continue
+
+            text = "\n".join(pages)
+            if name == reference:
+                reference_text = text
+
+            overlap = word_overlap(text, reference_text) if reference_text is not None else None
+            if overlap is not None:
+                report.overlaps.append(overlap)
+
+            report.pages += len(pages)
+            report.seconds += seconds
+            rows.append([path, name, len(pages), round(seconds, 4), "" if overlap is None else round(overlap, 4), ""])
+
+    if paths:
+        utils.progress(len(paths), len(paths), "Finished")
+
+    return list(reports.values()), rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the comparison harness.
+
+    Args:
+        argv (list[str] | None): The arguments, the arguments of the process if None. (default: {None})
+
+    Returns:
+        The exit status.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.compare_backends", description="Compare the pdf backends.")
+    parser.add_argument("--backend", dest="backends", action="append", help="A backend to compare, can be repeated.")
+    parser.add_argument("--reference", default=PypdfBackend.name, help="The reference backend. (default: pypdf)")
+    parser.add_argument("--target", default=_manifest_path, help="The folder with the manifests.")
+    parser.add_argument("--limit", type=int, help="Only compare the first files, sorted by path.")
+    parser.add_argument("--output", help="The csv file to write the results per file to.")
+    args = parser.parse_args(argv)
+
+    backends = args.backends or [name for name, backend in BACKENDS.items() if backend.is_available()]
+    unavailable = [
+        name for name in [args.reference, *backends] if name not in BACKENDS or not BACKENDS[name].is_available()
+    ]
+    if unavailable:
+        print(f"Unknown or unavailable backend(s): {', '.join(unavailable)}", file=sys.stderr)
+        return 1
+
+    paths = sorted(utils.get_pdf_files_recursive(args.target))[: args.limit]
+    reports, rows = compare(paths, backends, args.reference)
+
+    print(f"{'backend':<10} {'files':>6} {'failed':>6} {'pages':>7} {'seconds':>9} {'pages/s':>9} {'overlap':>8}")
+    for report in reports:
+        print(
+            f"{report.backend:<10} {report.files:>6} {report.failures:>6} {report.pages:>7} {report.seconds:>9.2f} "
+            f"{report.pages_per_second:>9.1f} {report.mean_overlap:>8.3f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["path", "backend", "pages", "seconds", "overlap", "error"])
+            writer.writerows(rows)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
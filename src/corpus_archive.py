@@ -0,0 +1,320 @@
+"""
+This module contains a packed archive of the cleaned texts of the programs, a single file instead of a folder with a
+file per program.
+
+Copying the processed texts to another machine, or reading all of them for an analysis, is dominated by the overhead
+of opening hundreds of small files. The archive stores all texts in one file:
+
+  - A header of HEADER_SIZE bytes: the magic bytes, followed by the offset and length of the index.
+  - The entries, each text optionally compressed with zlib on its own.
+  - The index, json with for each entry its offset, its length in the archive, its size and its sha256 hash.
+
+The archive is read through mmap, so fetching the text of a single program only reads and decompresses that entry.
+The archive is written atomically, the entries are streamed to disk, so packing does not keep the texts in memory.
+
+How to use:
+
+    python -m src.corpus_archive pack processed/text corpus.ptar
+    python -m src.corpus_archive unpack corpus.ptar processed/text
+    python -m src.corpus_archive list corpus.ptar
+
+    with CorpusArchive("corpus.ptar") as archive:
+        text = archive.read_text(program.reference("txt"))
+
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+import zlib
+from types import TracebackType
+from typing import Iterable, Iterator, Self, TypedDict
+
+from src import storage
+
+MAGIC = b"PTXTARC1"
+"""The bytes at the start of every archive, the last byte is the version of the format"""
+
+_header = struct.Struct("<8sQQ")
+"""The header: the magic bytes, the offset and the length of the index"""
+
+HEADER_SIZE = _header.size
+"""The size of the header in bytes"""
+
+COMPRESSION_LEVEL = 6
+"""The zlib compression level of the entries"""
+
+TEXT_SUFFIX = ".txt"
+"""The suffix of the text files that are packed"""
+
+
+class ArchiveEntry(TypedDict):
+    """A type hint for an entry in the index of an archive."""
+
+    offset: int
+    length: int
+    size: int
+    sha256: str
+    compressed: bool
+
+
+def write_archive(path: str, entries: Iterable[tuple[str, bytes]], compress: bool = True) -> dict[str, ArchiveEntry]:
+    """Write an archive atomically. The entries are written as they are iterated, so they do not have to be in
+    memory at the same time.
+
+    Args:
+        path (str): The path of the archive.
+        entries (Iterable[tuple[str, bytes]]): The name and content of each entry.
+
+    Keyword Arguments:
+        compress (bool): Compress each entry with zlib, unless that does not make it smaller. (default: {True})
+
+    Returns:
+        The index of the archive.
+
+    Raises:
+        ValueError: If an entry name occurs more than once.
+    """
+    index: dict[str, ArchiveEntry] = {}
+    temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+
+    try:
+        with open(temporary, "wb") as f:
+            # The header is written again when the position of the index is known
+            f.write(_header.pack(MAGIC, 0, 0))
+
+            for name, data in entries:
+                if name in index:
+                    raise ValueError(f"Entry {name} occurs more than once.")
+
+                stored = zlib.compress(data, COMPRESSION_LEVEL) if compress else data
+                compressed = compress and len(stored) < len(data)
+                if not compressed:
+                    stored = data
+
+                index[name] = {
+                    "offset": f.tell(),
+                    "length": len(stored),
+                    "size": len(data),
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                    "compressed": compressed,
+                }
+                f.write(stored)
+
+            index_offset = f.tell()
+            index_data = json.dumps(index, sort_keys=True).encode("utf-8")
+            f.write(index_data)
+
+            f.seek(0)
+            f.write(_header.pack(MAGIC, index_offset, len(index_data)))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    return index
+
+
+class CorpusArchive:
+    """A packed archive of texts, read through mmap. Use it as a context manager, or close it when done.
+
+    Attributes:
+        path (str): The path of the archive.
+        index (dict[str, ArchiveEntry]): The index of the archive, by the name of the entry.
+
+    """
+
+    def __init__(self, path: str):
+        """A packed archive of texts, read through mmap
+
+        Arguments:
+            path (str): The path of the archive.
+
+        Raises:
+            ValueError: If the file is not an archive or its index is damaged.
+        """
+        self.path = path
+
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(self._map) < HEADER_SIZE:
+                raise ValueError(f"{path} is not a corpus archive.")
+
+            magic, index_offset, index_length = _header.unpack_from(self._map)
+            if magic != MAGIC or index_offset + index_length > len(self._map):
+                raise ValueError(f"{path} is not a corpus archive or is incomplete.")
+
+            self.index: dict[str, ArchiveEntry] = json.loads(self._map[index_offset : index_offset + index_length])
+        except (ValueError, struct.error):
+            self._map.close()
+            raise
+
+    def __enter__(self) -> Self:
+        """Return the archive."""
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc_val: BaseException | None, exc_tb: TracebackType | None
+    ) -> None:
+        """Close the archive."""
+        self.close()
+
+    def __contains__(self, name: object) -> bool:
+        """Return True if the archive contains an entry with the name."""
+        return name in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the names of the entries, in the order in which they are stored."""
+        return iter(sorted(self.index, key=lambda name: self.index[name]["offset"]))
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self.index)
+
+    def close(self) -> None:
+        """Close the memory map of the archive."""
+        self._map.close()
+
+    def read(self, name: str, verify: bool = True) -> bytes:
+        """Read an entry, without reading the other entries.
+
+        Args:
+            name (str): The name of the entry.
+
+        Keyword Arguments:
+            verify (bool): Verify the content against its hash. (default: {True})
+
+        Returns:
+            The content of the entry.
+
+        Raises:
+            KeyError: If the archive does not contain the entry.
+            ValueError: If the entry is corrupt.
+        """
+        entry = self.index[name]
+        data = self._map[entry["offset"] : entry["offset"] + entry["length"]]
+
+        try:
+            if entry["compressed"]:
+                data = zlib.decompress(data)
+        except zlib.error as exception:
+            raise ValueError(f"Entry {name} in {self.path} is corrupt.") from exception
+
+        if len(data) != entry["size"] or (verify and hashlib.sha256(data).hexdigest() != entry["sha256"]):
+            raise ValueError(f"Entry {name} in {self.path} is corrupt.")
+
+        return data
+
+    def read_text(self, name: str, verify: bool = True) -> str:
+        """Read an entry as text, see read().
+
+        Args:
+            name (str): The name of the entry, for example Program.reference("txt").
+
+        Keyword Arguments:
+            verify (bool): Verify the content against its hash. (default: {True})
+
+        Returns:
+            The text of the entry.
+        """
+        return self.read(name, verify).decode("utf-8")
+
+
+def pack_directory(directory: str, path: str, compress: bool = True) -> int:
+    """Pack the texts in a folder, for example processed/text, in an archive. The entries are named after the files.
+
+    Args:
+        directory (str): The folder with the text files.
+        path (str): The path of the archive.
+
+    Keyword Arguments:
+        compress (bool): Compress each entry with zlib. (default: {True})
+
+    Returns:
+        The number of packed texts.
+    """
+    names = sorted(name for name in os.listdir(directory) if name.endswith(TEXT_SUFFIX))
+
+    def entries() -> Iterator[tuple[str, bytes]]:
+        for name in names:
+            with open(os.path.join(directory, name), "rb") as f:
+                yield name, f.read()
+
+    return len(write_archive(path, entries(), compress))
+
+
+def unpack_archive(path: str, directory: str) -> int:
+    """Unpack the texts in an archive to a folder, in the layout of processed/text: each text is written as an
+    artifact with its metadata, see storage.write_artifact().
+
+    Args:
+        path (str): The path of the archive.
+        directory (str): The folder to write the texts to, created if it does not exist.
+
+    Returns:
+        The number of unpacked texts.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    with CorpusArchive(path) as archive:
+        for name in archive:
+            storage.write_artifact(os.path.join(directory, os.path.basename(name)), archive.read(name))
+
+        return len(archive)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Pack, unpack or list a corpus archive.
+
+    Args:
+        argv (list[str] | None): The arguments, the arguments of the process if None. (default: {None})
+
+    Returns:
+        The exit status.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.corpus_archive", description="Pack the cleaned texts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack = subparsers.add_parser("pack", help="Pack the texts in a folder in an archive.")
+    pack.add_argument("directory", help="The folder with the texts, for example processed/text.")
+    pack.add_argument("archive", help="The path of the archive.")
+    pack.add_argument("--no-compress", dest="compress", action="store_false", help="Store the texts uncompressed.")
+
+    unpack = subparsers.add_parser("unpack", help="Unpack the texts in an archive to a folder.")
+    unpack.add_argument("archive", help="The path of the archive.")
+    unpack.add_argument("directory", help="The folder to write the texts to.")
+
+    listing = subparsers.add_parser("list", help="List the texts in an archive.")
+    listing.add_argument("archive", help="The path of the archive.")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "pack":
+            print(f"Packed {pack_directory(args.directory, args.archive, args.compress)} text(s) in {args.archive}")
+        elif args.command == "unpack":
+            print(f"Unpacked {unpack_archive(args.archive, args.directory)} text(s) to {args.directory}")
+        else:
+            with CorpusArchive(args.archive) as archive:
+                for name in archive:
+                    entry = archive.index[name]
+                    print(f"{name}\t{entry['size']}\t{entry['length']}\t{entry['sha256'][:12]}")
+    except (OSError, ValueError) as exception:
+        print(exception, file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
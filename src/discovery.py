@@ -0,0 +1,153 @@
+"""
+This module contains the discovery of the pdf files of the programs in the manifests folder.
+
+With the programs of the municipal (GR) and provincial (PS) elections, the folder holds tens of thousands of files in
+thousands of folders, so walking it one folder at a time takes long, especially on a network drive. The scan lists the
+folders of each level of the tree in parallel, in a pool of threads, since listing a folder waits on the file system.
+
+The listing of each folder is cached, with the modification time of the folder. Adding, removing or renaming a file
+or folder changes the modification time of the folder it is in, so a folder is only listed again when it changed, and
+a scan of an unchanged tree only checks the modification time of each folder. Folders that were modified just before
+they were listed are listed again on the next scan, because a change within the resolution of the modification time
+would go unnoticed. The cache is kept in memory and, optionally, in a json file, so it survives a restart.
+
+How to use:
+
+    paths = scan_pdf_files("data/manifests", cache_path="processed/discovery.json")
+
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict
+
+from src import utils
+
+DEFAULT_WORKERS = 8
+"""The number of threads that list folders at the same time"""
+
+RACY_SECONDS = 2.0
+"""Folders modified less than this many seconds before they were listed are listed again on the next scan"""
+
+CACHE_VERSION = 1
+"""The version of the format of the cache file, a cache of another version is ignored"""
+
+
+class FolderListing(TypedDict):
+    """A type hint for the cached listing of a folder."""
+
+    mtime_ns: int
+    folders: list[str]
+    files: list[str]
+    racy: bool
+
+
+_listings: dict[str, dict[str, FolderListing]] = {}
+"""The cached listings in memory, by the path of the cache file, or the scanned folder without a cache file"""
+
+_listings_lock = threading.Lock()
+"""Lock that serializes scans that share a cache"""
+
+
+def list_folder(path: str) -> FolderListing:
+    """List the subfolders and pdf files of a folder, hidden entries are skipped.
+
+    Args:
+        path (str): The path of the folder.
+
+    Returns:
+        The listing of the folder, with the names of its subfolders and pdf files, sorted.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    folders, files = [], []
+
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+
+            if entry.is_dir():
+                folders.append(entry.name)
+            elif entry.name.endswith(".pdf") and entry.is_file():
+                files.append(entry.name)
+
+    # A change within the resolution of the modification time could be missed, so the folder is listed again
+    racy = time.time_ns() - mtime_ns < RACY_SECONDS * 1e9
+
+    return {"mtime_ns": mtime_ns, "folders": sorted(folders), "files": sorted(files), "racy": racy}
+
+
+def _read_cache(cache_path: str) -> dict[str, FolderListing]:
+    """Read the cached listings from a file, an empty cache if the file does not exist or is not valid."""
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+
+    listings: dict[str, FolderListing] = data.get("folders", {})
+    return listings
+
+
+def scan_pdf_files(target: str, cache_path: str | None = None, workers: int = DEFAULT_WORKERS) -> list[str]:
+    """Find all pdf files in a folder and its subfolders. Only the folders that changed since the last scan are
+    listed again.
+
+    Args:
+        target (str): The folder to scan.
+
+    Keyword Arguments:
+        cache_path (str | None): The path of the json file with the cached listings, only kept in memory if None.
+            (default: {None})
+        workers (int): The number of threads that list folders at the same time. (default: {DEFAULT_WORKERS})
+
+    Returns:
+        The paths of the pdf files, sorted.
+
+    Raises:
+        AssertionError: If workers is not a positive integer.
+        FileNotFoundError: If the folder does not exist.
+    """
+    assert isinstance(workers, int) and workers > 0, "Workers must be a positive integer."
+
+    key = cache_path or os.path.realpath(target)
+
+    with _listings_lock:
+        if key not in _listings:
+            _listings[key] = _read_cache(cache_path) if cache_path else {}
+        cached = _listings[key]
+
+        def visit(path: str) -> FolderListing:
+            listing = cached.get(path)
+
+            # A folder that did not change since it was listed has the same modification time
+            if listing is not None and not listing["racy"] and os.stat(path).st_mtime_ns == listing["mtime_ns"]:
+                return listing
+
+            return list_folder(path)
+
+        listings: dict[str, FolderListing] = {}
+        level = [os.path.normpath(target)]
+
+        # Each level of the tree is listed in parallel, the subfolders form the next level
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while level:
+                listed = list(executor.map(visit, level))
+                listings.update(zip(level, listed))
+                level = [
+                    os.path.join(path, name) for path, listing in zip(level, listed) for name in listing["folders"]
+                ]
+
+        # Folders that were removed are dropped from the cache, the cache is only written when it changed
+        if listings != cached:
+            _listings[key] = listings
+            if cache_path:
+                utils.write_file_atomic(cache_path, json.dumps({"version": CACHE_VERSION, "folders": listings}))
+
+    return sorted(os.path.join(path, name) for path, listing in listings.items() for name in listing["files"])
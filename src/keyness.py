@@ -0,0 +1,266 @@
+"""
+This module contains the keyness of words, which shows the words that are characteristic for a group of programs
+compared to another group, for example a party compared to the other parties of the same election.
+
+The words of a program are counted once, as arrays of integer ids: the hashes spacy stores for the lowercase form of
+each alphabetic token, sorted, with the number of times each occurs. The counts of a program are cached, see
+Program.term_counts(), so the counts of any group of programs are the sum of the counts of its programs, without
+tokenizing the programs again. Counts are summed and aligned with numpy on the sorted ids.
+
+Two measures of keyness are available:
+  - log_odds: The weighted log-odds ratio with an informative Dirichlet prior, as a z-score. The prior is the counts
+    of a background corpus, by default the two groups together. The prior shrinks the log-odds of rare words, so they
+    do not dominate the list. See: Monroe, Colaresi & Quinn (2008), https://doi.org/10.1093/pan/mpn018
+  - log_likelihood: Dunning's log-likelihood ratio (G2), signed positive for words that are relatively more frequent
+    in the first group.
+
+How to use:
+
+    first = group_counts(get_programs(party="VVD", election_date="2023-11"))
+    second = group_counts(get_programs(party="GroenLinks-PvdA", election_date="2023-11"))
+
+    for term in keyness(first, second, limit=20):
+        print(term)
+
+"""
+
+import io
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Iterable, NamedTuple, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+from spacy.attrs import IS_ALPHA, LOWER
+from spacy.tokens import Doc
+
+if TYPE_CHECKING:
+    from src.process_data import Program
+
+IdArray: TypeAlias = npt.NDArray[np.uint64]
+IntArray: TypeAlias = npt.NDArray[np.int64]
+FloatArray: TypeAlias = npt.NDArray[np.float64]
+
+MIN_COUNT = 5
+"""The minimal number of times a word must occur in the two groups together to be scored"""
+
+MIN_PRIOR = 0.01
+"""The prior count of words that do not occur in the background corpus"""
+
+
+class TermCounts(NamedTuple):
+    """The number of times each word occurs in a text. The arrays are aligned and sorted by id."""
+
+    ids: IdArray
+    """The hash of the lowercase form of each word"""
+
+    counts: IntArray
+    """The number of times each word occurs"""
+
+    words: npt.NDArray[np.str_]
+    """The lowercase form of each word"""
+
+    @property
+    def total(self) -> int:
+        """The number of words of the text."""
+        return int(self.counts.sum())
+
+
+def term_counts(doc: Doc) -> TermCounts:
+    """
+    Counts the words of a text.
+
+    Args:
+        doc {Doc} -- The spacy doc of the text.
+
+    Returns:
+        TermCounts: The number of times each word occurs, the words are the alphabetic tokens.
+    """
+
+    values = doc.to_array([LOWER, IS_ALPHA])
+    positions = np.flatnonzero(values[:, 1] == 1)
+
+    ids, first, counts = np.unique(values[positions, 0], return_index=True, return_counts=True)
+    words = np.array([doc[int(i)].lower_ for i in positions[first]], dtype=np.str_)
+
+    return TermCounts(ids.astype(np.uint64), counts.astype(np.int64), words)
+
+
+def counts_to_bytes(counts: TermCounts) -> bytes:
+    """Serialize term counts as an uncompressed numpy archive."""
+    buffer = io.BytesIO()
+    np.savez(buffer, **counts._asdict())
+    return buffer.getvalue()
+
+
+def counts_from_bytes(data: bytes) -> TermCounts:
+    """Deserialize term counts serialized with counts_to_bytes()."""
+    with np.load(io.BytesIO(data)) as archive:
+        return TermCounts(**{field: archive[field] for field in TermCounts._fields})
+
+
+def merge_counts(counts: Iterable[TermCounts]) -> TermCounts:
+    """Sum the term counts of several texts.
+
+    Args:
+        counts (Iterable[TermCounts]): The term counts of each text.
+
+    Returns:
+        The number of times each word occurs in all texts together.
+    """
+    parts = list(counts)
+    if not parts:
+        return TermCounts(np.empty(0, np.uint64), np.empty(0, np.int64), np.empty(0, np.str_))
+
+    ids, first, inverse = np.unique(
+        np.concatenate([part.ids for part in parts]), return_index=True, return_inverse=True
+    )
+    summed = np.bincount(inverse, weights=np.concatenate([part.counts for part in parts]), minlength=len(ids))
+
+    return TermCounts(ids, summed.astype(np.int64), np.concatenate([part.words for part in parts])[first])
+
+
+def group_counts(programs: list["Program"]) -> TermCounts:
+    """Sum the cached term counts of a group of programs, see Program.term_counts().
+
+    Args:
+        programs (list[Program]): The programs of the group.
+
+    Returns:
+        The number of times each word occurs in the programs together.
+    """
+    return merge_counts(program.term_counts() for program in programs)
+
+
+def align_counts(vocabulary: IdArray, counts: TermCounts) -> IntArray:
+    """Return the count of each word of a vocabulary in term counts, 0 for the words that do not occur.
+
+    Args:
+        vocabulary (np.ndarray): The sorted ids of the words.
+        counts (TermCounts): The term counts.
+
+    Returns:
+        The count of each word of the vocabulary.
+    """
+    aligned = np.zeros(len(vocabulary), dtype=np.int64)
+
+    # Words that are not in the vocabulary are ignored
+    positions = np.minimum(np.searchsorted(vocabulary, counts.ids), max(len(vocabulary) - 1, 0))
+    found = vocabulary[positions] == counts.ids if len(vocabulary) else np.zeros(len(counts.ids), dtype=bool)
+    aligned[positions[found]] = counts.counts[found]
+
+    return aligned
+
+
+def log_odds(first: IntArray, second: IntArray, prior: FloatArray) -> FloatArray:
+    """Calculate the z-score of the weighted log-odds ratio of each word with an informative Dirichlet prior.
+
+    Args:
+        first (np.ndarray): The count of each word in the first group.
+        second (np.ndarray): The count of each word in the second group.
+        prior (np.ndarray): The prior count of each word.
+
+    Returns:
+        The z-score of each word, positive if the word is characteristic for the first group.
+    """
+    prior_total = prior.sum()
+    first_odds = np.log(first + prior) - np.log(first.sum() + prior_total - first - prior)
+    second_odds = np.log(second + prior) - np.log(second.sum() + prior_total - second - prior)
+
+    variance = 1 / (first + prior) + 1 / (second + prior)
+    scores: FloatArray = (first_odds - second_odds) / np.sqrt(variance)
+    return scores
+
+
+def log_likelihood(first: IntArray, second: IntArray, _prior: FloatArray) -> FloatArray:
+    """Calculate Dunning's log-likelihood ratio (G2) of each word, the prior is not used.
+
+    Args:
+        first (np.ndarray): The count of each word in the first group.
+        second (np.ndarray): The count of each word in the second group.
+        _prior (np.ndarray): The prior count of each word, only for the same signature as log_odds().
+
+    Returns:
+        The G2 of each word, positive if the word is relatively more frequent in the first group.
+    """
+    first_total, second_total = first.sum(), second.sum()
+    expected_first = first_total * (first + second) / (first_total + second_total)
+    expected_second = second_total * (first + second) / (first_total + second_total)
+
+    # A word that does not occur in a group contributes 0, the limit of x log(x) at 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g2 = 2 * (
+            np.where(first > 0, first * np.log(first / expected_first), 0.0)
+            + np.where(second > 0, second * np.log(second / expected_second), 0.0)
+        )
+
+    scores: FloatArray = np.sign(first / first_total - second / second_total) * g2
+    return scores
+
+
+METHODS: dict[str, Callable[[IntArray, IntArray, FloatArray], FloatArray]] = {
+    "log_odds": log_odds,
+    "log_likelihood": log_likelihood,
+}
+"""Reference to the measures of keyness, by name"""
+
+
+@dataclass(slots=True)
+class KeyTerm:
+    """A data class to represent the keyness of a word between two groups of programs."""
+
+    word: str
+    first_count: int
+    second_count: int
+    score: float
+    """The keyness, positive if the word is characteristic for the first group, negative for the second group"""
+
+
+def keyness(
+    first: TermCounts,
+    second: TermCounts,
+    method: str = "log_odds",
+    prior: TermCounts | None = None,
+    min_count: int = MIN_COUNT,
+    limit: int | None = None,
+) -> list[KeyTerm]:
+    """Calculate the keyness of the words of two groups of programs.
+
+    Args:
+        first (TermCounts): The counts of the first group.
+        second (TermCounts): The counts of the second group.
+
+    Keyword Arguments:
+        method (str): The measure of keyness, see METHODS. (default: {"log_odds"})
+        prior (TermCounts | None): The counts of the background corpus of log_odds, the two groups together if None.
+            (default: {None})
+        min_count (int): The minimal number of times a word must occur in the two groups together. (default:
+            {MIN_COUNT})
+        limit (int | None): The number of most characteristic words of each group, all words if None. (default: {None})
+
+    Returns:
+        The words, the most characteristic words of the first group first and of the second group last.
+
+    Raises:
+        KeyError: If the method is unknown.
+        ValueError: If a group has no words.
+    """
+    function = METHODS[method]
+
+    if not first.total or not second.total:
+        raise ValueError("Cannot calculate the keyness, a group has no words.")
+
+    # The vocabulary is the union of the words of both groups
+    merged = merge_counts([first, second])
+    first_counts, second_counts = align_counts(merged.ids, first), align_counts(merged.ids, second)
+
+    prior_counts = merged.counts if prior is None else align_counts(merged.ids, prior)
+    scores = function(first_counts, second_counts, np.maximum(prior_counts, MIN_PRIOR).astype(np.float64))
+
+    # Sort on the score, the words that occur too rarely are left out
+    order = np.flatnonzero(merged.counts >= min_count)
+    order = order[np.argsort(-scores[order], kind="stable")]
+
+    if limit is not None and len(order) > 2 * limit:
+        order = np.concatenate([order[:limit], order[-limit:]])
+
+    return [KeyTerm(str(merged.words[i]), int(first_counts[i]), int(second_counts[i]), float(scores[i])) for i in order]
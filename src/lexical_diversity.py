@@ -0,0 +1,237 @@
+"""
+This module contains measures of the lexical diversity of a text, which, unlike the entropy or the type-token ratio,
+do not depend on the length of the text. Therefore, long programs can be compared with short ones.
+
+  - MTLD: the mean length of the sequences of words that keep a type-token ratio above a threshold.
+  - MATTR: the moving-average type-token ratio, the mean type-token ratio of all windows of a fixed number of words.
+  - HD-D: the expected type-token ratio of a random sample of a fixed number of words, from the hypergeometric
+    distribution.
+
+The measures work on the integer ids of the words, the hashes spacy stores for the lowercase form of each token,
+instead of on strings. The ids are read from the doc at once with Doc.to_array() and renumbered from zero, so the
+counts are kept in arrays. MATTR updates the number of types as the window slides, instead of counting each window
+again.
+
+How to use:
+
+    ids = word_ids(doc)
+
+    mtld(ids), mattr(ids), hdd(ids)
+
+"""
+
+import numpy as np
+import numpy.typing as npt
+from spacy.attrs import IS_ALPHA, LOWER
+from spacy.tokens import Doc
+
+MTLD_THRESHOLD = 0.72
+"""The type-token ratio at which MTLD ends a sequence of words"""
+
+MATTR_WINDOW = 50
+"""The number of words in a window of MATTR"""
+
+HDD_SAMPLE_SIZE = 42
+"""The number of words in a sample of HD-D"""
+
+
+def word_ids(doc: Doc, attribute: int = LOWER) -> npt.NDArray[np.int64]:
+    """
+    Collects the ids of the words of a text, numbered from zero in order of their value.
+
+    Args:
+        doc {Doc} -- The spacy doc of the text.
+
+    Keyword Arguments:
+        attribute {int} -- The spacy attribute that identifies a word, LOWER or ORTH. (default: {LOWER})
+
+    Returns:
+        np.ndarray: The id of each word, the words are the alphabetic tokens.
+    """
+
+    values = doc.to_array([attribute, IS_ALPHA])
+    words = values[values[:, 1] == 1, 0]
+
+    ids: npt.NDArray[np.int64] = np.unique(words, return_inverse=True)[1].astype(np.int64)
+    return ids
+
+
+def _mtld_factors(ids: npt.NDArray[np.int64], threshold: float) -> float:
+    """
+    Counts the number of sequences of words of which the type-token ratio stays above the threshold, in a single
+    pass over the words. The last, incomplete, sequence counts as the fraction of the way to the threshold.
+
+    Args:
+        ids {np.ndarray} -- The ids of the words.
+        threshold {float} -- The type-token ratio at which a sequence ends.
+
+    Returns:
+        float: The number of sequences.
+    """
+
+    seen = bytearray(int(ids.max()) + 1 if len(ids) else 0)
+    sequence: list[int] = []
+    types = 0
+    factors = 0.0
+
+    for word in ids.tolist():
+        sequence.append(word)
+        if not seen[word]:
+            seen[word] = 1
+            types += 1
+
+        if types / len(sequence) <= threshold:
+            factors += 1
+            for seen_word in sequence:
+                seen[seen_word] = 0
+            sequence.clear()
+            types = 0
+
+    if sequence:
+        factors += (1 - types / len(sequence)) / (1 - threshold)
+
+    return factors
+
+
+def mtld(ids: npt.NDArray[np.int64], threshold: float = MTLD_THRESHOLD) -> float:
+    """
+    Calculates the measure of textual lexical diversity (MTLD), the mean of the forward and the backward pass.
+
+    See: McCarthy & Jarvis (2010), https://doi.org/10.3758/BRM.42.2.381
+
+    Args:
+        ids {np.ndarray} -- The ids of the words, see word_ids().
+
+    Keyword Arguments:
+        threshold {float} -- The type-token ratio at which a sequence ends. (default: {MTLD_THRESHOLD})
+
+    Returns:
+        float: The MTLD, NaN if there are no words.
+    """
+
+    lengths = []
+    for direction in (ids, ids[::-1]):
+        factors = _mtld_factors(direction, threshold)
+        lengths.append(len(ids) / factors if factors else float(len(ids)))
+
+    return float(np.mean(lengths)) if len(ids) else float("nan")
+
+
+def mattr(ids: npt.NDArray[np.int64], window: int = MATTR_WINDOW) -> float:
+    """
+    Calculates the moving-average type-token ratio (MATTR).
+
+    When the window slides one word, the word that leaves the window removes a type if it does not occur again in
+    the window, and the word that enters the window adds a type if it does not occur earlier in the window. So the
+    number of types of every window follows from the previous and next occurrence of each word.
+
+    See: Covington & McFall (2010), https://doi.org/10.1080/09296171003643098
+
+    Args:
+        ids {np.ndarray} -- The ids of the words, see word_ids().
+
+    Keyword Arguments:
+        window {int} -- The number of words in a window. (default: {MATTR_WINDOW})
+
+    Returns:
+        float: The MATTR, the type-token ratio of the text if it is shorter than the window, NaN if there are no words.
+    """
+
+    count = len(ids)
+    if not count:
+        return float("nan")
+    if count <= window:
+        return len(np.unique(ids)) / count
+
+    # The position of the previous and next occurrence of each word, -1 and count if there is none
+    order = np.argsort(ids, kind="stable")
+    same = ids[order[1:]] == ids[order[:-1]]
+    previous = np.full(count, -1, dtype=np.int64)
+    following = np.full(count, count, dtype=np.int64)
+    previous[order[1:][same]] = order[:-1][same]
+    following[order[:-1][same]] = order[1:][same]
+
+    # Window s covers the words [s, s + window), sliding from window s - 1 to s removes word s - 1 and adds word
+    # s + window - 1
+    starts = np.arange(1, count - window + 1)
+    removed = following[starts - 1] >= starts + window - 1
+    added = previous[starts + window - 1] < starts
+
+    first = len(np.unique(ids[:window]))
+    types = first + np.concatenate([[0], np.cumsum(added.astype(np.int64) - removed.astype(np.int64))])
+
+    return float(types.mean() / window)
+
+
+def hdd(ids: npt.NDArray[np.int64], sample_size: int = HDD_SAMPLE_SIZE) -> float:
+    """
+    Calculates the HD-D, the expected type-token ratio of a random sample of words from the text. A type contributes
+    the probability that it occurs in the sample, divided by the size of the sample.
+
+    See: McCarthy & Jarvis (2007), https://doi.org/10.1177/0265532207080767
+
+    Args:
+        ids {np.ndarray} -- The ids of the words, see word_ids().
+
+    Keyword Arguments:
+        sample_size {int} -- The number of words in a sample. (default: {HDD_SAMPLE_SIZE})
+
+    Returns:
+        float: The HD-D, NaN if the text has fewer words than the sample.
+    """
+
+    count = len(ids)
+    if count < sample_size:
+        return float("nan")
+
+    frequencies = np.bincount(ids)
+    frequencies = frequencies[frequencies > 0].astype(np.float64)
+
+    # The probability that a sample does not contain a type with frequency f is the product over the draws i of
+    # (count - f - i) / (count - i)
+    draws = np.arange(sample_size, dtype=np.float64)
+    absent = np.prod(np.clip((count - frequencies[:, None] - draws) / (count - draws), 0, None), axis=1)
+
+    return float(np.sum(1 - absent) / sample_size)
+
+
+def mtld_index(doc: Doc) -> float:
+    """
+    Calculates the MTLD for a given text.
+
+    Args:
+        doc {Doc} -- The spacy doc for which the MTLD should be calculated.
+
+    Returns:
+        float: The MTLD.
+    """
+
+    return mtld(word_ids(doc))
+
+
+def mattr_index(doc: Doc) -> float:
+    """
+    Calculates the moving-average type-token ratio for a given text.
+
+    Args:
+        doc {Doc} -- The spacy doc for which the MATTR should be calculated.
+
+    Returns:
+        float: The MATTR.
+    """
+
+    return mattr(word_ids(doc))
+
+
+def hdd_index(doc: Doc) -> float:
+    """
+    Calculates the HD-D for a given text.
+
+    Args:
+        doc {Doc} -- The spacy doc for which the HD-D should be calculated.
+
+    Returns:
+        float: The HD-D.
+    """
+
+    return hdd(word_ids(doc))
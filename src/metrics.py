@@ -0,0 +1,55 @@
+"""
+This module contains the metrics that are reported for each program.
+
+The metrics are registered in PROGRAM_METRICS, which maps the name of the metric to a function that calculates the
+metric from the spacy doc of a program. To report a new metric, add it to PROGRAM_METRICS.
+
+How to use:
+
+    from src import metrics
+
+    values = metrics.compute_metrics(program.doc)
+
+"""
+
+from typing import Callable
+
+from spacy.tokens import Doc
+
+from src import lexical_diversity, readability, sophistication
+
+PROGRAM_METRICS: dict[str, Callable[[Doc], float]] = {
+    "flesch_douma_index": readability.flesch_douma_index,
+    "average_sentence_length": readability.average_sentence_length,
+    "average_word_length": readability.average_word_length,
+    "average_syllables_per_word": readability.average_syllables_per_word,
+    "average_syllables_per_sentence": readability.average_syllables_per_sentence,
+    "average_words_per_sentence": readability.average_words_per_sentence,
+    "entropy": readability.entropy,
+    "mtld": lexical_diversity.mtld_index,
+    "mattr": lexical_diversity.mattr_index,
+    "hdd": lexical_diversity.hdd_index,
+    "lexical_sophistication": sophistication.lexical_sophistication,
+    "rare_word_ratio": sophistication.rare_word_ratio,
+}
+"""Reference to the functions that calculate the metrics of a program, by the name of the metric"""
+
+
+def compute_metrics(doc: Doc, names: list[str] | None = None) -> dict[str, float]:
+    """Compute the metrics for a spacy doc.
+
+    Args:
+        doc (Doc): The spacy doc for which the metrics should be computed.
+
+    Keyword Arguments:
+        names (list[str] | None): The names of the metrics to compute, all metrics if None. (default: {None})
+
+    Returns:
+        dict[str, float]: The value of each metric by the name of the metric.
+
+    Raises:
+        KeyError: If a metric is unknown.
+    """
+    names = list(PROGRAM_METRICS) if names is None else names
+
+    return {name: PROGRAM_METRICS[name](doc) for name in names}
@@ -0,0 +1,461 @@
+"""
+This module contains the backends that extract the text from a pdf file.
+
+The default backend uses pypdf. Faster backends based on pdfium (pypdfium2) or MuPDF (pymupdf) can be used when
+the corresponding package is installed. These packages are optional, a backend is only imported when it is used.
+
+The backend is chosen globally with PDF_BACKEND in the process_data module, or per program by adding the tag of the
+backend to the filename of the program, for example `CDA #Pdfium.pdf`. See BACKEND_TAGS for the supported tags.
+
+The layout backend also uses pypdf, but reads the position of every piece of text on the page. Text in the top and
+bottom margin bands of the pages that repeats across the pages, like running headers, footers and page numbers, is
+dropped before the pages are joined. Text in the body of the page is never dropped, even when it repeats.
+
+When adding a new backend, implement a subclass of PdfBackend and add it to BACKENDS and BACKEND_TAGS.
+
+Large files can be extracted with several processes by extract_pages_sharded(). The pages are split in contiguous
+ranges, each process opens the file and extracts its range, and the ranges are joined in order. Because every page is
+extracted on its own, the result is identical to serial extraction.
+
+How to use:
+
+    backend = get_backend("pdfium")
+
+    pages = backend.extract_pages(path)
+
+"""
+
+import importlib.util
+import re
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from importlib import metadata
+from typing import Any, NamedTuple
+
+SHARDING_PAGE_THRESHOLD = 60
+"""Files with fewer pages are always extracted serially, because starting the processes costs more than it saves"""
+
+MIN_PAGES_PER_SHARD = 20
+"""The minimal number of pages in a range, every range opens the file again"""
+
+SHARDS_PER_WORKER = 2
+"""The number of ranges per process"""
+
+MARGIN_BAND = 0.1
+"""The fraction of the page height at the top and at the bottom in which the layout backend looks for running headers,
+footers and page numbers"""
+
+MARGIN_REPEAT_FRACTION = 0.25
+"""The fraction of the pages on which a text in a margin band must occur to be dropped by the layout backend. Headers
+often alternate between the left and right pages, so each occurs on half of the pages."""
+
+MIN_MARGIN_REPEATS = 3
+"""The minimal number of pages on which a text in a margin band must occur to be dropped by the layout backend"""
+
+_digits_pattern: re.Pattern[str] = re.compile(r"\d+")
+"""Regex pattern that matches numbers, which are replaced so page numbers and other counters in the margins compare
+equal"""
+
+
+class PdfBackend(ABC):
+    """The interface of a backend that extracts the text from a pdf file.
+
+    Attributes:
+        name (str): The name of the backend.
+        package (str): The name of the package the backend depends on.
+        shardable (bool): True if page ranges can be extracted independently, see extract_pages_sharded().
+        strips_margins (bool): True if the backend drops running headers, footers and page numbers itself, so they do
+            not have to be removed from the text afterward.
+
+    """
+
+    name: str
+    package: str
+    shardable: bool = True
+    strips_margins: bool = False
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Return True if the package of the backend is installed, False otherwise."""
+        return importlib.util.find_spec(cls.package) is not None
+
+    @property
+    def version(self) -> str:
+        """The version of the package the backend depends on."""
+        return metadata.version(self.package)
+
+    def fingerprint_parts(self) -> tuple[object, ...]:
+        """The functions, versions and settings that determine the extracted text, see stage_cache.fingerprint()."""
+        return (self.name, self.version, type(self).extract_pages)
+
+    @abstractmethod
+    def page_count(self, path: str) -> int:
+        """Return the number of pages of a pdf file.
+
+        Arguments:
+            path (str): The path to the pdf file.
+        """
+
+    @abstractmethod
+    def extract_pages(self, path: str, start: int = 0, stop: int | None = None) -> list[str]:
+        """Extract the text of a range of pages from a pdf file.
+
+        Arguments:
+            path (str): The path to the pdf file.
+
+        Keyword Arguments:
+            start (int): The index of the first page. (default: {0})
+            stop (int | None): The index after the last page, the last page of the file if None. (default: {None})
+
+        Returns:
+            The text of each page in the range.
+        """
+
+
+class PypdfBackend(PdfBackend):
+    """Backend that extracts the text with pypdf."""
+
+    name = "pypdf"
+    package = "pypdf"
+
+    def page_count(self, path: str) -> int:
+        """Return the number of pages of a pdf file."""
+        from pypdf import PdfReader  # pylint: disable=import-outside-toplevel
+
+        return len(PdfReader(path).pages)
+
+    def extract_pages(self, path: str, start: int = 0, stop: int | None = None) -> list[str]:
+        """Extract the text of a range of pages from a pdf file."""
+        from pypdf import PdfReader  # pylint: disable=import-outside-toplevel
+
+        reader = PdfReader(path)
+        return [page.extract_text() for page in reader.pages[start:stop]]
+
+
+class MarginFragment(NamedTuple):
+    """A piece of text on a page, as reported by the text visitor of pypdf."""
+
+    text: str
+    """The text"""
+
+    band: str | None
+    """The margin band the text is in, "top" or "bottom", or None if the text is in the body of the page"""
+
+    @property
+    def key(self) -> str:
+        """The text used to recognize the fragment on other pages, with digits, case and whitespace normalized."""
+        return " ".join(_digits_pattern.sub("#", self.text).casefold().split())
+
+
+def _vertical_position(page: Any, cm: list[float], tm: list[float]) -> float:
+    """Return the vertical position of text on a page, as a fraction of the height of the page as it is displayed.
+
+    Arguments:
+        page (PageObject): The pypdf page.
+        cm (list[float]): The current transformation matrix.
+        tm (list[float]): The text matrix.
+
+    Returns:
+        The position, 0.0 at the bottom and 1.0 at the top of the page.
+    """
+    x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+    y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+    box = page.cropbox
+    width, height = float(box.width) or 1.0, float(box.height) or 1.0
+    rotation = page.get("/Rotate", 0) % 360
+
+    # A rotated page is displayed with one of its sides at the top
+    if rotation == 90:
+        return 1.0 - (x - float(box.left)) / width
+    if rotation == 180:
+        return 1.0 - (y - float(box.bottom)) / height
+    if rotation == 270:
+        return (x - float(box.left)) / width
+    return (y - float(box.bottom)) / height
+
+
+def _page_fragments(page: Any) -> list[MarginFragment]:
+    """Extract the text of a page as fragments, with the margin band each fragment is in.
+
+    pypdf reports some text, like the separators it inserts between lines, without a position. Such text is at the
+    position of the text before it.
+
+    Arguments:
+        page (PageObject): The pypdf page.
+
+    Returns:
+        The fragments, in the order of page.extract_text().
+    """
+    fragments: list[MarginFragment] = []
+    band: str | None = None
+
+    def visit(text: str, cm: list[float], tm: list[float], *_: object) -> None:
+        nonlocal band
+        if not text:
+            return
+
+        if any(tm[4:]) or any(cm[4:]):
+            position = _vertical_position(page, cm, tm)
+            band = "top" if position > 1.0 - MARGIN_BAND else "bottom" if position < MARGIN_BAND else None
+
+        fragments.append(MarginFragment(text, band))
+
+    page.extract_text(visitor_text=visit)
+    return fragments
+
+
+def strip_repeating_margins(pages: list[list[MarginFragment]]) -> list[str]:
+    """Drop the fragments in the margin bands that repeat on several pages and join the remaining fragments of each
+    page. A fragment repeats when a fragment with the same key occurs in the same band on at least
+    MARGIN_REPEAT_FRACTION of the pages, and on at least MIN_MARGIN_REPEATS pages.
+
+    Arguments:
+        pages (list[list[MarginFragment]]): The fragments of each page.
+
+    Returns:
+        The text of each page, without the repeating fragments.
+    """
+    # Count the number of pages on which each text occurs in each band
+    counts: Counter[tuple[str | None, str]] = Counter()
+    for fragments in pages:
+        counts.update({(fragment.band, fragment.key) for fragment in fragments if fragment.band and fragment.key})
+
+    minimum = max(MIN_MARGIN_REPEATS, MARGIN_REPEAT_FRACTION * len(pages))
+    repeating = {band_key for band_key, count in counts.items() if count >= minimum}
+
+    return [
+        "".join(
+            fragment.text
+            for fragment in fragments
+            if not fragment.key or (fragment.band, fragment.key) not in repeating
+        )
+        for fragments in pages
+    ]
+
+
+class LayoutBackend(PypdfBackend):
+    """Backend that extracts the text with pypdf and drops the text in the margin bands that repeats across the pages,
+    like running headers, footers and page numbers.
+
+    Whether a text repeats is decided over all pages of the file, so the pages of a file cannot be extracted in
+    independent ranges.
+    """
+
+    name = "layout"
+    package = "pypdf"
+    shardable = False
+    strips_margins = True
+
+    def fingerprint_parts(self) -> tuple[object, ...]:
+        """The functions, versions and settings that determine the extracted text, including the margin detection."""
+        return (
+            *super().fingerprint_parts(),
+            _page_fragments,
+            _vertical_position,
+            strip_repeating_margins,
+            _digits_pattern,
+            MARGIN_BAND,
+            MARGIN_REPEAT_FRACTION,
+            MIN_MARGIN_REPEATS,
+        )
+
+    def extract_pages(self, path: str, start: int = 0, stop: int | None = None) -> list[str]:
+        """Extract the text of a range of pages from a pdf file, without the repeating margins of the range."""
+        from pypdf import PdfReader  # pylint: disable=import-outside-toplevel
+
+        reader = PdfReader(path)
+        return strip_repeating_margins([_page_fragments(page) for page in reader.pages[start:stop]])
+
+
+class PdfiumBackend(PdfBackend):
+    """Backend that extracts the text with pdfium, through pypdfium2."""
+
+    name = "pdfium"
+    package = "pypdfium2"
+
+    def page_count(self, path: str) -> int:
+        """Return the number of pages of a pdf file."""
+        import pypdfium2  # pylint: disable=import-outside-toplevel
+
+        document = pypdfium2.PdfDocument(path)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    def extract_pages(self, path: str, start: int = 0, stop: int | None = None) -> list[str]:
+        """Extract the text of a range of pages from a pdf file."""
+        import pypdfium2  # pylint: disable=import-outside-toplevel
+
+        document = pypdfium2.PdfDocument(path)
+        try:
+            pages = []
+            for i in range(len(document))[start:stop]:
+                page = document[i]
+                text_page = page.get_textpage()
+                pages.append(text_page.get_text_range())
+                text_page.close()
+                page.close()
+            return pages
+        finally:
+            document.close()
+
+
+class PymupdfBackend(PdfBackend):
+    """Backend that extracts the text with MuPDF, through pymupdf."""
+
+    name = "pymupdf"
+    package = "fitz"
+
+    @property
+    def version(self) -> str:
+        """The version of pymupdf, which is imported as fitz."""
+        return metadata.version("pymupdf")
+
+    def page_count(self, path: str) -> int:
+        """Return the number of pages of a pdf file."""
+        import fitz  # pylint: disable=import-outside-toplevel
+
+        with fitz.open(path) as document:
+            return int(document.page_count)
+
+    def extract_pages(self, path: str, start: int = 0, stop: int | None = None) -> list[str]:
+        """Extract the text of a range of pages from a pdf file."""
+        import fitz  # pylint: disable=import-outside-toplevel
+
+        with fitz.open(path) as document:
+            return [document[i].get_text() for i in range(document.page_count)[start:stop]]
+
+
+BACKENDS: dict[str, type[PdfBackend]] = {
+    PypdfBackend.name: PypdfBackend,
+    LayoutBackend.name: LayoutBackend,
+    PdfiumBackend.name: PdfiumBackend,
+    PymupdfBackend.name: PymupdfBackend,
+}
+"""Reference to the backends by their name"""
+
+BACKEND_TAGS: dict[str, str] = {
+    "Pypdf": PypdfBackend.name,
+    "Layout": LayoutBackend.name,
+    "Pdfium": PdfiumBackend.name,
+    "Mupdf": PymupdfBackend.name,
+}
+"""Reference to the backends by the filename tag that selects them for a program"""
+
+
+def get_backend(name: str) -> PdfBackend:
+    """Return the backend with the given name.
+
+    Arguments:
+        name (str): The name of the backend.
+
+    Returns:
+        The backend.
+
+    Raises:
+        ValueError: If the backend is unknown.
+        ImportError: If the package of the backend is not installed.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown pdf backend: {name}. Choose from: {', '.join(BACKENDS)}")
+
+    backend = BACKENDS[name]
+    if not backend.is_available():
+        raise ImportError(f"The pdf backend {name} requires the package {backend.package}, which is not installed.")
+
+    return backend()
+
+
+def backend_for_tags(tags: list[str], default: str) -> str:
+    """Return the name of the backend selected by the tags of a program.
+
+    Arguments:
+        tags (list[str]): The tags of the program.
+        default (str): The name of the backend when no tag selects a backend.
+
+    Returns:
+        The name of the backend.
+
+    Raises:
+        ValueError: If the tags select more than one backend.
+    """
+    selected = {BACKEND_TAGS[tag] for tag in tags if tag in BACKEND_TAGS}
+
+    if len(selected) > 1:
+        raise ValueError(f"The tags {tags} select more than one pdf backend.")
+
+    return selected.pop() if selected else default
+
+
+def _extract_shard(backend: str, path: str, start: int, stop: int) -> list[str]:
+    """Extract a range of pages in a worker process.
+
+    Arguments:
+        backend (str): The name of the backend.
+        path (str): The path to the pdf file.
+        start (int): The index of the first page.
+        stop (int): The index after the last page.
+
+    Returns:
+        The text of each page in the range.
+    """
+    return get_backend(backend).extract_pages(path, start, stop)
+
+
+def shard_ranges(page_count: int, workers: int) -> list[tuple[int, int]]:
+    """Split the pages of a file in contiguous ranges of about equal size. The extraction time per page varies a
+    lot within a manifest, so there are more ranges than processes to balance the load.
+
+    Arguments:
+        page_count (int): The number of pages.
+        workers (int): The number of processes.
+
+    Returns:
+        The start and stop index of each range, in page order.
+    """
+    shards = max(1, min(workers * SHARDS_PER_WORKER, page_count // MIN_PAGES_PER_SHARD))
+    bounds = [page_count * i // shards for i in range(shards + 1)]
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def extract_pages_sharded(backend: PdfBackend, path: str, workers: int) -> list[str]:
+    """Extract the text of each page of a pdf file, splitting the pages of a large file over several processes.
+    Files with fewer pages than SHARDING_PAGE_THRESHOLD, and all files of backends that are not shardable, are
+    extracted serially.
+
+    Arguments:
+        backend (PdfBackend): The backend.
+        path (str): The path to the pdf file.
+        workers (int): The number of processes, 1 to always extract serially.
+
+    Returns:
+        The text of each page of the pdf file, identical to backend.extract_pages(path).
+
+    Raises:
+        AssertionError: If workers is not a positive integer.
+    """
+    assert isinstance(workers, int) and workers > 0, "Workers must be a positive integer."
+
+    if workers == 1 or not backend.shardable:
+        return backend.extract_pages(path)
+
+    page_count = backend.page_count(path)
+    ranges = shard_ranges(page_count, workers)
+
+    if page_count < SHARDING_PAGE_THRESHOLD or len(ranges) == 1:
+        return backend.extract_pages(path)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        # map() returns the results in the order of the ranges
+        shards = executor.map(
+            _extract_shard,
+            [backend.name] * len(ranges),
+            [path] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+        )
+
+        return [page for shard in shards for page in shard]
@@ -0,0 +1,145 @@
+"""
+This module contains a cheap probe that detects pdf files without a usable text layer before they are processed.
+
+Scanned programs have no text layer, or only a few stray characters, and some pdf files embed fonts without a mapping
+to unicode, which yields control characters instead of letters. Without the probe, these files go through the whole
+pipeline and produce garbage docs. The probe extracts the text of a few pages spread over the file and measures:
+
+  - The number of characters per page, excluding whitespace. Scans have almost none.
+  - The garbage ratio, the fraction of those characters that are not part of a word of two or more letters. Garbled
+    fonts and the text layer of a bad OCR consist mostly of control characters, symbols and punctuation.
+
+The measurements are cached per pdf file by the process_data module, so a file is probed once. The verdict is derived
+from the measurements when they are read, so changing the thresholds does not probe the files again.
+
+How to use:
+
+    result = probe(path, get_backend("pypdf"))
+
+    if not result.extractable:
+        print(f"{path} looks {result.verdict}")
+
+"""
+
+import re
+from dataclasses import dataclass
+
+from src.pdf_backends import PdfBackend
+
+SAMPLE_PAGES = 5
+"""The number of pages of which the text is extracted by the probe"""
+
+MIN_CHARACTERS_PER_PAGE = 200
+"""Files with fewer characters per sampled page, excluding whitespace, are considered scans"""
+
+MAX_GARBAGE_RATIO = 0.5
+"""Files of which a larger fraction of the characters is not part of a word are considered garbled"""
+
+_word_pattern: re.Pattern[str] = re.compile(r"[^\W\d_]{2,}")
+"""Regex pattern that matches words of two or more letters"""
+
+_whitespace_pattern: re.Pattern[str] = re.compile(r"\s+")
+"""Regex pattern that matches whitespace"""
+
+
+class NotExtractableError(Exception):
+    """Raised when a program is skipped because its pdf file has no usable text layer."""
+
+
+@dataclass(slots=True)
+class PreflightResult:
+    """A data class to represent the measurements of the probe of a pdf file."""
+
+    pages: int
+    """The number of pages of the file"""
+    sampled_pages: int
+    """The number of pages of which the text was extracted"""
+    characters: int
+    """The number of characters on the sampled pages, excluding whitespace"""
+    garbage_characters: int
+    """The number of those characters that are not part of a word"""
+
+    @property
+    def characters_per_page(self) -> float:
+        """The mean number of characters per sampled page, excluding whitespace."""
+        return self.characters / self.sampled_pages if self.sampled_pages else 0.0
+
+    @property
+    def garbage_ratio(self) -> float:
+        """The fraction of the characters that are not part of a word, 1 if there are no characters."""
+        return self.garbage_characters / self.characters if self.characters else 1.0
+
+    @property
+    def verdict(self) -> str:
+        """The classification of the file: "text", "scanned" or "garbled"."""
+        if self.characters_per_page < MIN_CHARACTERS_PER_PAGE:
+            return "scanned"
+
+        if self.garbage_ratio > MAX_GARBAGE_RATIO:
+            return "garbled"
+
+        return "text"
+
+    @property
+    def extractable(self) -> bool:
+        """True if the file has a usable text layer, False otherwise."""
+        return self.verdict == "text"
+
+    def __str__(self) -> str:
+        """Return the verdict with the measurements it is based on."""
+        return (
+            f"{self.verdict} ({self.characters_per_page:.0f} characters per page, "
+            f"garbage ratio {self.garbage_ratio:.2f}, {self.sampled_pages} of {self.pages} pages sampled)"
+        )
+
+
+def sample_pages(pages: int, count: int = SAMPLE_PAGES) -> list[int]:
+    """Select pages spread evenly over a file, including the first and the last page.
+
+    Args:
+        pages (int): The number of pages of the file.
+
+    Keyword Arguments:
+        count (int): The number of pages to select. (default: {SAMPLE_PAGES})
+
+    Returns:
+        The indices of the selected pages, sorted, all pages if the file has no more than count pages.
+    """
+    if pages <= count:
+        return list(range(pages))
+
+    return sorted({round(i * (pages - 1) / (count - 1)) for i in range(count)})
+
+
+def measure_text(text: str) -> tuple[int, int]:
+    """Count the characters of a text and the characters that are not part of a word, excluding whitespace.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        The number of characters and the number of garbage characters.
+    """
+    characters = len(_whitespace_pattern.sub("", text))
+    in_words = sum(len(word) for word in _word_pattern.findall(text))
+
+    return characters, characters - in_words
+
+
+def probe(path: str, backend: PdfBackend) -> PreflightResult:
+    """Extract the text of a sample of the pages of a pdf file and measure it.
+
+    Args:
+        path (str): The path to the pdf file.
+        backend (PdfBackend): The backend that extracts the text, the backend the file is processed with.
+
+    Returns:
+        The measurements of the file.
+    """
+    pages = backend.page_count(path)
+    indices = sample_pages(pages)
+
+    text = "\n".join(page for i in indices for page in backend.extract_pages(path, i, i + 1))
+    characters, garbage_characters = measure_text(text)
+
+    return PreflightResult(pages, len(indices), characters, garbage_characters)
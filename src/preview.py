@@ -0,0 +1,270 @@
+"""
+This module contains a fast preview of the readability of programs, estimated from a sample of the sentences.
+
+Parsing the whole text of every program with the spacy model takes long, while exploring the corpus does not need
+exact numbers. The preview splits the cleaned text of a program in sentences with a regex, divides them in strata of
+consecutive sentences and draws a random sample from each stratum, in proportion to its size. Only the sampled
+sentences are parsed. Because the strata cover the whole program, the sample does not miss a part of it, like the
+introduction or the last chapters.
+
+The readability statistics are ratios of sums over the sentences, see the significance module. The sums of the
+program are estimated by weighting the sums of the sample of each stratum with the number of sentences it represents.
+The error bars come from a bootstrap within each stratum, corrected for the fraction of the sentences that is
+sampled, so a sample of the whole program has no error. A larger sample size gives smaller error bars and takes longer.
+
+How to use:
+
+    programs = select_programs(election_date="2023-11")
+
+    estimates, failures = preview_programs(programs, sample_size=200)
+
+"""
+
+import re
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from src import readability, significance, utils
+
+if TYPE_CHECKING:
+    from spacy import Language
+
+    from src.process_data import Program
+
+DEFAULT_SAMPLE_SIZE = 200
+"""The number of sentences that are parsed per program"""
+
+DEFAULT_STRATA = 10
+"""The number of strata of consecutive sentences the sample is drawn from"""
+
+DEFAULT_RESAMPLES = 1000
+"""The number of bootstrap resamples of the error bars"""
+
+DISABLED_PIPES = ("ner", "lemmatizer")
+"""The components of the spacy model that are not needed for the readability statistics, they are skipped"""
+
+_sentence_end_pattern: re.Pattern[str] = re.compile(r"(?<=[.!?])\s+")
+"""Regex pattern that matches the whitespace after the end of a sentence"""
+
+
+@dataclass(slots=True)
+class PreviewEstimate:
+    """A data class to represent the estimate of a statistic of a program from a sample of its sentences."""
+
+    program: str
+    statistic: str
+    estimate: float
+    standard_error: float
+    ci_low: float
+    """The lower bound of the confidence interval of the estimate"""
+    ci_high: float
+    """The upper bound of the confidence interval of the estimate"""
+    sampled_sentences: int
+    """The number of sentences that were parsed"""
+    sentences: int
+    """The number of sentences of the program, as split by the regex"""
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split a cleaned text in sentences with a regex, which is much faster than the spacy model but less exact.
+
+    Args:
+        text (str): The cleaned text.
+
+    Returns:
+        The sentences, in order.
+    """
+    return [sentence for sentence in _sentence_end_pattern.split(text) if sentence.strip()]
+
+
+def stratified_sample(
+    count: int, sample_size: int, strata: int, rng: np.random.Generator
+) -> list[tuple[int, npt.NDArray[np.intp]]]:
+    """Draw a sample of the indices of the sentences from strata of consecutive sentences. The sample size of each
+    stratum is proportional to the number of sentences in it, with at least one sentence per stratum.
+
+    Args:
+        count (int): The number of sentences.
+        sample_size (int): The total sample size.
+        strata (int): The number of strata, fewer if there are fewer sentences or a smaller sample size.
+        rng (np.random.Generator): The random generator.
+
+    Returns:
+        The number of sentences of each stratum and the sorted indices of its sampled sentences.
+    """
+    strata = max(1, min(strata, sample_size, count))
+    bounds = np.linspace(0, count, strata + 1).round().astype(np.intp)
+    samples = []
+
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        size = max(1, min(stop - start, round(sample_size * (stop - start) / count)))
+        samples.append((int(stop - start), np.sort(rng.choice(np.arange(start, stop), size, replace=False))))
+
+    return samples
+
+
+def preview_text(
+    text: str,
+    nlp: "Language",
+    *,
+    label: str = "text",
+    statistics: list[str] | None = None,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    strata: int = DEFAULT_STRATA,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> list[PreviewEstimate]:
+    """Estimate the readability statistics of a text from a stratified sample of its sentences.
+
+    Args:
+        text (str): The cleaned text.
+        nlp (Language): The spacy model with the syllables component.
+
+    Keyword Arguments:
+        label (str): The name of the text in the estimates. (default: {"text"})
+        statistics (list[str] | None): The names of the statistics, see significance.STATISTICS, all if None.
+            (default: {None})
+        sample_size (int): The number of sentences to parse. (default: {DEFAULT_SAMPLE_SIZE})
+        strata (int): The number of strata of consecutive sentences. (default: {DEFAULT_STRATA})
+        resamples (int): The number of bootstrap resamples. (default: {DEFAULT_RESAMPLES})
+        confidence (float): The confidence level of the interval. (default: {0.95})
+        seed (int): The seed of the random generator. (default: {0})
+
+    Returns:
+        The estimate of each statistic.
+
+    Raises:
+        AssertionError: If sample_size, strata or resamples is not positive or confidence is not between 0 and 1.
+        KeyError: If a statistic is unknown.
+        ValueError: If the text has no sentences.
+    """
+    assert sample_size > 0, "Sample size must be positive."
+    assert strata > 0, "Strata must be positive."
+    assert resamples > 0, "Resamples must be positive."
+    assert 0 < confidence < 1, "Confidence must be between 0 and 1."
+
+    names = list(significance.STATISTICS) if statistics is None else statistics
+    functions = [significance.STATISTICS[name] for name in names]
+
+    sentences = split_sentences(text)
+    if not sentences:
+        raise ValueError(f"Cannot preview {label}, it has no sentences.")
+
+    rng = np.random.default_rng(seed)
+    samples = stratified_sample(len(sentences), sample_size, strata, rng)
+
+    # Parse the sampled sentences of all strata at once, a sentence may be split further by the model
+    disabled = [name for name in DISABLED_PIPES if name in nlp.pipe_names]
+    docs = iter(nlp.pipe((sentences[i] for _, sample in samples for i in sample), disable=disabled))
+
+    totals = np.zeros(4)
+    resampled = np.zeros((resamples, 4))
+
+    for size, sample in samples:
+        matrices = [significance.sentence_matrix(readability.sentence_arrays(next(docs))) for _ in sample]
+        matrix = np.concatenate(matrices)
+        if not len(matrix):
+            continue
+
+        # Each sampled sentence represents the sentences of its stratum that were not sampled
+        weight = size / len(sample)
+        totals += weight * matrix.sum(axis=0)
+        resampled += weight * significance.bootstrap_sums(matrix, resamples, rng)
+
+    if not totals[0]:
+        raise ValueError(f"Cannot preview {label}, the sample has no sentences.")
+
+    sampled = sum(len(sample) for _, sample in samples)
+    correction = np.sqrt(1 - sampled / len(sentences))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    estimates = []
+
+    # A resample without words has no syllables per word, it is ignored
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, function in zip(names, functions):
+            estimate = float(function(totals))
+            standard_error = float(np.nanstd(function(resampled))) * correction
+
+            estimates.append(
+                PreviewEstimate(
+                    label,
+                    name,
+                    estimate,
+                    standard_error,
+                    estimate - z * standard_error,
+                    estimate + z * standard_error,
+                    sampled,
+                    len(sentences),
+                )
+            )
+
+    return estimates
+
+
+def preview_programs(
+    programs: list["Program"],
+    statistics: list[str] | None = None,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    strata: int = DEFAULT_STRATA,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> tuple[list[PreviewEstimate], list[tuple["Program", Exception]]]:
+    """Estimate the readability statistics of programs from a sample of their sentences. Only the text of the programs
+    is retrieved, which is cached, the programs are not parsed as a whole.
+
+    Args:
+        programs (list[Program]): The programs.
+
+    Keyword Arguments:
+        statistics (list[str] | None): The names of the statistics, see significance.STATISTICS, all if None.
+            (default: {None})
+        sample_size (int): The number of sentences to parse per program. (default: {DEFAULT_SAMPLE_SIZE})
+        strata (int): The number of strata of consecutive sentences. (default: {DEFAULT_STRATA})
+        resamples (int): The number of bootstrap resamples. (default: {DEFAULT_RESAMPLES})
+        confidence (float): The confidence level of the interval. (default: {0.95})
+        seed (int): The seed of the random generator of every program. (default: {0})
+
+    Returns:
+        The estimates of each statistic for each program, and the programs that could not be previewed together with
+        the exception that was raised.
+    """
+    # The model is loaded with the process_data module, which is only imported when a preview is made
+    from src import process_data  # pylint: disable=import-outside-toplevel
+
+    estimates: list[PreviewEstimate] = []
+    failures: list[tuple["Program", Exception]] = []
+
+    for i, program in enumerate(programs):
+        utils.progress(i, len(programs), str(program))
+
+        try:
+            program.retrieve_text_from_pdf()
+            assert program.text is not None
+
+            estimates.extend(
+                preview_text(
+                    program.text,
+                    process_data.nlp,
+                    label=str(program),
+                    statistics=statistics,
+                    sample_size=sample_size,
+                    strata=strata,
+                    resamples=resamples,
+                    confidence=confidence,
+                    seed=seed,
+                )
+            )
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            failures.append((program, exception))
+
+    if programs:
+        utils.progress(len(programs), len(programs), "Finished")
+
+    return estimates, failures
@@ -7,6 +7,12 @@ from the text. The text and doc will be saved to a file.
 Call get_programs() to retrieve all programs. This will return a list of programs. If the programs have not been
 processed yet, an exception will be raised.
 
+The programs are read from an immutable snapshot of the corpus, see CorpusSnapshot. Processing builds the next
+snapshot and swaps it in when it completes, so other threads never see a half-processed corpus and can keep querying
+the current snapshot without a lock. Call refresh_in_background() to pick up new or changed pdf files while the current
+snapshot is being analyzed. The programs are identified when the corpus is first used, call
+load_corpus(DISCOVERY_CACHE_PATH) first to cache the listings of the manifests folder in a file.
+
 The programs are stored in a list of Program objects. The Program object contains the following attributes:
     - election_type: The type of the election.
     - party: The party of the program.
@@ -17,14 +23,19 @@ The programs are stored in a list of Program objects. The Program object contain
 
 """
 
+import json
 import os
 import random
 import re
+import sys
+import threading
 import time
 
-from dataclasses import dataclass, field
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
 from collections import Counter
 from datetime import timedelta as td
+from importlib import metadata
 from re import Pattern
 from typing import Callable, TypedDict
 
@@ -35,10 +46,12 @@ from spacy_syllables import (
     SpacySyllables,
 )  # import is necessary for spacy to recognize the pipe
 
-from pypdf import PdfReader
-
-from src import utils
+from src import discovery, keyness, preflight, reuse, storage, utils
+from src.pdf_backends import PdfBackend, backend_for_tags, extract_pages_sharded, get_backend
+from src.stage_cache import Stage, StageCache, fingerprint
+from src.storage import RunJournal
 from src.utils import StdoutCollector
+from src.work_queue import LeaseQueue, run_cooperatively
 
 
 @dataclass(slots=True)
@@ -51,8 +64,26 @@ class Issuer:
 
     def __post_init__(self) -> None:
         """Post-initialization function to split the party name into members."""
+        self.name = sys.intern(self.name)
         self.joined = "+" in self.name
-        self.members = set(self.name.split("+"))
+        self.members = {sys.intern(member) for member in self.name.split("+")}
+
+    @staticmethod
+    def shared(name: str) -> "Issuer":
+        """Return the issuer with the name, the same object for every program of the party, which saves memory when
+        there are many programs.
+
+        Arguments:
+            name (str): The name of the party.
+
+        Returns:
+            The issuer.
+        """
+        issuer = _issuers.get(name)
+        if issuer is None:
+            issuer = _issuers.setdefault(name, Issuer(name))
+
+        return issuer
 
     def __eq__(self, other: object) -> bool:
         """Equality function to compare the Issuer object with another object.
@@ -115,19 +146,23 @@ class Program:
     A class to store and manipulate data. The class contains methods to retrieve the text from the pdf,
     create a spacy doc from the text and save the text and doc to a file.
 
+    After release() the text and doc are dropped from memory. The program then acts as a handle, the text and doc
+    are reloaded from the cache when they are accessed.
+
     Attributes:
         text (str | None): The raw text of the program (Default: None).
         doc (Doc | None): The spacy doc instance of the program (Default: None).
         election_type (str): The type of the election.
         party (str): The party of the program.
         election_date (str): The election of the program.
+        region (str | None): The municipality or province of the program, None for national elections.
         tags (list[str]): The tags of the program.
         path (str): The path to the program.
 
     """
 
-    text: str | None = None
-    doc: Doc | None = None
+    # The corpus can hold tens of thousands of programs, slots keep each program small
+    __slots__ = ("election_type", "party", "election_date", "region", "tags", "path", "_text", "_doc", "_released")
 
     def __init__(
         self,
@@ -136,6 +171,7 @@ class Program:
         election_date: str,
         tags: list[str],
         path: str,
+        region: str | None = None,
     ):
         """A class to store and manipulate data
 
@@ -146,26 +182,83 @@ class Program:
             tags (list[str]): The tags of the program.
             path (str): The path to the program.
 
+        Keyword Arguments:
+            region (str | None): The municipality or province of the program, None for national elections.
+                (default: {None})
+
         """
-        self.election_type = election_type
-        self.party = Issuer(party)
-        self.election_date = election_date
-        self.tags = tags
+        # The names are shared by many programs, interning them stores each name once
+        self.election_type = sys.intern(election_type)
+        self.party = Issuer.shared(party)
+        self.election_date = sys.intern(election_date)
+        self.region = None if region is None else sys.intern(region)
+        self.tags = [sys.intern(tag) for tag in tags]
         self.path = path
 
+        self._text: str | None = None
+        self._doc: Doc | None = None
+        self._released = False
+
+    @property
+    def text(self) -> str | None:
+        """The text of the program, reloaded from the cache if the program has been released."""
+        if self._text is None and self._released:
+            self.retrieve_text_from_pdf()
+
+        return self._text
+
+    @text.setter
+    def text(self, text: str | None) -> None:
+        """Set the text of the program."""
+        self._text = text
+
+    @property
+    def doc(self) -> Doc | None:
+        """The spacy doc of the program, reloaded from the cache if the program has been released."""
+        if self._doc is None and self._released:
+            self.retrieve_text_from_pdf()
+            self.create_doc_from_text()
+
+        return self._doc
+
+    @doc.setter
+    def doc(self, doc: Doc | None) -> None:
+        """Set the spacy doc of the program."""
+        self._doc = doc
+
+    def release(self) -> None:
+        """Drop the text and doc from memory, they are reloaded from the cache when they are accessed again. Only
+        release a program after it has been processed, otherwise accessing the text processes it."""
+        self._text, self._doc, self._released = None, None, True
+
     @property
     def joined_issue(self) -> bool:
         """Returns True if the program is a joined program, False otherwise."""
         return self.party.joined
 
+    @property
+    def backend(self) -> str:
+        """The name of the pdf backend used to extract the text, selected by a tag or PDF_BACKEND."""
+        backend: str = backend_for_tags(self.tags, PDF_BACKEND)
+        return backend
+
+    @property
+    def source_hash(self) -> str:
+        """The sha256 hash of the pdf file. The cached stages are keyed by this hash, so programs with identical pdf
+        files share their processing artifacts."""
+        return source_hash(self.path)
+
     def reference(self, ext: str) -> str:
         """Return a reference to the file, including the party and election.
 
         Args:
             ext (str): The extension of the file.
         """
-        # TODO: make more flexible for different election formats
-        filename = f"{self.election_type}-{self.party}-{self.election_date}"
+        # The region distinguishes the programs of a party in different municipalities or provinces
+        if self.region is None:
+            filename = f"{self.election_type}-{self.party}-{self.election_date}"
+        else:
+            filename = f"{self.election_type}-{self.region}-{self.party}-{self.election_date}"
 
         # Add tags to filename, shorten tags to 3 characters
         # Also, prevent spaces in tags
@@ -174,69 +267,187 @@ class Program:
 
         return f"{filename}.{ext}"
 
+    @property
+    def text_cache_path(self) -> str:
+        """The path where the extracted text of the program is stored."""
+        return os.path.join(_processed_text_path, self.reference("txt"))
+
+    @property
+    def doc_cache_path(self) -> str:
+        """The path where the spacy doc of the program is stored."""
+        return os.path.join(_processed_doc_path, self.reference("spacy"))
+
+    def cache_status(self) -> dict[str, bool]:
+        """Return for each processing stage whether its output is cached for the current pdf and stage versions.
+
+        Returns:
+            Whether the output is cached, by the name of the stage.
+        """
+        stages = [stage for stage, _ in _text_stages(self.path, self.backend)] + [DOC_STAGE]
+        hashes = _stage_cache.chain_hashes(stages, self.source_hash)
+
+        return {stage.name: output is not None for stage, output in zip(stages, hashes)}
+
+    def term_counts(self) -> keyness.TermCounts:
+        """Return the number of times each word occurs in the program, see the keyness module. The counts are cached
+        for the text, so they are only counted once, the doc is only loaded when the counts are not cached.
+
+        Returns:
+            The term counts of the program.
+        """
+        self.retrieve_text_from_pdf()
+        text_hash = utils.sha256(self.text or "")
+
+        data = None if FORCE_REPROCESSING else _stage_cache.load(COUNTS_STAGE, text_hash)
+        if data is not None:
+            return keyness.counts_from_bytes(data)
+
+        self.create_doc_from_text()
+        assert self.doc is not None
+
+        counts = keyness.term_counts(self.doc)
+        _stage_cache.store(COUNTS_STAGE, text_hash, keyness.counts_to_bytes(counts))
+
+        return counts
+
+    def sentence_fingerprints(self) -> reuse.SentenceFingerprints:
+        """Return the fingerprints of the sentences of the program, see the reuse module. The fingerprints are cached
+        for the text, so the doc is only loaded when they are not cached.
+
+        Returns:
+            The sentence fingerprints of the program.
+        """
+        self.retrieve_text_from_pdf()
+        text_hash = utils.sha256(self.text or "")
+
+        data = None if FORCE_REPROCESSING else _stage_cache.load(SENTENCES_STAGE, text_hash)
+        if data is not None:
+            return reuse.fingerprints_from_bytes(data)
+
+        self.create_doc_from_text()
+        assert self.doc is not None
+
+        fingerprints = reuse.sentence_fingerprints(self.doc)
+        _stage_cache.store(SENTENCES_STAGE, text_hash, reuse.fingerprints_to_bytes(fingerprints))
+
+        return fingerprints
+
+    def preflight(self) -> preflight.PreflightResult:
+        """Probe whether the pdf has a usable text layer, see the preflight module. The result is cached for the pdf
+        file, so the probe runs only once.
+
+        Returns:
+            The measurements of the pdf, with the verdict.
+        """
+        backend = get_backend(self.backend)
+        result = _stage_cache.run_chain(
+            [(preflight_stage(backend), lambda _: json.dumps(asdict(preflight.probe(self.path, backend))).encode())],
+            self.source_hash,
+        )
+
+        return preflight.PreflightResult(**json.loads(result.data))
+
+    def page_offsets(self) -> list[int]:
+        """Return the character offset in the text at which each page of the pdf starts.
+
+        The pages are joined before the text is cleaned, and cleaning changes the length of the text, so the offsets
+        are estimated: each page is cleaned separately and the lengths are scaled to the length of the text.
+
+        Returns:
+            The approximate offset of each page, the first page starts at 0.
+
+        Raises:
+            ValueError: If the text has not been retrieved yet.
+        """
+        if self.text is None:
+            raise ValueError(
+                "No text to locate the pages in. Call retrieve_text_from_pdf() first to retrieve the text."
+            )
+
+        # The pages are the output of the first stage, loaded from the cache
+        raw = _stage_cache.run_chain(_text_stages(self.path, self.backend)[:1], self.source_hash)
+        lengths = [len(clean_pdf_text(page)) for page in json.loads(raw.data)]
+
+        total, offsets, position = sum(lengths) or 1, [], 0
+        for length in lengths:
+            offsets.append(round(position * len(self.text) / total))
+            position += length
+
+        return offsets
+
     def retrieve_text_from_pdf(self) -> None:
-        """Retrieve the text from the pdf file. If the text has already been extracted,
-        it will be retrieved from the file. Adds the text to the program object and
-        saves it to a file.
+        """Retrieve the text from the pdf file. The intermediate results of the extraction are cached per stage,
+        see the stage_cache module, so only the stages that changed since the last run are computed. Adds the
+        text to the program object and saves it to a file.
+
+        Raises:
+            NotExtractableError: If the pdf has no usable text layer and PREFLIGHT is enabled.
 
         Note:
             Changes self.text
         """
         # Return text if it has already been extracted
-        if self.text is not None:
+        if self._text is not None:
             return
 
-        # Retrieve text from the file if it exists
-        path = os.path.join(_processed_text_path, self.reference("txt"))
-        if os.path.exists(path) and not FORCE_REPROCESSING:
-            with open(path, "r", encoding="utf-8") as f:
-                self.text = f.read()
-            return
+        # Skip programs without a usable text layer, their text would be garbage
+        if PREFLIGHT:
+            probe = self.preflight()
+            if not probe.extractable:
+                raise preflight.NotExtractableError(f"{self} has no usable text layer, it looks {probe}")
 
-        # Extract text from pdf
-        text = extract_text_pdf(self.path)
-        text = _remove_repeating_slogans(text)
-        text = clean_pdf_text(text)
+        # Load the text from the stage cache, computing the stages that are not cached
+        result = _stage_cache.run_chain(
+            _text_stages(self.path, self.backend), self.source_hash, refresh=FORCE_REPROCESSING
+        )
 
-        self.text = text
+        self._text = result.data.decode("utf-8")
 
-        # Save text to disk
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(text)
+        # Make the text available at the path of the program
+        _stage_cache.publish(CLEAN_STAGE, result.input_hash, self.text_cache_path)
 
     def create_doc_from_text(self) -> None:
-        """Convert the text to a spacy doc. If the doc has already been created, it will be
-        retrieved from the file. Adds the doc to the program object and saves it to a file.
+        """Convert the text to a spacy doc. If the doc has already been created for this text and model, it will be
+        retrieved from the stage cache. Adds the doc to the program object and saves it to a file.
 
         Note:
             Changes self.doc
         """
 
         # Return doc if it has already been created
-        if self.doc is not None:
+        if self._doc is not None:
             return
 
         # Check if there is text to create a doc from
-        if self.text is None:
+        if self._text is None:
             raise ValueError("No text to create a doc from. Call retrieve_text_from_pdf() first to retrieve the text.")
 
-        # Compute path to file
-        path = os.path.join(_processed_doc_path, self.reference("spacy"))
+        # The doc is keyed by the hash of the text it is created from
+        text_hash = utils.sha256(self._text)
 
-        # Retrieve doc from file if it exists on the disk
-        if os.path.exists(path) and not FORCE_REPROCESSING:
-            self.doc = Doc(nlp.vocab).from_disk(path)
-            return
+        # Retrieve doc from the stage cache if it exists and is intact
+        data = None if FORCE_REPROCESSING else _stage_cache.load(DOC_STAGE, text_hash)
+        if data is not None:
+            try:
+                self._doc = Doc(nlp.vocab).from_bytes(data)
+            except (ValueError, KeyError, TypeError):
+                # The doc could not be deserialized, rebuild it
+                storage.remove_artifact(_stage_cache.path(DOC_STAGE, text_hash))
 
-        # Create doc from text
-        self.doc = nlp(self.text)
+        if self._doc is None:
+            # Create doc from text and save it to the stage cache, in the same format as Doc.to_disk()
+            self._doc = nlp(self._text)
+            _stage_cache.store(DOC_STAGE, text_hash, self._doc.to_bytes())
 
-        # Save doc to disk
-        self.doc.to_disk(path)
+        # Make the doc available at the path of the program
+        _stage_cache.publish(DOC_STAGE, text_hash, self.doc_cache_path)
 
     def __repr__(self) -> str:
         """Return a string representation of the program."""
-        name = f"{self.election_type} - {self.party} - {self.election_date}"
+        if self.region is None:
+            name = f"{self.election_type} - {self.party} - {self.election_date}"
+        else:
+            name = f"{self.election_type} - {self.region} - {self.party} - {self.election_date}"
 
         for tag in self.tags:
             name += f" #{tag}"
@@ -258,6 +469,9 @@ class PathInfoExtractor:
     Example:
         {"election_type": "TK", "election_date": "2017", "party": "VVD"}
 
+    The programs of the municipal (GR) and provincial (PS) elections are in a folder per municipality or province,
+    `.../GR/2022-03/Utrecht/VVD.pdf`, which is the region of the program.
+
     When adding a new election type, the extractor should be added to the EXTRACTOR_REFERENCE dictionary and the
     extractor should be implemented as a static method in this class. The extractor should handle the parsing of the
     path for the specific path format. The reference in EXTRACTOR_REFERENCE is to automatically call the correct
@@ -272,6 +486,7 @@ class PathInfoExtractor:
         election_date: str
         party: str
         tags: list[str]
+        region: str | None
 
     EXTRACTOR_REFERENCE: dict[str, Callable[[str], ExtractionInfo]]
     """Reference to the methods to extract the information from the path for each election type"""
@@ -364,42 +579,213 @@ class PathInfoExtractor:
             "election_date": election_date,
             "party": name,
             "tags": tags,
+            "region": None,
         }
 
-    EXTRACTOR_REFERENCE = {"TK": extractor_type_date_party_tags}
+    @staticmethod
+    def extractor_type_date_region_party_tags(path: str) -> ExtractionInfo:
+        """Extract the election type, election date, region and party from the path.
+
+        The path should be in the following format:
+        .../{election_type}/{election_date}/{region}/{party}.pdf
+
+        Arguments:
+            path (str): The path to the program.
+
+        Returns:
+            The election type, election date, region and party.
+        """
+        # Remove the .pdf extension
+        path = path.removesuffix(".pdf")
+
+        # Split the path on the os separator
+        split_path = path.split(os.sep)
+
+        # Get info from the path
+        filename, region, election_date, election_type = (
+            split_path[-1],
+            split_path[-2],
+            split_path[-3],
+            split_path[-4],
+        )
+
+        # Extract the tags from the filename
+        name, tags = PathInfoExtractor.extract_tags_and_remove_tags_from_filename(filename)
+
+        return {
+            "election_type": election_type,
+            "election_date": election_date,
+            "party": name,
+            "tags": tags,
+            "region": region,
+        }
+
+    EXTRACTOR_REFERENCE = {
+        "TK": extractor_type_date_party_tags,
+        "GR": extractor_type_date_region_party_tags,
+        "PS": extractor_type_date_region_party_tags,
+    }
     """Reference to the methods to extract the information from the path for each election type"""
 
 
-def extract_text_pdf(path: str) -> str:
-    """Extract the text from a pdf file using pypdf
+def extract_pages_pdf(path: str, backend: str | None = None) -> list[str]:
+    """Extract the text of each page from a pdf file
+
+    Arguments:
+        path (str): The path to the pdf file.
+
+    Keyword Arguments:
+        backend (str | None): The name of the pdf backend, PDF_BACKEND if None. (default: {None})
+
+    Returns:
+        The text of each page of the pdf file.
+    """
+    pages: list[str] = extract_pages_sharded(get_backend(backend or PDF_BACKEND), path, PAGE_WORKERS)
+    return pages
+
+
+def join_pages(pages: list[str]) -> str:
+    """Join the text of the pages of a pdf file, each page is followed by a newline.
+
+    Arguments:
+        pages (list[str]): The text of each page.
+
+    Returns:
+        The text of the pdf file.
+    """
+    return "".join(page + "\n" for page in pages)
+
+
+def extract_text_pdf(path: str, backend: str | None = None) -> str:
+    """Extract the text from a pdf file
 
     Arguments:
         path (str): The path to the pdf file.
 
+    Keyword Arguments:
+        backend (str | None): The name of the pdf backend, PDF_BACKEND if None. (default: {None})
+
     Returns:
         The text from the pdf file.
     """
-    reader = PdfReader(path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
+    return join_pages(extract_pages_pdf(path, backend))
 
-    return text
 
+@dataclass(frozen=True, slots=True)
+class CorpusSnapshot:
+    """An immutable snapshot of the programs of the corpus. A snapshot is never changed after it is published, a
+    refresh publishes a new snapshot instead, so it can be read by several threads without a lock.
+
+    The programs are indexed by election type, election date, region and member party when the snapshot is created,
+    so a query only looks at the programs of the most selective filter instead of at the whole corpus."""
+
+    programs: tuple[Program, ...] = ()
+    """The programs of the corpus"""
+    processed: bool = False
+    """Whether all programs have been processed, which enables the get_programs() api"""
+    version: int = 0
+    """The number of the snapshot, incremented by every publication"""
+    _indexes: dict[str, dict[str | None, tuple[Program, ...]]] = field(init=False, repr=False, compare=False)
+    """The programs by the value of each indexed property, in the order of the snapshot"""
+
+    def __post_init__(self) -> None:
+        """Post-initialization function to index the programs."""
+        indexes: dict[str, dict[str | None, list[Program]]] = {
+            "election_type": {},
+            "election_date": {},
+            "region": {},
+            "party": {},
+        }
+
+        for p in self.programs:
+            indexes["election_type"].setdefault(p.election_type, []).append(p)
+            indexes["election_date"].setdefault(p.election_date, []).append(p)
+            indexes["region"].setdefault(p.region, []).append(p)
 
-def identify_programs(target: str) -> list[Program]:
+            # A joined program is found by the name of each of its members
+            for member in p.party.members:
+                indexes["party"].setdefault(member, []).append(p)
+
+        frozen = {name: {value: tuple(found) for value, found in index.items()} for name, index in indexes.items()}
+        object.__setattr__(self, "_indexes", frozen)
+
+    def select(
+        self,
+        *,
+        election_type: str | None = None,
+        party: str | None = None,
+        election_date: str | None = None,
+        joined_issue: bool | None = False,
+        tags: list[str] | None = None,
+        region: str | None = None,
+    ) -> list[Program]:
+        """Return the programs that match the election type, party, election date, region and tags, see
+        select_programs()."""
+        filters = {"election_type": election_type, "election_date": election_date, "region": region, "party": party}
+
+        # Start from the smallest set of programs that matches one of the indexed filters
+        candidates = self.programs
+        for name, value in filters.items():
+            if value is not None:
+                found = self._indexes[name].get(value, ())
+                if len(found) < len(candidates):
+                    candidates = found
+
+        return [
+            p
+            for p in candidates
+            if (election_type is None or p.election_type == election_type)
+            and (party is None or p.party == party)
+            and (election_date is None or p.election_date == election_date)
+            and (region is None or p.region == region)
+            and (joined_issue is None or p.joined_issue == joined_issue)
+            and (tags is None or all(tag in p.tags for tag in tags))
+        ]
+
+    def find(
+        self,
+        election_type: str,
+        party: str,
+        election_date: str,
+        joined_issue: bool,
+        tags: list[str] | None,
+        region: str | None = None,
+    ) -> Program | None:
+        """Return the first program with exactly the party name, region and all tags, see get_specific_program()."""
+        properties = (election_type, party, election_date, joined_issue, region)
+
+        for p in self.select(election_type=election_type, election_date=election_date, joined_issue=None):
+            # Check if program matches properties
+            if (p.election_type, p.party.name, p.election_date, p.joined_issue, p.region) != properties:
+                continue
+
+            # Check if program has all tags
+            if tags is not None and not all(tag in p.tags for tag in tags):
+                continue
+
+            return p
+
+        return None
+
+
+def identify_programs(target: str, cache_path: str | None = None) -> list[Program]:
     """Walk through the directory and identify all pdf files for the programs of each party and
-    election
+    election. The directory is scanned in parallel and only the folders that changed are listed again, see the
+    discovery module.
 
     Arguments:
         target (str): The directory where the programs are stored.
 
+    Keyword Arguments:
+        cache_path (str | None): The path of the file with the cached listings of the folders, only kept in memory if
+            None. (default: {None})
+
     Returns:
-        A list of programs.
+        A list of programs, sorted by path.
     """
     found_programs = []
 
-    for file in utils.get_pdf_files_recursive(target):
+    for file in discovery.scan_pdf_files(target, cache_path):
         # Retrieve election type from path
         # This is used to determine which and how the path should be parsed
         election_type_abbrev = PathInfoExtractor.get_election_type(file)
@@ -516,53 +902,594 @@ def _remove_repeating_slogans(text: str, start_size: int | None = None) -> str:
     return text
 
 
-def process_all_programs() -> None:
-    """Process all programs by retrieving the text from the pdf, creating a doc from the text
-    and saving the text and doc to a file.
+def raw_stage(backend: PdfBackend) -> Stage:
+    """Return the stage that extracts the raw text of each page from the pdf with a backend. The fingerprint
+    includes the backend, so each backend has its own layer.
 
+    Arguments:
+        backend (PdfBackend): The pdf backend.
+
+    Returns:
+        The stage.
     """
-    global _programs_processed, _programs
+    return Stage("raw", fingerprint(*backend.fingerprint_parts()), "json")
 
-    print(f"Will process {len(_programs)} programs")
 
-    # Randomize the order of the programs to prevent the same program from being processed first every time
-    _programs = random.sample(_programs, len(_programs))
+def preflight_stage(backend: PdfBackend) -> Stage:
+    """Return the stage that probes whether the pdf has a usable text layer with a backend, see the preflight
+    module. Only the measurements are cached, the verdict is derived from them when they are read.
+
+    Arguments:
+        backend (PdfBackend): The pdf backend.
+
+    Returns:
+        The stage.
+    """
+    return Stage(
+        "preflight",
+        fingerprint(
+            *backend.fingerprint_parts(),
+            preflight.probe,
+            preflight.sample_pages,
+            preflight.measure_text,
+            preflight.SAMPLE_PAGES,
+            preflight._word_pattern,  # pylint: disable=protected-access
+        ),
+        "json",
+    )
+
+
+def _text_stages(path: str, backend: str) -> list[tuple[Stage, Callable[[bytes], bytes]]]:
+    """Return the stages that produce the text of a program, with the functions that compute the output of each stage
+    from the output of the previous stage. Backends that strip the repeating margins themselves skip the removal of
+    the repeating slogans, their pages are only joined.
+
+    Arguments:
+        path (str): The path to the pdf file of the program.
+        backend (str): The name of the pdf backend.
+
+    Returns:
+        The stages, in processing order.
+    """
+    pdf_backend = get_backend(backend)
+
+    join_stage: tuple[Stage, Callable[[bytes], bytes]] = (
+        (JOIN_STAGE, lambda raw: join_pages(json.loads(raw)).encode("utf-8"))
+        if pdf_backend.strips_margins
+        else (SLOGAN_STAGE, lambda raw: _remove_repeating_slogans(join_pages(json.loads(raw))).encode("utf-8"))
+    )
+
+    return [
+        (raw_stage(pdf_backend), lambda _: json.dumps(extract_pages_pdf(path, backend)).encode("utf-8")),
+        join_stage,
+        (CLEAN_STAGE, lambda text: clean_pdf_text(text.decode("utf-8")).encode("utf-8")),
+    ]
+
+
+def _init_worker(page_workers: int) -> None:
+    """Take over the settings of the parent process in a worker process. A worker that is spawned instead of forked,
+    the default on Windows and macOS, imports this module again and would start with the default settings.
+
+    Arguments:
+        page_workers (int): The PAGE_WORKERS of the parent process.
+    """
+    global PAGE_WORKERS
+
+    PAGE_WORKERS = page_workers
+
+
+def _process_program_in_worker(program: Program) -> None:
+    """Process a single program in a worker process. The text and doc are saved to disk by the worker, the
+    parent process loads them from the cache afterwards.
+
+    Arguments:
+        program (Program): The program to process.
+    """
+    program.retrieve_text_from_pdf()
+    program.create_doc_from_text()
+
+
+def process_programs(
+    programs: list[Program],
+    workers: int = 1,
+    journal: RunJournal | None = None,
+    stream: bool = False,
+    memory_ceiling: int | None = None,
+    memory_limit: int | None = None,
+) -> list[tuple[Program, Exception]]:
+    """Process the given programs by retrieving the text from the pdf, creating a doc from the text
+    and saving the text and doc to a file. A program that fails does not stop the processing of the others.
+
+    When more than one worker is used, the programs are processed in separate processes. The results are written
+    to the cache by the workers and loaded from the cache afterwards.
+
+    In streaming mode, the text and doc of each program are released after they have been saved, see
+    Program.release(), so the memory use does not grow with the number of programs. Programs that are already
+    cached are not loaded at all. Without streaming mode, the programs are released when the memory ceiling is
+    exceeded, and the run continues in streaming mode. The run stops when the memory limit is exceeded. The peak
+    memory use of the run is reported at the end.
+
+    Arguments:
+        programs (list[Program]): The programs to process.
+
+    Keyword Arguments:
+        workers (int): The number of processes used to process the programs. (default: {1})
+        journal (RunJournal | None): The journal in which processed programs are recorded. (default: {None})
+        stream (bool): Release the text and doc of each program after it has been saved. (default: {False})
+        memory_ceiling (int | None): The resident set size in bytes above which the processed programs are released,
+            None for no ceiling. (default: {None})
+        memory_limit (int | None): The maximum resident set size in bytes, None for no limit. (default: {None})
+
+    Returns:
+        The programs that could not be processed, together with the exception that was raised.
+
+    Raises:
+        AssertionError: If workers is not a positive integer.
+        MemoryError: If the memory use exceeds the limit.
+    """
+    assert isinstance(workers, int) and workers > 0, "Workers must be a positive integer."
+
+    failures: list[tuple[Program, Exception]] = []
+    tracker = utils.MemoryTracker(memory_ceiling, memory_limit)
+
+    if not programs:
+        return failures
+
+    # Let the workers fill the cache, the programs are loaded from the cache in the loop below
+    if workers > 1:
+        # Programs that were processed before an interruption only have to be loaded
+        pending = [p for p in programs if journal is None or p.reference("pdf") not in journal.done]
+
+        # Programs with an identical pdf file share the cached stages, so only the first of them is processed by the
+        # workers, the others load the result from the cache below
+        representatives: dict[tuple[str, str], Program] = {}
+        for p in pending:
+            representatives.setdefault((p.source_hash, p.backend), p)
+        duplicates = [p for p in pending if representatives[p.source_hash, p.backend] is not p]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(PAGE_WORKERS,)) as executor:
+            futures = {executor.submit(_process_program_in_worker, p): p for p in representatives.values()}
+
+            for i, future in enumerate(as_completed(futures)):
+                utils.progress(i, len(futures), f"Processing in {workers} workers -- {futures[future]}")
+
+                exception = future.exception()
+                if isinstance(exception, Exception):
+                    failures.append((futures[future], exception))
+                elif journal is not None:
+                    journal.record_done(futures[future].reference("pdf"))
+
+        # A duplicate fails with the same exception as the program that was processed in its place
+        failed_sources = {(p.source_hash, p.backend): exception for p, exception in failures}
+        failures += [
+            (p, failed_sources[p.source_hash, p.backend])
+            for p in duplicates
+            if (p.source_hash, p.backend) in failed_sources
+        ]
+
+        failed = {id(p) for p, _ in failures}
+        programs = [p for p in programs if id(p) not in failed]
+
+        # In streaming mode, the programs are not loaded from the cache, only the duplicates are published
+        if stream:
+            for p in programs:
+                p.release()
+            programs = [p for p in duplicates if id(p) not in failed]
 
     collector = StdoutCollector()
     remaining_time = None
 
-    for i, p in enumerate(_programs):
+    for i, p in enumerate(programs):
         # Show the remaining time if it is not the first or last program
         suffix = f"{remaining_time} remaining -- {p}" if remaining_time else str(p)
 
-        utils.progress(i, len(_programs), suffix)
+        utils.progress(i, len(programs), suffix)
         s = time.perf_counter()
 
         # Catch any output from the program
         # to prevent the progress bar from being overwritten
-        with collector:
-            p.retrieve_text_from_pdf()
-            p.create_doc_from_text()
+        try:
+            with collector:
+                # In streaming mode, cached programs do not have to be loaded
+                if not (stream and _is_published(p)):
+                    p.retrieve_text_from_pdf()
+                    p.create_doc_from_text()
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            failures.append((p, exception))
+        else:
+            if journal is not None and p.reference("pdf") not in journal.done:
+                journal.record_done(p.reference("pdf"))
+
+        # Release the memory of the processed programs when streaming or when the memory ceiling is exceeded
+        if stream:
+            p.release()
+            tracker.check()
+        elif tracker.exceeded():
+            # The released memory is not returned to the operating system right away, so the limit is only checked
+            # again after the next program
+            print(f"\nMemory ceiling exceeded, releasing the {i + 1} processed programs")
+            stream = True
+            for processed in programs[: i + 1]:
+                processed.release()
+        else:
+            tracker.check()
 
         e = time.perf_counter()
 
         # Create a suffix to show the remaining time and the current program
-        remaining_time = utils.calculate_remaining_processing_time(i, len(_programs), e - s)
+        remaining_time = utils.calculate_remaining_processing_time(i, len(programs), e - s)
         remaining_time = str(td(seconds=remaining_time))
 
-        if i == len(_programs) - 1:
+        if i == len(programs) - 1:
             suffix = "Finished"
-            utils.progress(i + 1, len(_programs), suffix)
+            utils.progress(i + 1, len(programs), suffix)
 
     # Print postponed output
     if VERBOSE and collector.has_output:
         print("\nCollected output:")
         collector.print_output()
 
-    # Change variable to true to indicate that all programs have been processed
+    print(tracker.report())
+
+    return failures
+
+
+def source_hash(path: str) -> str:
+    """Return the sha256 hash of a pdf file. The hash is remembered for the size and modification time of the file,
+    so a file is only read again when it changes.
+
+    Arguments:
+        path (str): The path to the pdf file.
+
+    Returns:
+        The hexadecimal sha256 hash.
+    """
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+
+    if key not in _source_hashes:
+        _source_hashes[key] = utils.file_sha256(path)
+
+    return _source_hashes[key]
+
+
+def duplicate_groups(programs: list[Program]) -> list[list[Program]]:
+    """Group the programs with identical pdf files, for example a program that was filed again unchanged for a later
+    election. Identical pdf files are processed once, the other programs load the result from the cache.
+
+    Arguments:
+        programs (list[Program]): The programs.
+
+    Returns:
+        The groups of two or more programs with the same pdf file, in the order of the programs.
+    """
+    groups: dict[str, list[Program]] = {}
+    for program in programs:
+        groups.setdefault(program.source_hash, []).append(program)
+
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def _is_published(program: Program) -> bool:
+    """Return True if the text and doc of the program are cached for the current stage versions, False otherwise."""
+    return all(program.cache_status().values())
+
+
+def _process_cooperatively_in_worker(
+    programs: list[Program], lease_seconds: float, lease_directory: str
+) -> list[tuple[Program, Exception]]:
+    """Process the programs together with the other workers that share the lease directory.
+
+    Arguments:
+        programs (list[Program]): The programs to process.
+        lease_seconds (float): The number of seconds a lease is valid without being renewed.
+        lease_directory (str): The directory of the lease files.
+
+    Returns:
+        The programs that this worker could not process, together with the exception that was raised.
+    """
+    queue = LeaseQueue(lease_directory, lease_seconds=lease_seconds)
+
+    def work(program: Program) -> None:
+        _process_program_in_worker(program)
+
+        # Only the outputs on disk are needed, release the memory of the program
+        program.release()
+
+    failures: list[tuple[Program, Exception]] = run_cooperatively(
+        programs,
+        queue,
+        key=lambda p: p.reference("pdf"),
+        is_done=_is_published,
+        work=work,
+    )
+
+    return failures
+
+
+def process_programs_cooperatively(
+    programs: list[Program], workers: int = 1, lease_seconds: float = 600.0, lease_directory: str | None = None
+) -> list[tuple[Program, Exception]]:
+    """Process the programs together with other processes, possibly on other hosts, that share the processed
+    folder. Each program is processed by the worker that claims its lease, see the work_queue module. The text and
+    doc are saved to disk but not kept in memory, use process_programs() afterward to load them.
+
+    Arguments:
+        programs (list[Program]): The programs to process.
+
+    Keyword Arguments:
+        workers (int): The number of local processes that take part. (default: {1})
+        lease_seconds (float): The number of seconds a lease is valid without being renewed. (default: {600.0})
+        lease_directory (str | None): The directory of the lease files, shared by all workers, processed/leases if
+            None. (default: {None})
+
+    Returns:
+        The programs that could not be processed by the local workers, together with the exception that was raised.
+
+    Raises:
+        AssertionError: If workers is not a positive integer.
+    """
+    assert isinstance(workers, int) and workers > 0, "Workers must be a positive integer."
+
+    lease_directory = lease_directory or _processed_lease_path
+
+    if workers == 1:
+        return _process_cooperatively_in_worker(programs, lease_seconds, lease_directory)
+
+    # Each process claims programs on its own, exactly like the workers on other hosts
+    failures: list[tuple[Program, Exception]] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(PAGE_WORKERS,)) as executor:
+        futures = [
+            executor.submit(_process_cooperatively_in_worker, programs, lease_seconds, lease_directory)
+            for _ in range(workers)
+        ]
+
+        for future in futures:
+            failures.extend(future.result())
+
+    return failures
+
+
+def _process_corpus(
+    programs: list[Program], workers: int, stream: bool, memory_ceiling: int | None, memory_limit: int | None
+) -> CorpusSnapshot:
+    """Process the programs of the next snapshot and publish it when they are processed. The programs are processed
+    in a random order, or in the order of an interrupted run. The caller must hold _refresh_lock.
+
+    Arguments:
+        programs (list[Program]): The programs of the next snapshot.
+        workers (int): The number of processes used to process the programs.
+        stream (bool): Release the text and doc of each program after it has been saved.
+        memory_ceiling (int | None): The resident set size in bytes above which the processed programs are released,
+            None for no ceiling.
+        memory_limit (int | None): The maximum resident set size in bytes, None for no limit.
+
+    Returns:
+        The published snapshot.
+
+    Raises:
+        RuntimeError: If one or more programs could not be processed, the current snapshot is kept.
+        MemoryError: If the memory use exceeds the limit.
+    """
+    global _snapshot
+
+    print(f"Will process {len(programs)} programs")
+
+    # Randomize the order of the programs to prevent the same program from being processed first every time
+    programs = random.sample(programs, len(programs))
+
+    # Continue in the order of an interrupted run
+    journal = RunJournal(_processed_journal_path)
+    order = journal.start([p.reference("pdf") for p in programs])
+    position = {reference: i for i, reference in enumerate(order)}
+    programs.sort(key=lambda p: position[p.reference("pdf")])
+
+    if journal.resumed:
+        print(f"Resuming interrupted run, {len(journal.done)} of {len(programs)} programs were already processed")
+
+    failures = process_programs(
+        programs,
+        workers=workers,
+        journal=journal,
+        stream=stream,
+        memory_ceiling=memory_ceiling,
+        memory_limit=memory_limit,
+    )
+
+    # Programs without a usable text layer are left out of the analysis
+    skipped = [p for p, exception in failures if isinstance(exception, preflight.NotExtractableError)]
+    failures = [(p, exception) for p, exception in failures if not isinstance(exception, preflight.NotExtractableError)]
+
+    if skipped:
+        print(f"Skipped {len(skipped)} program(s) without a usable text layer: {', '.join(map(str, skipped))}")
+        programs = [p for p in programs if all(p is not s for s in skipped)]
+
+    if failures:
+        raise RuntimeError(
+            f"{len(failures)} program(s) could not be processed: "
+            + ", ".join(f"{p} ({exception!r})" for p, exception in failures)
+        )
+
+    journal.finish()
+
+    # Swap in the processed snapshot, assigning the global is atomic so readers see either snapshot as a whole
     # This enables the user to call the get_programs() api
-    _programs_processed = True
+    _snapshot = CorpusSnapshot(tuple(programs), processed=True, version=current_snapshot().version + 1)
+    return _snapshot
+
+
+def process_all_programs(
+    workers: int = 1, stream: bool = False, memory_ceiling: int | None = None, memory_limit: int | None = None
+) -> CorpusSnapshot:
+    """Process all programs by retrieving the text from the pdf, creating a doc from the text
+    and saving the text and doc to a file.
+
+    The progress is recorded in a journal. When a run is interrupted, the next run processes the programs in the same
+    order and only loads the programs that were already processed from the cache. Programs without a usable text
+    layer are skipped and left out of the analysis, see PREFLIGHT.
+
+    Keyword Arguments:
+        workers (int): The number of processes used to process the programs. (default: {1})
+        stream (bool): Release the text and doc of each program after it has been saved. (default: {False})
+        memory_ceiling (int | None): The resident set size in bytes above which the processed programs are released,
+            None for no ceiling. (default: {None})
+        memory_limit (int | None): The maximum resident set size in bytes, None for no limit. (default: {None})
+
+    Returns:
+        The snapshot of the processed programs, which is published when all programs are processed.
+
+    Raises:
+        RuntimeError: If one or more programs could not be processed.
+        MemoryError: If the memory use exceeds the limit.
+    """
+    with _refresh_lock:
+        snapshot = _process_corpus(list(current_snapshot().programs), workers, stream, memory_ceiling, memory_limit)
+
     print("All programs processed, ready for analysis")
+    return snapshot
+
+
+def _file_key(path: str) -> tuple[str, int, int]:
+    """Return the path, size and modification time of a file, which change when the file is replaced."""
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+def refresh_corpus(
+    workers: int = 1,
+    stream: bool = False,
+    memory_ceiling: int | None = None,
+    memory_limit: int | None = None,
+    discovery_cache: str | None = None,
+) -> CorpusSnapshot:
+    """Identify the programs again, to pick up new, changed and removed pdf files, process them and publish the next
+    snapshot. The programs of which the pdf file did not change are taken over from the current snapshot, so they do
+    not have to be loaded again. Until the refresh completes, the current snapshot stays available.
+
+    Keyword Arguments:
+        workers (int): The number of processes used to process the programs. (default: {1})
+        stream (bool): Release the text and doc of each program after it has been saved. (default: {False})
+        memory_ceiling (int | None): The resident set size in bytes above which the processed programs are released,
+            None for no ceiling. (default: {None})
+        memory_limit (int | None): The maximum resident set size in bytes, None for no limit. (default: {None})
+        discovery_cache (str | None): The file in which the listings of the folders are cached, see
+            DISCOVERY_CACHE_PATH, None to keep them in memory only. (default: {None})
+
+    Returns:
+        The refreshed snapshot.
+
+    Raises:
+        RuntimeError: If one or more programs could not be processed, the current snapshot is kept.
+        MemoryError: If the memory use exceeds the limit.
+    """
+    with _refresh_lock:
+        # The size and modification time identify an unchanged file without reading it, unlike the source hash
+        current = {_file_key(p.path): p for p in current_snapshot().programs if os.path.exists(p.path)}
+        programs = [current.get(_file_key(p.path), p) for p in identify_programs(_manifest_path, discovery_cache)]
+
+        return _process_corpus(programs, workers, stream, memory_ceiling, memory_limit)
+
+
+def refresh_in_background(
+    workers: int = 1,
+    stream: bool = True,
+    memory_ceiling: int | None = None,
+    memory_limit: int | None = None,
+    discovery_cache: str | None = None,
+) -> "Future[CorpusSnapshot]":
+    """Refresh the corpus in a background thread, see refresh_corpus(). Refreshes run one after another.
+
+    Keyword Arguments:
+        workers (int): The number of processes used to process the programs. (default: {1})
+        stream (bool): Release the text and doc of each program after it has been saved. (default: {True})
+        memory_ceiling (int | None): The resident set size in bytes above which the processed programs are released,
+            None for no ceiling. (default: {None})
+        memory_limit (int | None): The maximum resident set size in bytes, None for no limit. (default: {None})
+        discovery_cache (str | None): The file in which the listings of the folders are cached, see
+            DISCOVERY_CACHE_PATH, None to keep them in memory only. (default: {None})
+
+    Returns:
+        The future of the refreshed snapshot.
+    """
+    return _refresh_executor.submit(refresh_corpus, workers, stream, memory_ceiling, memory_limit, discovery_cache)
+
+
+def load_corpus(discovery_cache: str | None = None) -> CorpusSnapshot:
+    """Identify the programs and publish them as the first snapshot of the corpus, which is not processed. Does
+    nothing when the programs have been identified already. The corpus is loaded on first use without a cache file,
+    call this first to cache the listings of the folders in a file, which makes identifying a large unchanged tree
+    fast.
+
+    Keyword Arguments:
+        discovery_cache (str | None): The file in which the listings of the folders are cached, see
+            DISCOVERY_CACHE_PATH, None to keep them in memory only. (default: {None})
+
+    Returns:
+        The current snapshot.
+    """
+    global _snapshot
+
+    with _load_lock:
+        if _snapshot is None:
+            _snapshot = CorpusSnapshot(tuple(identify_programs(_manifest_path, discovery_cache)))
+
+        return _snapshot
+
+
+def current_snapshot() -> CorpusSnapshot:
+    """Return the current snapshot of the corpus, identifying the programs on first use, see load_corpus(). Keep a
+    reference to query a consistent corpus, even while a refresh publishes the next snapshot.
+
+    Returns:
+        The current snapshot.
+    """
+    snapshot = _snapshot
+    return snapshot if snapshot is not None else load_corpus()
+
+
+def select_programs(
+    *,
+    election_type: str | None = None,
+    party: str | None = None,
+    election_date: str | None = None,
+    joined_issue: bool | None = False,
+    tags: list[str] | None = None,
+    region: str | None = None,
+) -> list[Program]:
+    """Return the identified programs that match the election type, party, election date and tags. Unlike
+    get_programs(), the programs do not need to be processed, which makes it possible to process a selection.
+
+    Keyword Arguments:
+        election_type (str): The type of the election. (default: {None})
+        party (str): The party of the program. (default: {None})
+        election_date (str): The date of the election. (default: {None})
+        joined_issue (bool | None): Whether the program is a joined issue, None for both. (default: {False})
+        tags (list[str]): The tags of the program. (default: {None})
+        region (str | None): The municipality or province of the program, any region if None. (default: {None})
+
+    Returns:
+        A list of the matching programs, which can be empty.
+
+    Raises:
+        AssertionError: If any of the parameters are not of the correct type.
+    """
+
+    # Validate parameters
+    assert isinstance(election_type, str) or election_type is None, "Election type must be a string or None."
+    assert isinstance(party, str) or party is None, "Party must be a string or None."
+    assert isinstance(election_date, str) or election_date is None, "Election date must be a string or None."
+    assert isinstance(joined_issue, bool) or joined_issue is None, "Joined issue must be a boolean or None."
+    assert isinstance(tags, list) or tags is None, "Tags must be a list or None."
+    assert isinstance(region, str) or region is None, "Region must be a string or None."
+
+    return current_snapshot().select(
+        election_type=election_type,
+        party=party,
+        election_date=election_date,
+        joined_issue=joined_issue,
+        tags=tags,
+        region=region,
+    )
 
 
 def get_all_programs() -> list[Program]:
@@ -574,13 +1501,14 @@ def get_all_programs() -> list[Program]:
     Returns:
         A list of all programs.
     """
-    if not _programs_processed:
+    snapshot = current_snapshot()
+    if not snapshot.processed:
         raise RuntimeError(
             "Programs have not been processed yet. To process them, run process_all_programs()"
             " before calling this function."
         )
 
-    return _programs
+    return list(snapshot.programs)
 
 
 def get_programs(
@@ -588,8 +1516,9 @@ def get_programs(
     election_type: str | None = None,
     party: str | None = None,
     election_date: str | None = None,
-    joined_issue: bool = False,
+    joined_issue: bool | None = False,
     tags: list[str] | None = None,
+    region: str | None = None,
 ) -> list[Program]:
     """Return a list of programs based on the election type, party, election date and tags. If no parameters are given,
     all programs will be returned. If the programs have not been processed yet, or no programs are found, an exception
@@ -599,8 +1528,9 @@ def get_programs(
         election_type (str): The type of the election. (default: {None})
         party (str): The party of the program. (default: {None})
         election_date (str): The date of the election. (default: {None})
-        joined_issue (bool): Whether the program is a joined issue. (default: {False})
+        joined_issue (bool | None): Whether the program is a joined issue, None for both. (default: {False})
         tags (list[str]): The tags of the program. (default: {None})
+        region (str | None): The municipality or province of the program, any region if None. (default: {None})
 
     Returns:
         A list of requested programs.
@@ -611,30 +1541,22 @@ def get_programs(
         ValueError: If no program is found.
     """
 
-    # Validate parameters
-    assert isinstance(election_type, str) or election_type is None, "Election type must be a string or None."
-    assert isinstance(party, str) or party is None, "Party must be a string or None."
-    assert isinstance(election_date, str) or election_date is None, "Election date must be a string or None."
-    assert isinstance(joined_issue, bool), "Joined issue must be a boolean."
-    assert isinstance(tags, list) or tags is None, "Tags must be a list or None."
-
     # Raise if programs have not been processed yet
-    if not _programs_processed:
+    if not current_snapshot().processed:
         raise RuntimeError(
             "Programs have not been processed yet. To process them, run process_all_programs()"
             " before calling this function."
         )
 
-    # Loop over all programs and find the programs that match the given parameters
-    found_programs = [
-        p
-        for p in _programs
-        if (election_type is None or p.election_type == election_type)
-        and (party is None or p.party == party)
-        and (election_date is None or p.election_date == election_date)
-        and p.joined_issue == joined_issue
-        and (tags is None or all(tag in p.tags for tag in tags))
-    ]
+    # Find the programs that match the given parameters, a later snapshot is processed as well
+    found_programs = select_programs(
+        election_type=election_type,
+        party=party,
+        election_date=election_date,
+        joined_issue=joined_issue,
+        tags=tags,
+        region=region,
+    )
 
     # Return found programs if any are found
     if found_programs:
@@ -653,6 +1575,7 @@ def get_specific_program(
     election_date: str,
     joined_issue: bool = False,
     tags: list[str] | None = None,
+    region: str | None = None,
 ) -> Program:
     """Return a program by election type, party and election date. If no program is found, or the programs have not
     been processed yet, an exception will be raised.
@@ -665,6 +1588,8 @@ def get_specific_program(
     Keyword Arguments:
         joined_issue (bool): Whether the program is a joined issue.
         tags (list[str]): The tags of the program. (default: {None})
+        region (str | None): The municipality or province of the program, None for national elections.
+            (default: {None})
 
     Returns:
         Program -- The requested program.
@@ -681,27 +1606,18 @@ def get_specific_program(
     assert isinstance(election_date, str) or election_date is None, "Election date must be a string or None."
     assert isinstance(joined_issue, bool), "Joined issue must be a boolean."
     assert isinstance(tags, list) or tags is None, "Tags must be a list or None."
+    assert isinstance(region, str) or region is None, "Region must be a string or None."
 
-    if not _programs_processed:
+    snapshot = current_snapshot()
+    if not snapshot.processed:
         raise RuntimeError(
             "Programs have not been processed yet. To process them, run process_all_programs()"
             " before calling this function."
         )
 
-    properties = (election_type, party, election_date, joined_issue)
-
-    # Find program
-    for p in _programs:
-        # Check if program matches properties
-        if (p.election_type, p.party.name, p.election_date, p.joined_issue) != properties:
-            continue
-
-        # Check if program has all tags
-        if tags is not None and not all(tag in p.tags for tag in tags):
-            continue
-
-        # Return found program
-        return p
+    program = snapshot.find(election_type, party, election_date, joined_issue, tags, region)
+    if program is not None:
+        return program
 
     raise ValueError(
         f"No program found for election type: {election_type}," f" party: {party}, election date: {election_date}"
@@ -715,6 +1631,18 @@ If set to true, the text and doc will always be retrieved from the pdf and saved
 VERBOSE = False
 """Set to true to enable verbose output. This will print the output of the program to the console."""
 
+PDF_BACKEND = "pypdf"
+"""The name of the pdf backend used to extract the text, see the pdf_backends module. A program can select another
+backend with a filename tag, for example #Pdfium."""
+
+PREFLIGHT = True
+"""Probe whether the pdf of a program has a usable text layer before processing it, see the preflight module.
+Programs without one, like scans, are skipped. Set to false to process every program."""
+
+PAGE_WORKERS = 1
+"""The number of processes used to extract the pages of a single large pdf, 1 to extract the pages serially. Files
+with fewer pages than pdf_backends.SHARDING_PAGE_THRESHOLD are always extracted serially."""
+
 # Define regex patterns to clean the parsed text from a pdf file
 # TODO: Add more special characters
 # TODO: Refine regex patterns
@@ -764,6 +1692,12 @@ _manifest_path: str = os.path.join(_data_path, "manifests")
 _processed_path: str = os.path.join(_project_root, "processed")
 _processed_text_path: str = os.path.join(_processed_path, "text")
 _processed_doc_path: str = os.path.join(_processed_path, "doc")
+_processed_lease_path: str = os.path.join(_processed_path, "leases")
+_processed_journal_path: str = os.path.join(_processed_path, "run.journal")
+_processed_stages_path: str = os.path.join(_processed_path, "stages")
+
+DISCOVERY_CACHE_PATH: str = os.path.join(_processed_path, "discovery.json")
+"""The file in which the listings of the manifests folder are cached, see load_corpus() and the discovery module"""
 
 # Ensure output folders exist
 if not os.path.exists(_processed_path):
@@ -774,9 +1708,11 @@ if not os.path.exists(_processed_doc_path):
     os.mkdir(_processed_doc_path)
 
 
-_programs_processed = False
-"""Indicates whether all programs have been processed by the process_all_programs() function
-This is necessary to prevent the user from calling the get_programs() api before the programs have been processed"""
+_refresh_lock = threading.Lock()
+"""Lock that serializes the processing of snapshots, the readers of a snapshot do not take it"""
+
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="corpus-refresh")
+"""The thread that refreshes the corpus in the background, see refresh_in_background()"""
 
 nlp: Language = spacy.load("nl_core_news_lg")
 """The core spacy model for the Dutch language. This is used to create a spacy doc from the text."""
@@ -784,8 +1720,72 @@ nlp: Language = spacy.load("nl_core_news_lg")
 # Add syllables pipe to spacy, this is necessary for the syllables_count attribute to be available on tokens
 nlp.add_pipe("syllables", after="tagger")
 
-_programs: list[Program] = identify_programs(_manifest_path)
-"""Internal list of all programs"""
+# Define the processing stages, the fingerprint of a stage changes when its code, configuration or model changes
+SLOGAN_STAGE = Stage("slogans", fingerprint(join_pages, _remove_repeating_slogans), "txt")
+"""Stage that joins the pages and removes the repeating slogans"""
+
+JOIN_STAGE = Stage("joined", fingerprint(join_pages), "txt")
+"""Stage that only joins the pages, for backends that strip the repeating margins during extraction"""
+
+CLEAN_STAGE = Stage(
+    "clean",
+    fingerprint(
+        clean_pdf_text,
+        special_char_pattern,
+        page_num_pattern,
+        hyphenation_pattern,
+        newline_pattern,
+        tab_pattern,
+        double_dot_pattern,
+        form_feed_pattern,
+        large_numbers_pattern,
+        single_char_pattern,
+        double_space_pattern,
+    ),
+    "txt",
+)
+"""Stage that cleans the text"""
+
+DOC_STAGE = Stage(
+    "doc",
+    fingerprint(
+        spacy.__version__,
+        metadata.version("spacy_syllables"),
+        nlp.meta["lang"],
+        nlp.meta["name"],
+        nlp.meta["version"],
+        nlp.pipe_names,
+    ),
+    "spacy",
+)
+"""Stage that creates the spacy doc from the cleaned text"""
+
+COUNTS_STAGE = Stage("counts", fingerprint(DOC_STAGE.fingerprint, keyness.term_counts), "npz")
+"""Stage that counts the words of the doc, it is keyed by the cleaned text like the doc"""
+
+SENTENCES_STAGE = Stage(
+    "sentences",
+    fingerprint(DOC_STAGE.fingerprint, reuse.sentence_fingerprints, reuse.MIN_WORDS, reuse.NUM_HASHES),
+    "npz",
+)
+"""Stage that fingerprints the sentences of the doc, it is keyed by the cleaned text like the doc"""
+
+_stage_cache = StageCache(_processed_stages_path)
+"""The cache of the outputs of the processing stages"""
+
+_source_hashes: dict[tuple[str, int, int], str] = {}
+"""The sha256 hash of each pdf file, by the path, size and modification time of the file"""
+
+_issuers: dict[str, Issuer] = {}
+"""The issuer of each party, shared by the programs of the party"""
+
+_snapshot: CorpusSnapshot | None = None
+"""The current snapshot of the corpus, None until the programs are identified, see load_corpus(). It is not processed
+until process_all_programs() publishes the next one. This is necessary to prevent the user from calling the
+get_programs() api before the programs have been processed"""
+
+_load_lock = threading.Lock()
+"""Lock that makes sure the programs are identified only once, see load_corpus()"""
 
 if __name__ == "__main__":
     process_all_programs()
@@ -1,9 +1,74 @@
 import collections
+from typing import NamedTuple, TypeVar
 
 import numpy as np
+import numpy.typing as npt
 
 from spacy.tokens import Doc
 
+T = TypeVar("T", float, npt.NDArray[np.float64])
+
+
+class SentenceArrays(NamedTuple):
+    """The counts of each sentence of a text, from which the readability of any selection of its sentences can be
+    calculated. The arrays are aligned, item i belongs to sentence i."""
+
+    tokens: npt.NDArray[np.int64]
+    """The number of tokens of each sentence, including punctuation"""
+
+    words: npt.NDArray[np.int64]
+    """The number of words of each sentence, which are the alphabetic tokens"""
+
+    syllables: npt.NDArray[np.int64]
+    """The number of syllables in the words of each sentence"""
+
+    starts: npt.NDArray[np.int64]
+    """The character offset in the text at which each sentence starts"""
+
+
+def sentence_arrays(doc: Doc) -> SentenceArrays:
+    """
+    Collects the counts of each sentence of a text.
+
+    Args:
+        doc {Doc} -- The spacy doc for which the counts should be collected.
+
+    Returns:
+        SentenceArrays: The number of tokens, words and syllables and the start offset of each sentence.
+    """
+
+    tokens, words, syllables, starts = [], [], [], []
+
+    for sent in doc.sents:
+        alpha = [token for token in sent if token.is_alpha]
+        tokens.append(len(sent))
+        words.append(len(alpha))
+        syllables.append(sum(token._.syllables_count for token in alpha))
+        starts.append(sent.start_char)
+
+    return SentenceArrays(
+        np.array(tokens, dtype=np.int64),
+        np.array(words, dtype=np.int64),
+        np.array(syllables, dtype=np.int64),
+        np.array(starts, dtype=np.int64),
+    )
+
+
+def flesch_douma_formula(avg_sentence_length: T, avg_syllables_per_word: T) -> T:
+    """
+    Calculates the Flesch-Douma index from the average sentence length and the average number of syllables per word.
+    Works element-wise on numpy arrays, to calculate the index of many selections of sentences at once.
+
+    Args:
+        avg_sentence_length {float | np.ndarray} -- The average sentence length.
+        avg_syllables_per_word {float | np.ndarray} -- The average number of syllables per word.
+
+    Returns:
+        float | np.ndarray: The Flesch-Douma index.
+    """
+
+    return 206.835 - (1.015 * avg_sentence_length) - (84.6 * avg_syllables_per_word)
+
 
 def flesch_douma_index(doc: Doc) -> float:  # noqa: C901
     """
@@ -24,7 +89,7 @@ def flesch_douma_index(doc: Doc) -> float:  # noqa: C901
     avg_syllables_per_word = average_syllables_per_word(doc)
 
     # Calculate the Flesch-Douma index
-    return 206.835 - (1.015 * avg_sentence_length) - (84.6 * avg_syllables_per_word)
+    return float(flesch_douma_formula(avg_sentence_length, avg_syllables_per_word))
 
 
 def average_sentence_length(doc: Doc) -> float:
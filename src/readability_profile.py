@@ -0,0 +1,238 @@
+"""
+This module contains the rolling readability profile of a program, which shows where in the program the language
+gets hard.
+
+The readability is calculated over windows of consecutive sentences that slide along the program. A window either
+has a fixed number of sentences, or contains the fewest sentences that together have at least a given number of
+words. The statistics of a window are ratios of sums over its sentences, so they are calculated for all windows at
+once from the cumulative sums of the counts of each sentence, see readability.sentence_arrays(). The time this takes
+does not depend on the size of the windows: it is linear in the number of sentences, plus a binary search per window
+to find the end of windows measured in words.
+
+Each window is aligned to the text by the character offset of its first sentence and to the pdf by the page of its
+first sentence. The profile of a program is exported as a compressed numpy archive with one array per field of
+ReadabilityProfile.
+
+How to use:
+
+    arrays = readability.sentence_arrays(program.doc)
+    profile = rolling_profile(arrays, window=50, page_offsets=program.page_offsets())
+
+    export_profile(profile, "profile.npz")
+
+"""
+
+import os
+from typing import TYPE_CHECKING, NamedTuple, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+
+from src import readability, utils
+
+if TYPE_CHECKING:
+    from src.process_data import Program
+
+IntArray: TypeAlias = npt.NDArray[np.int64]
+FloatArray: TypeAlias = npt.NDArray[np.float64]
+
+WINDOW_UNITS = ("sentences", "words")
+"""The units in which the size of the windows can be given"""
+
+
+class ReadabilityProfile(NamedTuple):
+    """The readability of each window of a program. The arrays are aligned, item i belongs to window i."""
+
+    start_sentence: IntArray
+    """The index of the first sentence of each window"""
+
+    end_sentence: IntArray
+    """The index after the last sentence of each window"""
+
+    start_offset: IntArray
+    """The character offset in the text at which each window starts"""
+
+    page: IntArray
+    """The index of the page on which each window starts, -1 if the page offsets are unknown"""
+
+    flesch_douma_index: FloatArray
+    """The Flesch-Douma index of each window"""
+
+    average_sentence_length: FloatArray
+    """The average sentence length of each window, in tokens like readability.average_sentence_length()"""
+
+    average_syllables_per_word: FloatArray
+    """The average number of syllables per word of each window"""
+
+
+def window_bounds(
+    arrays: readability.SentenceArrays, window: int, step: int = 1, unit: str = "sentences"
+) -> tuple[IntArray, IntArray]:
+    """Determine the sentences of each window.
+
+    Args:
+        arrays (readability.SentenceArrays): The counts of the sentences.
+        window (int): The size of the windows, in sentences or in words.
+
+    Keyword Arguments:
+        step (int): The number of sentences between the starts of consecutive windows. (default: {1})
+        unit (str): The unit of the window size, "sentences" or "words". (default: {"sentences"})
+
+    Returns:
+        The index of the first sentence and the index after the last sentence of each window. Windows that would run
+        past the end of the program are left out.
+
+    Raises:
+        AssertionError: If window or step is not positive.
+        ValueError: If the unit is unknown.
+    """
+    assert window > 0, "Window must be positive."
+    assert step > 0, "Step must be positive."
+
+    sentences = len(arrays.tokens)
+
+    if unit == "sentences":
+        starts = np.arange(0, max(sentences - window + 1, 0), step, dtype=np.int64)
+        return starts, starts + window
+
+    if unit == "words":
+        # A window ends at the first sentence at which the cumulative number of words reaches the size of the window
+        cumulative = np.concatenate([[0], np.cumsum(arrays.words)])
+        starts = np.arange(0, sentences, step, dtype=np.int64)
+        ends: IntArray = np.searchsorted(cumulative, cumulative[starts] + window, side="left").astype(np.int64)
+
+        complete = ends <= sentences
+        return starts[complete], ends[complete]
+
+    raise ValueError(f"Unknown window unit: {unit}. Choose from: {', '.join(WINDOW_UNITS)}")
+
+
+def rolling_profile(
+    arrays: readability.SentenceArrays,
+    window: int,
+    step: int = 1,
+    unit: str = "sentences",
+    page_offsets: list[int] | None = None,
+) -> ReadabilityProfile:
+    """Calculate the readability of windows that slide along a program.
+
+    Args:
+        arrays (readability.SentenceArrays): The counts of the sentences of the program.
+        window (int): The size of the windows, in sentences or in words.
+
+    Keyword Arguments:
+        step (int): The number of sentences between the starts of consecutive windows. (default: {1})
+        unit (str): The unit of the window size, "sentences" or "words". (default: {"sentences"})
+        page_offsets (list[int] | None): The character offset at which each page starts, see
+            Program.page_offsets(). (default: {None})
+
+    Returns:
+        The readability profile, without windows if the program is shorter than a window.
+    """
+    starts, ends = window_bounds(arrays, window, step, unit)
+
+    # The sums over sentences [start, end) are the differences of the cumulative sums at end and start
+    sums = {}
+    for name in ("tokens", "words", "syllables"):
+        cumulative = np.concatenate([[0], np.cumsum(getattr(arrays, name))])
+        sums[name] = (cumulative[ends] - cumulative[starts]).astype(np.float64)
+
+    # A window without words has no syllables per word
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average_sentence_length = sums["tokens"] / (ends - starts)
+        average_syllables_per_word = sums["syllables"] / sums["words"]
+
+    start_offset = arrays.starts[starts]
+
+    if page_offsets:
+        page = np.searchsorted(np.asarray(page_offsets), start_offset, side="right").astype(np.int64) - 1
+    else:
+        page = np.full(len(starts), -1, dtype=np.int64)
+
+    return ReadabilityProfile(
+        starts,
+        ends,
+        start_offset,
+        page,
+        readability.flesch_douma_formula(average_sentence_length, average_syllables_per_word),
+        average_sentence_length,
+        average_syllables_per_word,
+    )
+
+
+def export_profile(profile: ReadabilityProfile, path: str) -> None:
+    """Export a readability profile as a compressed numpy archive, with one array per field of the profile. The
+    archive is written atomically.
+
+    Args:
+        profile (ReadabilityProfile): The profile.
+        path (str): The path of the archive, which should end with .npz.
+    """
+    temporary = f"{path}.tmp.npz"
+    np.savez_compressed(temporary, **profile._asdict())
+    os.replace(temporary, path)
+
+
+def load_profile(path: str) -> ReadabilityProfile:
+    """Load a readability profile exported with export_profile().
+
+    Args:
+        path (str): The path of the archive.
+
+    Returns:
+        The profile.
+    """
+    with np.load(path) as archive:
+        return ReadabilityProfile(**{field: archive[field] for field in ReadabilityProfile._fields})
+
+
+def export_profiles(
+    programs: list["Program"],
+    directory: str,
+    window: int,
+    step: int = 1,
+    unit: str = "sentences",
+    release: bool = False,
+) -> list[str]:
+    """Calculate and export the readability profile of each program, named after the reference of the program.
+
+    Args:
+        programs (list[Program]): The processed programs.
+        directory (str): The folder in which the profiles are stored, created if it does not exist.
+        window (int): The size of the windows, in sentences or in words.
+
+    Keyword Arguments:
+        step (int): The number of sentences between the starts of consecutive windows. (default: {1})
+        unit (str): The unit of the window size, "sentences" or "words". (default: {"sentences"})
+        release (bool): Release the text and doc of each program after its profile is exported. (default: {False})
+
+    Returns:
+        The paths of the exported profiles.
+
+    Raises:
+        ValueError: If a program has not been processed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+
+    for i, program in enumerate(programs):
+        utils.progress(i, len(programs), str(program))
+
+        if program.doc is None:
+            raise ValueError(f"Program {program} has not been processed.")
+
+        profile = rolling_profile(
+            readability.sentence_arrays(program.doc), window, step, unit, page_offsets=program.page_offsets()
+        )
+
+        path = os.path.join(directory, program.reference("npz"))
+        export_profile(profile, path)
+        paths.append(path)
+
+        if release:
+            program.release()
+
+    if programs:
+        utils.progress(len(programs), len(programs), "Finished")
+
+    return paths
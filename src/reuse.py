@@ -0,0 +1,389 @@
+"""
+This module contains the detection of sentences that a program reuses from another program, for example how much of
+a manifesto is copied from the previous manifesto of the party, or which sentences of a joined program come from
+which member party.
+
+Every sentence of a program is fingerprinted once, see Program.sentence_fingerprints():
+  - An exact hash of the normalized sentence: the lowercase alphabetic words, so punctuation, numbers and layout do not
+    matter.
+  - A minhash signature of its set of words: NUM_HASHES independent hashes of each word, with the minimum of each
+    hash over the words. The fraction of the minimums two sentences share estimates the fraction of words they share.
+
+Sentences are matched with an index instead of comparing every pair of sentences. Exact matches are found by looking
+up the hashes in the sorted hashes of the other program. Near-exact matches are sentences that share at least
+MIN_SIMILARITY of their words. The signatures are split in bands of BAND_ROWS minimums, sentences that share many words
+very likely agree on a whole band, so only the sentences that share a band are compared. A simhash is not used, a single
+changed word flips too many of its bits for a short sentence.
+
+Consecutive sentences that match consecutive sentences of the other program form an aligned passage.
+
+How to use:
+
+    current = get_programs(election_type="TK", party="CDA", election_date="2023-11")[0]
+    previous = source_programs(current, get_programs())[0]
+
+    report = compare_fingerprints(current.sentence_fingerprints(), previous.sentence_fingerprints())
+    print(report.reused_ratio, report.passages[:5])
+
+"""
+
+import hashlib
+import io
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, NamedTuple, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+from spacy.tokens import Doc
+
+if TYPE_CHECKING:
+    from src.process_data import Program
+
+IdArray: TypeAlias = npt.NDArray[np.uint64]
+IntArray: TypeAlias = npt.NDArray[np.int64]
+FloatArray: TypeAlias = npt.NDArray[np.float64]
+
+MIN_WORDS = 5
+"""Sentences with fewer words are not matched, short sentences like headings are often the same by chance"""
+
+MIN_SIMILARITY = 0.6
+"""The minimal estimated fraction of shared words of near-exact matching sentences"""
+
+NUM_HASHES = 32
+"""The number of minimums of the signature of a sentence"""
+
+BAND_ROWS = 4
+"""The number of minimums per band of the index, sentences are compared when they agree on a whole band"""
+
+MIN_PASSAGE_SENTENCES = 2
+"""The minimal number of consecutive matching sentences of an aligned passage"""
+
+_seeds = np.random.default_rng(0x5EED).integers(0, 2**63, size=(2, NUM_HASHES), dtype=np.uint64)
+"""The seeds of the hashes of the signature, the same in every process so cached signatures stay valid"""
+
+
+class SentenceFingerprints(NamedTuple):
+    """The fingerprints of the sentences of a program. The arrays are aligned, item i belongs to sentence i."""
+
+    hashes: IdArray
+    """The hash of the normalized sentence, 0 for sentences that are too short to be matched"""
+
+    signatures: IdArray
+    """The minhash signature of the words of the sentence, NUM_HASHES values per sentence"""
+
+    starts: IntArray
+    """The character offset at which the sentence starts in the text"""
+
+
+class Passage(NamedTuple):
+    """Consecutive sentences of a program that match consecutive sentences of another program."""
+
+    start: int
+    """The index of the first sentence of the passage in the program"""
+
+    source_start: int
+    """The index of the first sentence of the passage in the other program"""
+
+    length: int
+    """The number of sentences of the passage"""
+
+
+@dataclass(slots=True)
+class ReuseReport:
+    """A data class to represent the sentences a program reuses from another program."""
+
+    sentences: int
+    """The number of sentences of the program that are long enough to be matched"""
+    exact: int
+    """The number of those sentences that occur exactly in the other program"""
+    near: int
+    """The number of those sentences that nearly occur in the other program"""
+    matches: IntArray = field(repr=False)
+    """The index of the matching sentence in the other program for each sentence, -1 if there is none"""
+    passages: list[Passage] = field(default_factory=list)
+    """The aligned passages, in the order of the program"""
+
+    @property
+    def reused_ratio(self) -> float:
+        """The fraction of the sentences that occur exactly or nearly in the other program."""
+        return (self.exact + self.near) / self.sentences if self.sentences else 0.0
+
+
+def _hash64(text: str) -> int:
+    """Return a 64-bit hash of a string, the same in every process unlike hash()."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mix(values: IdArray, xor: IdArray, multiplier: IdArray) -> IdArray:
+    """Hash 64-bit values with an xor-multiply-shift hash, the arithmetic wraps around."""
+    mixed: IdArray = (values ^ xor) * (multiplier | np.uint64(1))
+    mixed ^= mixed >> np.uint64(31)
+    return mixed
+
+
+def sentence_fingerprints(doc: Doc) -> SentenceFingerprints:
+    """
+    Fingerprints the sentences of a text.
+
+    Args:
+        doc {Doc} -- The spacy doc of the text.
+
+    Returns:
+        SentenceFingerprints: The exact hash and minhash signature of each sentence.
+    """
+
+    hashes: list[int] = []
+    starts: list[int] = []
+    word_hashes: list[int] = []
+    word_starts: list[int] = []
+
+    for sent in doc.sents:
+        words = [token for token in sent if token.is_alpha]
+
+        # The hash 0 marks sentences that are too short, a sentence that hashes to 0 gets 1 instead
+        if len(words) >= MIN_WORDS:
+            hashes.append(_hash64(" ".join(token.lower_ for token in words)) or 1)
+        else:
+            hashes.append(0)
+        starts.append(sent.start_char)
+
+        word_starts.append(len(word_hashes))
+        word_hashes.extend(token.lower for token in words)
+
+    # The words of each sentence are consecutive, so the minimums are reduced per run of words, a sentence without
+    # words keeps the maximal value, which matches nothing in practice
+    signatures = np.full((len(hashes), NUM_HASHES), np.iinfo(np.uint64).max, dtype=np.uint64)
+    counts = np.diff(np.append(word_starts, len(word_hashes)))
+    nonempty = np.flatnonzero(counts > 0)
+
+    if len(nonempty):
+        values = _mix(np.array(word_hashes, dtype=np.uint64)[:, None], _seeds[0], _seeds[1])
+        signatures[nonempty] = np.minimum.reduceat(values, np.array(word_starts)[nonempty], axis=0)
+
+    return SentenceFingerprints(np.array(hashes, dtype=np.uint64), signatures, np.array(starts, dtype=np.int64))
+
+
+def fingerprints_to_bytes(fingerprints: SentenceFingerprints) -> bytes:
+    """Serialize sentence fingerprints as an uncompressed numpy archive."""
+    buffer = io.BytesIO()
+    np.savez(buffer, **fingerprints._asdict())
+    return buffer.getvalue()
+
+
+def fingerprints_from_bytes(data: bytes) -> SentenceFingerprints:
+    """Deserialize sentence fingerprints serialized with fingerprints_to_bytes()."""
+    with np.load(io.BytesIO(data)) as archive:
+        return SentenceFingerprints(**{field: archive[field] for field in SentenceFingerprints._fields})
+
+
+def source_programs(program: "Program", candidates: list["Program"]) -> list["Program"]:
+    """Find the programs a program may reuse sentences from: for each member party, its latest program of an earlier
+    election of the same type, in the same region. For a single party that is its previous program, for a joined
+    program the previous programs of its members. Programs without tags are preferred, tags mark variants like a
+    second edition.
+
+    Args:
+        program (Program): The program.
+        candidates (list[Program]): The programs to choose from, for example all programs.
+
+    Returns:
+        The source programs, in the order of the members in the name of the party.
+    """
+    sources = []
+
+    for member in program.party.name.split("+"):
+        earlier = [
+            p
+            for p in candidates
+            if p.election_type == program.election_type
+            and p.region == program.region
+            and p.party.name == member
+            and p.election_date < program.election_date
+        ]
+        if earlier:
+            sources.append(max(earlier, key=lambda p: (p.election_date, not p.tags)))
+
+    return sources
+
+
+def _exact_matches(hashes: IdArray, source_hashes: IdArray) -> IntArray:
+    """Find for each hash the index of an equal hash in the source, -1 if there is none. Hashes of 0 never match."""
+    order = np.argsort(source_hashes, kind="stable")
+    sorted_hashes = source_hashes[order]
+
+    positions = np.minimum(np.searchsorted(sorted_hashes, hashes), max(len(sorted_hashes) - 1, 0))
+    matches = np.full(len(hashes), -1, dtype=np.int64)
+
+    if len(sorted_hashes):
+        found = (sorted_hashes[positions] == hashes) & (hashes != 0)
+        matches[found] = order[positions[found]]
+
+    return matches
+
+
+def _band_keys(signatures: IdArray, band: int) -> IdArray:
+    """Combine the minimums of a band of each signature into a single key."""
+    keys = np.zeros(len(signatures), dtype=np.uint64)
+    for column in signatures[:, band * BAND_ROWS : (band + 1) * BAND_ROWS].T:
+        keys = (keys ^ column) * np.uint64(0x100000001B3)
+    return keys
+
+
+def _near_matches(
+    signatures: IdArray,
+    queries: npt.NDArray[np.bool_],
+    source_signatures: IdArray,
+    sources: npt.NDArray[np.bool_],
+    min_similarity: float,
+) -> tuple[IntArray, FloatArray]:
+    """Find for each signature the index of the most similar signature in the source with at least the minimal
+    similarity.
+
+    Arguments:
+        signatures (np.ndarray): The signatures of the sentences.
+        queries (np.ndarray): Which sentences should be matched.
+        source_signatures (np.ndarray): The signatures of the sentences of the source.
+        sources (np.ndarray): Which sentences of the source may be matched.
+        min_similarity (float): The minimal fraction of minimums matching signatures share.
+
+    Returns:
+        The index of the most similar signature in the source and the fraction of minimums they share, -1 and 0 if
+        there is none with the minimal similarity.
+    """
+    matches = np.full(len(signatures), -1, dtype=np.int64)
+    similarities = np.zeros(len(signatures), dtype=np.float64)
+
+    query_indices, source_indices = np.flatnonzero(queries), np.flatnonzero(sources)
+
+    for band in range(NUM_HASHES // BAND_ROWS):
+        keys = _band_keys(source_signatures[source_indices], band)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        query_keys = _band_keys(signatures[query_indices], band)
+        lower = np.searchsorted(sorted_keys, query_keys, side="left")
+        upper = np.searchsorted(sorted_keys, query_keys, side="right")
+
+        # Expand the ranges of the source sentences that share the band into pairs
+        lengths = upper - lower
+        pair_queries = np.repeat(query_indices, lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pair_sources = source_indices[order[np.repeat(lower, lengths) + offsets]]
+
+        pair_similarities = (signatures[pair_queries] == source_signatures[pair_sources]).mean(axis=1)
+
+        # Assign the pairs in order of increasing similarity, when a sentence occurs more than once the last
+        # assignment wins, which is the most similar source
+        closest = np.argsort(pair_similarities, kind="stable")
+        closest = closest[pair_similarities[closest] > similarities[pair_queries[closest]]]
+        similarities[pair_queries[closest]] = pair_similarities[closest]
+        matches[pair_queries[closest]] = pair_sources[closest]
+
+    matches[similarities < min_similarity] = -1
+    return matches, similarities
+
+
+def aligned_passages(matches: IntArray, min_sentences: int = MIN_PASSAGE_SENTENCES) -> list[Passage]:
+    """Find the runs of consecutive sentences that match consecutive sentences of the other program.
+
+    Args:
+        matches (np.ndarray): The index of the matching sentence for each sentence, -1 if there is none.
+
+    Keyword Arguments:
+        min_sentences (int): The minimal number of sentences of a passage. (default: {MIN_PASSAGE_SENTENCES})
+
+    Returns:
+        The passages, in the order of the program.
+    """
+    if not len(matches):
+        return []
+
+    # A passage continues when a sentence matches the sentence after the match of the previous sentence
+    continues = np.concatenate([[False], (matches[1:] == matches[:-1] + 1) & (matches[:-1] >= 0)])
+    starts = np.flatnonzero((matches >= 0) & ~continues)
+
+    # A passage ends at the next sentence that does not continue it
+    breaks = np.append(np.flatnonzero(~continues), len(matches))
+    lengths = breaks[np.searchsorted(breaks, starts, side="right")] - starts
+
+    return [
+        Passage(int(start), int(matches[start]), int(length))
+        for start, length in zip(starts, lengths)
+        if length >= min_sentences
+    ]
+
+
+def compare_fingerprints(
+    fingerprints: SentenceFingerprints,
+    source: SentenceFingerprints,
+    min_similarity: float | None = MIN_SIMILARITY,
+    min_passage: int = MIN_PASSAGE_SENTENCES,
+) -> ReuseReport:
+    """Find the sentences of a program that occur exactly or nearly in a source program.
+
+    Args:
+        fingerprints (SentenceFingerprints): The fingerprints of the program.
+        source (SentenceFingerprints): The fingerprints of the source program, for example the previous program.
+
+    Keyword Arguments:
+        min_similarity (float | None): The minimal estimated fraction of shared words of near-exact matches, None to
+            only find exact matches. (default: {MIN_SIMILARITY})
+        min_passage (int): The minimal number of sentences of an aligned passage. (default: {MIN_PASSAGE_SENTENCES})
+
+    Returns:
+        The report of the reused sentences.
+    """
+    eligible = fingerprints.hashes != 0
+    matches = _exact_matches(fingerprints.hashes, source.hashes)
+    exact = int(np.count_nonzero(matches >= 0))
+
+    if min_similarity is not None:
+        near_matches, _ = _near_matches(
+            fingerprints.signatures, eligible & (matches < 0), source.signatures, source.hashes != 0, min_similarity
+        )
+        matches = np.where(matches >= 0, matches, near_matches)
+
+    near = int(np.count_nonzero(matches >= 0)) - exact
+
+    return ReuseReport(int(np.count_nonzero(eligible)), exact, near, matches, aligned_passages(matches, min_passage))
+
+
+def attribute_sentences(
+    fingerprints: SentenceFingerprints,
+    sources: list[SentenceFingerprints],
+    min_similarity: float | None = MIN_SIMILARITY,
+) -> IntArray:
+    """Attribute each sentence of a program to the source it is taken from, for example the sentences of a joined
+    program to the programs of its member parties. A sentence that occurs exactly in a source is attributed to that
+    source, otherwise to the source with the most similar near-exact match, the first source when there is a tie.
+
+    Args:
+        fingerprints (SentenceFingerprints): The fingerprints of the program.
+        sources (list[SentenceFingerprints]): The fingerprints of the source programs.
+
+    Keyword Arguments:
+        min_similarity (float | None): The minimal estimated fraction of shared words of near-exact matches, None to
+            only find exact matches. (default: {MIN_SIMILARITY})
+
+    Returns:
+        The index of the source of each sentence, -1 if it is not taken from any source.
+    """
+    eligible = fingerprints.hashes != 0
+    attributed = np.full(len(fingerprints.hashes), -1, dtype=np.int64)
+    best = np.zeros(len(fingerprints.hashes), dtype=np.float64)
+
+    for i, source in enumerate(sources):
+        # An exact match has similarity 2, so it is preferred over any near-exact match
+        scores = np.where(_exact_matches(fingerprints.hashes, source.hashes) >= 0, 2.0, 0.0)
+
+        if min_similarity is not None:
+            near_matches, similarities = _near_matches(
+                fingerprints.signatures, eligible & (scores == 0), source.signatures, source.hashes != 0, min_similarity
+            )
+            scores = np.where(near_matches >= 0, similarities, scores)
+
+        better = eligible & (scores > best)
+        best[better] = scores[better]
+        attributed[better] = i
+
+    return attributed
@@ -0,0 +1,599 @@
+"""
+Long-running local analysis service that keeps the spacy model, the programs and their docs in memory.
+
+Importing process_data loads the spacy model and identifying the programs takes a while. The service does this
+once and then answers queries over HTTP on localhost, so analysis scripts and notebooks get answers without loading
+anything themselves. Several clients can query the service at the same time.
+
+Endpoints:
+  - GET /programs: The programs matching the filters, like get_programs().
+  - GET /metrics: The metrics of the programs matching the filters. Programs are processed on first use, their docs
+    are kept in memory for the next queries, up to --max-docs programs. Programs without a usable text layer, see
+    the preflight module, are reported with an error instead of metrics.
+  - POST /analyze: The metrics of an ad-hoc text, the body is json with a "text" and optionally "metrics" and "clean".
+  - GET /stats: The number of requests, cache hits, errors and the latency per endpoint, and the throughput.
+  - GET /health: Returns ok when the service is running, with the version of the snapshot of the corpus.
+  - POST /refresh: Identifies and processes the programs again in the background, to pick up new or changed pdf
+    files. Queries are answered from the current snapshot until the refresh completes.
+
+The filters are query parameters with the names of the filters of get_programs(): election_type, election_date,
+party, region, tag (can be repeated) and joined (true or false, both if omitted). The metrics are selected with
+metric (can be repeated), all metrics if omitted. Responses of GET /metrics and POST /analyze are cached per request,
+per snapshot of the corpus and per frequency table of the sophistication metrics, so a refresh or a rebuilt table does
+not return stale responses.
+
+How to use:
+
+    python -m src.service --port 8765
+
+    curl "http://127.0.0.1:8765/metrics?election_date=2023-11&party=VVD&metric=flesch_douma_index"
+    curl -X POST http://127.0.0.1:8765/analyze -d '{"text": "Dit is een zin. Dit is nog een zin."}'
+    curl http://127.0.0.1:8765/stats
+    curl -X POST http://127.0.0.1:8765/refresh
+
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+from src import metrics, preflight, sophistication, utils
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from spacy.tokens import Doc
+
+    from src.process_data import CorpusSnapshot, Program
+
+LATENCY_SAMPLES = 1000
+"""The number of most recent requests per endpoint of which the latency is kept for the statistics"""
+
+THROUGHPUT_SECONDS = 60.0
+"""The period over which the recent throughput is measured"""
+
+
+class ServiceError(Exception):
+    """An error in a request, reported to the client with an HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        """An error in a request
+
+        Arguments:
+            status (int): The HTTP status.
+            message (str): The message for the client.
+        """
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """A thread-safe cache of the most recently used responses.
+
+    Attributes:
+        size (int): The maximal number of responses in the cache.
+
+    """
+
+    def __init__(self, size: int):
+        """A thread-safe cache of the most recently used responses
+
+        Arguments:
+            size (int): The maximal number of responses in the cache, 0 to disable the cache.
+        """
+        self.size = size
+        self._responses: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached response for a key, or None if it is not cached."""
+        with self._lock:
+            if key not in self._responses:
+                return None
+
+            self._responses.move_to_end(key)
+            return self._responses[key]
+
+    def put(self, key: str, response: bytes) -> None:
+        """Cache the response for a key, removing the least recently used response when the cache is full."""
+        if not self.size:
+            return
+
+        with self._lock:
+            self._responses[key] = response
+            self._responses.move_to_end(key)
+
+            while len(self._responses) > self.size:
+                self._responses.popitem(last=False)
+
+
+class ServiceStats:
+    """Thread-safe statistics of the requests to the service."""
+
+    def __init__(self) -> None:
+        """Thread-safe statistics of the requests to the service."""
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._counts: defaultdict[str, int] = defaultdict(int)
+        self._errors: defaultdict[str, int] = defaultdict(int)
+        self._cache_hits: defaultdict[str, int] = defaultdict(int)
+        self._latencies: defaultdict[str, deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+        self._finished: deque[float] = deque()
+
+    def record(self, endpoint: str, seconds: float, error: bool = False, cached: bool = False) -> None:
+        """Record a request.
+
+        Arguments:
+            endpoint (str): The path of the endpoint.
+            seconds (float): The time it took to answer the request.
+
+        Keyword Arguments:
+            error (bool): True if the request failed. (default: {False})
+            cached (bool): True if the response was cached. (default: {False})
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            self._counts[endpoint] += 1
+            self._errors[endpoint] += error
+            self._cache_hits[endpoint] += cached
+            self._latencies[endpoint].append(seconds)
+
+            self._finished.append(now)
+            while self._finished and self._finished[0] < now - THROUGHPUT_SECONDS:
+                self._finished.popleft()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the statistics, with the latencies in milliseconds."""
+        with self._lock:
+            uptime = time.monotonic() - self.started
+            endpoints = {}
+
+            for endpoint, count in sorted(self._counts.items()):
+                latencies = sorted(self._latencies[endpoint])
+                endpoints[endpoint] = {
+                    "requests": count,
+                    "errors": self._errors[endpoint],
+                    "cache_hits": self._cache_hits[endpoint],
+                    "latency_ms": {
+                        "mean": statistics.fmean(latencies) * 1000,
+                        "p50": latencies[int(0.50 * (len(latencies) - 1))] * 1000,
+                        "p95": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+                        "p99": latencies[int(0.99 * (len(latencies) - 1))] * 1000,
+                        "max": latencies[-1] * 1000,
+                    },
+                }
+
+            return {
+                "uptime_seconds": uptime,
+                "requests": sum(self._counts.values()),
+                "requests_per_second": sum(self._counts.values()) / uptime if uptime else 0.0,
+                "recent_requests_per_second": len(self._finished) / min(uptime, THROUGHPUT_SECONDS) if uptime else 0.0,
+                "endpoints": endpoints,
+            }
+
+
+class AnalysisService:
+    """The state of the service: the spacy model, the programs with their docs and the caches.
+
+    Attributes:
+        responses (ResponseCache): The cache of the responses.
+        stats (ServiceStats): The statistics of the requests.
+        max_docs (int): The maximal number of programs of which the doc is kept in memory.
+
+    """
+
+    def __init__(self, cache_size: int = 256, max_docs: int = 32):
+        """The state of the service, loads the spacy model and identifies the programs.
+
+        Keyword Arguments:
+            cache_size (int): The maximal number of cached responses. (default: {256})
+            max_docs (int): The maximal number of programs of which the doc is kept in memory. (default: {32})
+        """
+        # Loads the model and identifies the programs once, which is why the service exists
+        from src import process_data  # pylint: disable=import-outside-toplevel
+
+        process_data.load_corpus(process_data.DISCOVERY_CACHE_PATH)
+        self._process_data = process_data
+        self.responses = ResponseCache(cache_size)
+        self.stats = ServiceStats()
+        self.max_docs = max_docs
+
+        # The model is not guaranteed to be thread-safe, one text is analyzed at a time
+        self._nlp_lock = threading.Lock()
+
+        # The programs of which the doc is in memory, least recently used first, and a lock per program so a program
+        # is processed only once when several clients ask for it at the same time
+        self._loaded: OrderedDict[str, "Program"] = OrderedDict()
+        self._loaded_lock = threading.Lock()
+        self._program_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+
+        # The metrics of the programs, by reference, hash of the pdf file and name of the metric, so a program of
+        # which the pdf file changed in a refresh is analyzed again
+        self._metrics: dict[tuple[str, str, str], float] = {}
+
+        # The frequency table the metrics were calculated with, the metrics that depend on it are calculated again
+        # when the table is rebuilt. The lock guards both the metrics and the table key
+        self._table_key = sophistication.table_key()
+        self._metrics_lock = threading.Lock()
+
+        # The refresh of the corpus that is running, if any
+        self._refresh: "Future[CorpusSnapshot] | None" = None
+        self._refresh_lock = threading.Lock()
+
+    @staticmethod
+    def describe(program: "Program") -> dict[str, Any]:
+        """Return the json description of a program."""
+        return {
+            "reference": program.reference("pdf"),
+            "election_type": program.election_type,
+            "election_date": program.election_date,
+            "region": program.region,
+            "party": str(program.party),
+            "joined": program.joined_issue,
+            "tags": program.tags,
+        }
+
+    @property
+    def version(self) -> int:
+        """The version of the current snapshot of the corpus."""
+        version: int = self._process_data.current_snapshot().version
+        return version
+
+    @property
+    def cache_version(self) -> str:
+        """The version of the cached responses: the version of the snapshot and of the frequency table."""
+        return f"{self.version}:{sophistication.table_key()}"
+
+    def _check_table(self) -> None:
+        """Forget the metrics that depend on the frequency table when the table has been rebuilt."""
+        key = sophistication.table_key()
+
+        with self._metrics_lock:
+            if key != self._table_key:
+                self._table_key = key
+                self._metrics = {k: v for k, v in self._metrics.items() if k[2] not in sophistication.TABLE_METRICS}
+
+    def select(self, query: dict[str, list[str]], snapshot: "CorpusSnapshot") -> list["Program"]:
+        """Select the programs matching the filters in the query.
+
+        Arguments:
+            query (dict[str, list[str]]): The query parameters.
+            snapshot (CorpusSnapshot): The snapshot of the corpus to select from.
+
+        Returns:
+            The matching programs.
+
+        Raises:
+            ServiceError: If a filter is invalid.
+        """
+        joined = query.get("joined", [None])[-1]
+        if joined not in (None, "true", "false"):
+            raise ServiceError(400, "joined must be true or false")
+
+        programs: list["Program"] = snapshot.select(
+            election_type=query.get("election_type", [None])[-1],
+            party=query.get("party", [None])[-1],
+            election_date=query.get("election_date", [None])[-1],
+            joined_issue=None if joined is None else joined == "true",
+            tags=query.get("tag"),
+            region=query.get("region", [None])[-1],
+        )
+
+        return programs
+
+    @staticmethod
+    def metric_names(names: list[str] | None) -> list[str]:
+        """Return the requested metrics, all metrics if None.
+
+        Raises:
+            ServiceError: If a metric is unknown.
+        """
+        names = names or list(metrics.PROGRAM_METRICS)
+        unknown = [name for name in names if name not in metrics.PROGRAM_METRICS]
+
+        if unknown:
+            raise ServiceError(400, f"Unknown metric(s): {', '.join(unknown)}")
+
+        return names
+
+    def _load(self, program: "Program") -> "Doc":
+        """Process a program if necessary and keep its doc in memory, releasing the least recently used program
+        when more than max_docs programs are loaded.
+
+        Arguments:
+            program (Program): The program.
+
+        Returns:
+            The spacy doc of the program, which stays valid when the program is released by another request.
+        """
+        reference = program.reference("pdf")
+
+        # The text is retrieved without holding the model, so other requests can be analyzed in the meantime
+        with self._program_locks[reference]:
+            program.retrieve_text_from_pdf()
+
+            with self._nlp_lock:
+                program.create_doc_from_text()
+
+            doc = program.doc
+            assert doc is not None
+
+        with self._loaded_lock:
+            self._loaded[reference] = program
+            self._loaded.move_to_end(reference)
+
+            while len(self._loaded) > self.max_docs:
+                _, released = self._loaded.popitem(last=False)
+                released.release()
+
+        return doc
+
+    def program_metrics(self, program: "Program", names: list[str]) -> dict[str, float]:
+        """Return the metrics of a program, calculating the metrics that have not been calculated before.
+
+        Arguments:
+            program (Program): The program.
+            names (list[str]): The names of the metrics.
+
+        Returns:
+            The value of each metric by the name of the metric.
+        """
+        self._check_table()
+
+        key = (program.reference("pdf"), program.source_hash)
+
+        with self._metrics_lock:
+            table_key = self._table_key
+            values = {name: self._metrics[(*key, name)] for name in names if (*key, name) in self._metrics}
+
+        missing = [name for name in names if name not in values]
+
+        if missing:
+            values.update(metrics.compute_metrics(self._load(program), missing))
+
+            # Metrics calculated while the table was rebuilt are returned, but not kept
+            with self._metrics_lock:
+                if table_key == self._table_key:
+                    self._metrics.update({(*key, name): values[name] for name in missing})
+
+        return {name: values[name] for name in names}
+
+    def program_result(self, program: "Program", names: list[str]) -> dict[str, Any]:
+        """Return the json description of a program with its metrics, or with an error if the program has no usable
+        text layer, so a scanned program does not fail the whole request.
+
+        Arguments:
+            program (Program): The program.
+            names (list[str]): The names of the metrics.
+
+        Returns:
+            The description of the program with its metrics or the error.
+        """
+        try:
+            return {**self.describe(program), "metrics": self.program_metrics(program, names)}
+        except preflight.NotExtractableError:
+            return {**self.describe(program), "error": "not extractable"}
+
+    def refresh(self) -> dict[str, Any]:
+        """Start a refresh of the corpus in the background, unless one is running. The docs of the refreshed
+        programs are not kept in memory, they are loaded on first use like before.
+
+        Returns:
+            Whether a refresh was started and the version of the current snapshot.
+        """
+        with self._refresh_lock:
+            started = self._refresh is None or self._refresh.done()
+            if started:
+                self._refresh = self._process_data.refresh_in_background(
+                    stream=True, discovery_cache=self._process_data.DISCOVERY_CACHE_PATH
+                )
+
+        return {"refreshing": True, "started": started, "version": self.version}
+
+    def health(self) -> dict[str, Any]:
+        """Return the status of the service and of the corpus."""
+        snapshot = self._process_data.current_snapshot()
+        refresh = self._refresh
+        error = refresh.exception() if refresh is not None and refresh.done() else None
+
+        return {
+            "status": "ok",
+            "version": snapshot.version,
+            "programs": len(snapshot.programs),
+            "refreshing": refresh is not None and not refresh.done(),
+            "refresh_error": None if error is None else repr(error),
+        }
+
+    def analyze(self, text: str, names: list[str], clean: bool = False) -> dict[str, Any]:
+        """Analyze an ad-hoc text.
+
+        Arguments:
+            text (str): The text.
+            names (list[str]): The names of the metrics.
+
+        Keyword Arguments:
+            clean (bool): Clean the text like the text of a program first. (default: {False})
+
+        Returns:
+            The number of sentences and tokens and the metrics of the text.
+        """
+        if clean:
+            text = self._process_data.clean_pdf_text(text)
+
+        with self._nlp_lock:
+            doc = self._process_data.nlp(text)
+
+        return {
+            "sentences": sum(1 for _ in doc.sents),
+            "tokens": len(doc),
+            "metrics": metrics.compute_metrics(doc, names),
+        }
+
+    def handle(self, method: str, path: str, query: dict[str, list[str]], body: bytes) -> tuple[Any, bool]:
+        """Answer a request.
+
+        Arguments:
+            method (str): The HTTP method.
+            path (str): The path of the endpoint.
+            query (dict[str, list[str]]): The query parameters.
+            body (bytes): The body of the request.
+
+        Returns:
+            The response and whether the response may be cached.
+
+        Raises:
+            ServiceError: If the request is invalid.
+        """
+        if (method, path) == ("GET", "/health"):
+            return self.health(), False
+
+        if (method, path) == ("POST", "/refresh"):
+            return self.refresh(), False
+
+        # The programs are selected from a single snapshot, a refresh that completes meanwhile does not mix snapshots
+        snapshot = self._process_data.current_snapshot()
+
+        if (method, path) == ("GET", "/stats"):
+            return self.stats.snapshot(), False
+
+        if (method, path) == ("GET", "/programs"):
+            return [self.describe(p) for p in self.select(query, snapshot)], True
+
+        if (method, path) == ("GET", "/metrics"):
+            names = self.metric_names(query.get("metric"))
+            return [self.program_result(p, names) for p in self.select(query, snapshot)], True
+
+        if (method, path) == ("POST", "/analyze"):
+            try:
+                request = json.loads(body)
+                text = request["text"]
+            except (ValueError, TypeError, KeyError) as exception:
+                raise ServiceError(400, 'The body must be json with a "text"') from exception
+
+            if not isinstance(text, str):
+                raise ServiceError(400, "text must be a string")
+
+            return self.analyze(text, self.metric_names(request.get("metrics")), bool(request.get("clean"))), True
+
+        raise ServiceError(404, f"Unknown endpoint: {method} {path}")
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    """HTTP server that answers each request in its own thread with the analysis service."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: AnalysisService):
+        """HTTP server that answers each request in its own thread with the analysis service
+
+        Arguments:
+            address (tuple[str, int]): The host and port to listen on.
+            service (AnalysisService): The analysis service.
+        """
+        super().__init__(address, AnalysisRequestHandler)
+        self.service = service
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """Handler of the requests to the analysis service."""
+
+    server: AnalysisServer
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Answer a GET request."""
+        self._respond("GET")
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Answer a POST request."""
+        self._respond("POST")
+
+    def _respond(self, method: str) -> None:
+        """Answer a request, from the cache when possible, and record it in the statistics.
+
+        Arguments:
+            method (str): The HTTP method.
+        """
+        start = time.perf_counter()
+        service = self.server.service
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        # The query parameters are sorted, so the order in which a client sends them does not matter, and responses
+        # of an earlier snapshot of the corpus or an earlier frequency table are not reused
+        key = (
+            f"{service.cache_version} {method} {url.path} {sorted((k, sorted(v)) for k, v in query.items())} "
+            f"{utils.sha256(body)}"
+        )
+
+        status, cached = 200, False
+        response = service.responses.get(key)
+
+        if response is not None:
+            cached = True
+        else:
+            try:
+                result, cacheable = service.handle(method, url.path, query, body)
+                response = json.dumps(result).encode("utf-8")
+                if cacheable:
+                    service.responses.put(key, response)
+            except ServiceError as exception:
+                status, response = exception.status, json.dumps({"error": str(exception)}).encode("utf-8")
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                status, response = 500, json.dumps({"error": repr(exception)}).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+        # Requests to unknown endpoints are counted together, so arbitrary paths do not grow the statistics
+        endpoint = "unknown" if status == 404 else url.path
+        service.stats.record(endpoint, time.perf_counter() - start, error=status >= 400, cached=cached)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        """Do not log every request to the console, the statistics are available at /stats."""
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the analysis service until it is interrupted.
+
+    Args:
+        argv (list[str] | None): The arguments, the arguments of the process if None. (default: {None})
+
+    Returns:
+        The exit status.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.service", description="Run the local analysis service.")
+    parser.add_argument("--host", default="127.0.0.1", help="The host to listen on. (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="The port to listen on. (default: 8765)")
+    parser.add_argument("--cache-size", type=int, default=256, help="The number of cached responses. (default: 256)")
+    parser.add_argument("--max-docs", type=int, default=32, help="The number of programs kept in memory. (default: 32)")
+    args = parser.parse_args(argv)
+
+    print("Loading the model and the programs")
+    service = AnalysisService(cache_size=args.cache_size, max_docs=args.max_docs)
+
+    with AnalysisServer((args.host, args.port), service) as server:
+        print(f"Serving on http://{args.host}:{server.server_port}")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
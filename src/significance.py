@@ -0,0 +1,330 @@
+"""
+This module contains significance tests for the differences in readability between programs.
+
+The readability statistics are ratios of sums over the sentences of a program, for example the average sentence
+length is the number of tokens divided by the number of sentences. Therefore, the statistic of any selection of
+sentences can be calculated from the counts of each sentence, see readability.sentence_arrays().
+
+Two tests are done for every pair of programs:
+  - A permutation test: the sentences of both programs are pooled and randomly split in two groups with the sizes of
+    the programs. The p-value is the fraction of the splits with a difference at least as large as the observed one.
+  - A bootstrap: the sentences of each program are resampled with replacement, which gives a confidence interval of
+    the difference.
+
+All resamples are drawn at once with numpy, in chunks of at most CHUNK_ELEMENTS sentences to bound the memory use.
+The cost grows with the number of resamples times the number of sentences, a comparison of programs of 6000 and 8000
+sentences with 2000 resamples takes about 0.6 seconds, see test_comparison_cost in tests/test_significance.py.
+Every comparison starts from the same seed, so the results are reproducible and the result of a pair does not depend
+on the other programs in the selection.
+
+How to use:
+
+    programs = get_programs(election_date="2017-03")
+
+    for comparison in compare_programs(programs, resamples=2000, seed=0):
+        print(comparison)
+
+"""
+
+from dataclasses import dataclass
+from itertools import combinations
+from typing import TYPE_CHECKING, Callable, Iterator, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+
+from src import readability
+
+if TYPE_CHECKING:
+    from src.process_data import Program
+
+FloatArray: TypeAlias = npt.NDArray[np.float64]
+
+DEFAULT_RESAMPLES = 2000
+"""The number of permutations and bootstrap resamples of a comparison"""
+
+CHUNK_ELEMENTS = 2**18
+"""The maximal number of sentences drawn at once, the resamples are drawn in chunks of this size"""
+
+_SENTENCES, _TOKENS, _WORDS, _SYLLABLES = range(4)
+"""The columns of the sums of a selection of sentences"""
+
+
+def _average_sentence_length(sums: FloatArray) -> FloatArray:
+    """Calculate the average sentence length from the sums of selections of sentences."""
+    result: FloatArray = sums[..., _TOKENS] / sums[..., _SENTENCES]
+    return result
+
+
+def _average_syllables_per_word(sums: FloatArray) -> FloatArray:
+    """Calculate the average number of syllables per word from the sums of selections of sentences."""
+    result: FloatArray = sums[..., _SYLLABLES] / sums[..., _WORDS]
+    return result
+
+
+def _flesch_douma_index(sums: FloatArray) -> FloatArray:
+    """Calculate the Flesch-Douma index from the sums of selections of sentences."""
+    result: FloatArray = readability.flesch_douma_formula(
+        _average_sentence_length(sums), _average_syllables_per_word(sums)
+    )
+    return result
+
+
+STATISTICS: dict[str, Callable[[FloatArray], FloatArray]] = {
+    "flesch_douma_index": _flesch_douma_index,
+    "average_sentence_length": _average_sentence_length,
+    "average_syllables_per_word": _average_syllables_per_word,
+}
+"""Reference to the statistics that can be tested, by the name of the function in the readability module. Each
+function calculates the statistic from the sums of the counts of selections of sentences, along the last axis."""
+
+
+@dataclass(slots=True)
+class Comparison:
+    """A data class to represent the comparison of a statistic between two programs."""
+
+    first: str
+    second: str
+    statistic: str
+    first_value: float
+    second_value: float
+    difference: float
+    """The value of the first program minus the value of the second program"""
+    p_value: float
+    """The two-sided p-value of the permutation test"""
+    ci_low: float
+    """The lower bound of the bootstrap confidence interval of the difference"""
+    ci_high: float
+    """The upper bound of the bootstrap confidence interval of the difference"""
+
+
+def sentence_matrix(arrays: readability.SentenceArrays) -> FloatArray:
+    """Combine the counts of the sentences of a program in a matrix, one row per sentence. The columns are the
+    sentence itself (always 1), the tokens, the words and the syllables, so the sum of rows is the sums of a
+    selection of sentences.
+
+    Args:
+        arrays (readability.SentenceArrays): The counts of the sentences.
+
+    Returns:
+        The matrix of shape (sentences, 4).
+    """
+    matrix: FloatArray = np.column_stack(
+        [np.ones(len(arrays.tokens)), arrays.tokens, arrays.words, arrays.syllables]
+    ).astype(np.float64)
+    return matrix
+
+
+def _chunks(resamples: int, width: int) -> Iterator[int]:
+    """Split a number of resamples in chunks of at most CHUNK_ELEMENTS sentences.
+
+    Args:
+        resamples (int): The number of resamples.
+        width (int): The number of sentences per resample.
+
+    Yields:
+        The number of resamples of each chunk.
+    """
+    size = max(1, CHUNK_ELEMENTS // max(width, 1))
+
+    for start in range(0, resamples, size):
+        yield min(size, resamples - start)
+
+
+def permutation_sums(
+    first: FloatArray, second: FloatArray, resamples: int, rng: np.random.Generator
+) -> tuple[FloatArray, FloatArray]:
+    """Randomly split the pooled sentences of two programs in two groups with the sizes of the programs.
+
+    Args:
+        first (np.ndarray): The sentence matrix of the first program.
+        second (np.ndarray): The sentence matrix of the second program.
+        resamples (int): The number of splits.
+        rng (np.random.Generator): The random generator.
+
+    Returns:
+        The sums of the first and the second group of every split, each of shape (resamples, 4).
+    """
+    pooled = np.concatenate([first, second])
+    size = len(first)
+    total = pooled.sum(axis=0)
+
+    # Only the smaller group is drawn, the other group is the rest of the sentences
+    drawn = min(size, len(pooled) - size)
+    columns = np.ascontiguousarray(pooled.T)
+    sums = []
+
+    for chunk in _chunks(resamples, drawn):
+        # A group is drawn without replacement with a partial shuffle, which does random work for the drawn sentences
+        # only, unlike sorting or partitioning a random key for every sentence. It selects exactly drawn sentences.
+        indices = np.stack([rng.choice(len(pooled), drawn, replace=False, shuffle=False) for _ in range(chunk)])
+
+        # A single gather of the count columns, stored as rows, is faster than gathering the rows of the matrix
+        chunk_sums = np.empty((chunk, pooled.shape[1]))
+        chunk_sums[:, _SENTENCES] = drawn
+        chunk_sums[:, _TOKENS:] = columns[_TOKENS:].take(indices, axis=1).sum(axis=2).T
+
+        sums.append(chunk_sums)
+
+    drawn_sums: FloatArray = np.concatenate(sums)
+    first_sums: FloatArray = drawn_sums if drawn == size else total - drawn_sums
+    return first_sums, total - first_sums
+
+
+def bootstrap_sums(matrix: FloatArray, resamples: int, rng: np.random.Generator) -> FloatArray:
+    """Resample the sentences of a program with replacement.
+
+    Args:
+        matrix (np.ndarray): The sentence matrix of the program.
+        resamples (int): The number of resamples.
+        rng (np.random.Generator): The random generator.
+
+    Returns:
+        The sums of every resample, of shape (resamples, 4).
+    """
+    columns = np.ascontiguousarray(matrix.T)
+    sums = []
+
+    for chunk in _chunks(resamples, len(matrix)):
+        indices = rng.integers(0, len(matrix), (chunk, len(matrix)))
+
+        # A single gather of the count columns, stored as rows, is faster than gathering the rows of the matrix
+        chunk_sums = np.empty((chunk, matrix.shape[1]))
+        chunk_sums[:, _SENTENCES] = len(matrix)
+        chunk_sums[:, _TOKENS:] = columns[_TOKENS:].take(indices, axis=1).sum(axis=2).T
+
+        sums.append(chunk_sums)
+
+    resampled: FloatArray = np.concatenate(sums)
+    return resampled
+
+
+def compare_sentences(
+    first: readability.SentenceArrays,
+    second: readability.SentenceArrays,
+    *,
+    labels: tuple[str, str] = ("first", "second"),
+    statistics: list[str] | None = None,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> list[Comparison]:
+    """Compare the statistics of the sentences of two programs with a permutation test and a bootstrap.
+
+    Args:
+        first (readability.SentenceArrays): The counts of the sentences of the first program.
+        second (readability.SentenceArrays): The counts of the sentences of the second program.
+
+    Keyword Arguments:
+        labels (tuple[str, str]): The names of the programs in the comparisons. (default: {("first", "second")})
+        statistics (list[str] | None): The names of the statistics, all statistics if None. (default: {None})
+        resamples (int): The number of permutations and bootstrap resamples. (default: {DEFAULT_RESAMPLES})
+        confidence (float): The confidence level of the interval. (default: {0.95})
+        seed (int): The seed of the random generator. (default: {0})
+
+    Returns:
+        The comparison of each statistic.
+
+    Raises:
+        AssertionError: If resamples is not positive or confidence is not between 0 and 1.
+        KeyError: If a statistic is unknown.
+        ValueError: If a program has no sentences.
+    """
+    assert resamples > 0, "Resamples must be positive."
+    assert 0 < confidence < 1, "Confidence must be between 0 and 1."
+
+    names = list(STATISTICS) if statistics is None else statistics
+    functions = [STATISTICS[name] for name in names]
+
+    first_matrix, second_matrix = sentence_matrix(first), sentence_matrix(second)
+    if not len(first_matrix) or not len(second_matrix):
+        raise ValueError(f"Cannot compare {labels[0]} and {labels[1]}, a program has no sentences.")
+
+    rng = np.random.default_rng(seed)
+    permuted_first, permuted_second = permutation_sums(first_matrix, second_matrix, resamples, rng)
+    bootstrap_first = bootstrap_sums(first_matrix, resamples, rng)
+    bootstrap_second = bootstrap_sums(second_matrix, resamples, rng)
+
+    comparisons = []
+    tail = (1 - confidence) / 2 * 100
+
+    # A resample without words has no syllables per word, it is ignored
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, function in zip(names, functions):
+            first_value = float(function(first_matrix.sum(axis=0)))
+            second_value = float(function(second_matrix.sum(axis=0)))
+            difference = first_value - second_value
+
+            # The relative tolerance prevents rounding errors from hiding splits that equal the observed difference
+            permuted = np.abs(function(permuted_first) - function(permuted_second))
+            extreme = np.count_nonzero(permuted >= abs(difference) * (1 - 1e-9))
+
+            interval: FloatArray = np.nanpercentile(
+                function(bootstrap_first) - function(bootstrap_second), [tail, 100 - tail]
+            )
+
+            comparisons.append(
+                Comparison(
+                    labels[0],
+                    labels[1],
+                    name,
+                    first_value,
+                    second_value,
+                    difference,
+                    (extreme + 1) / (resamples + 1),
+                    float(interval[0]),
+                    float(interval[1]),
+                )
+            )
+
+    return comparisons
+
+
+def compare_programs(
+    programs: list["Program"],
+    statistics: list[str] | None = None,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> list[Comparison]:
+    """Compare the statistics of every pair of programs, for example programs selected with get_programs().
+
+    Args:
+        programs (list[Program]): The processed programs, at least two.
+
+    Keyword Arguments:
+        statistics (list[str] | None): The names of the statistics, all statistics if None. (default: {None})
+        resamples (int): The number of permutations and bootstrap resamples. (default: {DEFAULT_RESAMPLES})
+        confidence (float): The confidence level of the interval. (default: {0.95})
+        seed (int): The seed of the random generator of every comparison. (default: {0})
+
+    Returns:
+        The comparison of each statistic for each pair of programs.
+
+    Raises:
+        ValueError: If fewer than two programs are given or a program has not been processed.
+    """
+    if len(programs) < 2:
+        raise ValueError("At least two programs are necessary for a comparison.")
+
+    arrays = []
+    for program in programs:
+        if program.doc is None:
+            raise ValueError(f"Program {program} has not been processed.")
+        arrays.append(readability.sentence_arrays(program.doc))
+
+    comparisons = []
+    for (first, first_arrays), (second, second_arrays) in combinations(zip(programs, arrays), 2):
+        comparisons.extend(
+            compare_sentences(
+                first_arrays,
+                second_arrays,
+                labels=(str(first), str(second)),
+                statistics=statistics,
+                resamples=resamples,
+                confidence=confidence,
+                seed=seed,
+            )
+        )
+
+    return comparisons
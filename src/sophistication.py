@@ -0,0 +1,308 @@
+"""
+This module contains the lexical sophistication of a text: how rare its words are. The Flesch-Douma index only looks
+at the length of the words and sentences, while programs differ a lot in how much jargon they use.
+
+The rarity of a word is the relative frequency of its lemma in a reference corpus, by default the whole corpus of
+programs. The lemmas are lowercased, so a word at the start of a sentence and a word from a word list, which is
+lowercased as well, have the same lemma. The frequencies are stored once in a table, see build_table(), as two aligned
+arrays: the sorted hashes of the lowercase lemmas and the log10 of their relative frequency. Scoring a text is a
+single lookup of the lemma hashes of its words in the sorted hashes with numpy, lemmas that are not in the table get
+the frequency of a lemma that occurs once.
+
+Only content words count, the alphabetic tokens that are not stop words, since every text uses the same function
+words. Two metrics are reported:
+  - lexical_sophistication: The mean negative log10 relative frequency of the lemmas, higher is rarer.
+  - rare_word_ratio: The fraction of the lemmas with a relative frequency below RARE_FREQUENCY.
+
+Both metrics are NaN when the table has not been built yet, or was built in an older format. The table is built
+from the processed programs with `python -m src.cli frequencies`, or from a word list with the count of each word.
+
+How to use:
+
+    table = build_table(lemma_counts(program.doc) for program in get_programs())
+    write_table(table)
+
+    lexical_sophistication(program.doc)
+
+"""
+
+import io
+import math
+import os
+from typing import Iterable, NamedTuple, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+from spacy.attrs import IS_ALPHA, IS_STOP, LEMMA
+from spacy.strings import StringStore
+from spacy.tokens import Doc
+
+from src import keyness, storage
+
+IdArray: TypeAlias = npt.NDArray[np.uint64]
+FloatArray: TypeAlias = npt.NDArray[np.float64]
+
+RARE_FREQUENCY = 1e-5
+"""The relative frequency below which a lemma is considered rare, 10 times per million words"""
+
+TABLE_VERSION = 2
+"""The version of the format of the frequency table, a table of another version is ignored until it is rebuilt"""
+
+TABLE_METRICS = ("lexical_sophistication", "rare_word_ratio")
+"""The names of the metrics that depend on the frequency table, see metrics.PROGRAM_METRICS"""
+
+TABLE_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "processed", "lemmas.npz")
+"""The default path of the frequency table"""
+
+_tables: dict[tuple[str, int], "FrequencyTable | None"] = {}
+"""Memo of the loaded tables, keyed by the path and the modification time of the file"""
+
+
+class FrequencyTable(NamedTuple):
+    """The relative frequency of each lemma in a reference corpus. The arrays are aligned and sorted by id."""
+
+    ids: IdArray
+    """The hash of each lemma"""
+
+    log_frequencies: FloatArray
+    """The log10 of the relative frequency of each lemma"""
+
+    floor: float
+    """The log10 of the relative frequency of a lemma that occurs once, for the lemmas that are not in the table"""
+
+
+def lowercase_lemmas(doc: Doc, lemmas: IdArray) -> IdArray:
+    """
+    Replaces the lemma hashes of tokens by the hashes of the lowercase lemmas. Each distinct lemma is lowercased once.
+
+    Args:
+        doc {Doc} -- The spacy doc of the tokens.
+        lemmas {np.ndarray} -- The lemma hash of each token.
+
+    Returns:
+        np.ndarray: The hash of the lowercase lemma of each token.
+    """
+
+    ids, inverse = np.unique(lemmas, return_inverse=True)
+    strings = doc.vocab.strings
+    lowered = np.array([strings.as_int(strings[int(i)].lower()) for i in ids], dtype=np.uint64)
+
+    result: IdArray = lowered[inverse]
+    return result
+
+
+def lemma_counts(doc: Doc) -> keyness.TermCounts:
+    """
+    Counts the lowercase lemmas of a text.
+
+    Args:
+        doc {Doc} -- The spacy doc of the text.
+
+    Returns:
+        TermCounts: The number of times each lowercase lemma occurs, the words are the alphabetic tokens.
+    """
+
+    values = doc.to_array([LEMMA, IS_ALPHA])
+    lemmas = values[values[:, 1] == 1, 0].astype(np.uint64)
+
+    ids, first, counts = np.unique(lowercase_lemmas(doc, lemmas), return_index=True, return_counts=True)
+    words = np.array([doc.vocab.strings[int(lemmas[i])].lower() for i in first], dtype=np.str_)
+
+    return keyness.TermCounts(ids, counts.astype(np.int64), words)
+
+
+def word_list_counts(path: str) -> keyness.TermCounts:
+    """Read the counts of a word list, for example a list of Dutch word frequencies. Each line holds a word and its
+    count, separated by whitespace. The words are lowercased and are used as lemmas.
+
+    Args:
+        path (str): The path of the word list.
+
+    Returns:
+        The number of times each word occurs.
+
+    Raises:
+        ValueError: If a line does not hold a word and a count.
+    """
+    counts: dict[str, int] = {}
+
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+
+            try:
+                word, count = line.split()
+                counts[word.lower()] = counts.get(word.lower(), 0) + int(count)
+            except ValueError as exception:
+                raise ValueError(f"Line {number} of {path} does not hold a word and a count.") from exception
+
+    # The hashes are the same as the hashes spacy stores for the lemmas, the words are not added to the store
+    strings = StringStore()
+    words = np.array(list(counts), dtype=np.str_)
+    ids = np.array([strings.as_int(word) for word in counts], dtype=np.uint64)
+    order = np.argsort(ids)
+
+    return keyness.TermCounts(ids[order], np.array(list(counts.values()), dtype=np.int64)[order], words[order])
+
+
+def build_table(counts: Iterable[keyness.TermCounts]) -> FrequencyTable:
+    """Build the frequency table from the lemma counts of the texts of a reference corpus.
+
+    Args:
+        counts (Iterable[TermCounts]): The lemma counts of each text, see lemma_counts().
+
+    Returns:
+        The frequency table.
+
+    Raises:
+        ValueError: If the texts have no words.
+    """
+    merged = keyness.merge_counts(counts)
+    if not merged.total:
+        raise ValueError("Cannot build a frequency table, the texts have no words.")
+
+    total = merged.total
+    log_frequencies = np.log10(merged.counts / total)
+
+    return FrequencyTable(merged.ids, log_frequencies, math.log10(1 / total))
+
+
+def table_to_bytes(table: FrequencyTable) -> bytes:
+    """Serialize a frequency table as an uncompressed numpy archive."""
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        ids=table.ids,
+        log_frequencies=table.log_frequencies,
+        floor=np.float64(table.floor),
+        version=np.int64(TABLE_VERSION),
+    )
+    return buffer.getvalue()
+
+
+def table_from_bytes(data: bytes) -> FrequencyTable | None:
+    """Deserialize a frequency table serialized with table_to_bytes(), None if the table has another version."""
+    with np.load(io.BytesIO(data)) as archive:
+        if "version" not in archive or int(archive["version"]) != TABLE_VERSION:
+            return None
+
+        return FrequencyTable(archive["ids"], archive["log_frequencies"], float(archive["floor"]))
+
+
+def write_table(table: FrequencyTable, path: str | None = None) -> None:
+    """Write a frequency table as an artifact, see storage.write_artifact().
+
+    Args:
+        table (FrequencyTable): The frequency table.
+
+    Keyword Arguments:
+        path (str | None): The path of the table, TABLE_PATH if None. (default: {None})
+    """
+    path = path or TABLE_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    storage.write_artifact(path, table_to_bytes(table))
+
+
+def table_key(path: str | None = None) -> tuple[str, int] | None:
+    """Return the path and modification time of a frequency table, which change when the table is rebuilt.
+
+    Keyword Arguments:
+        path (str | None): The path of the table, TABLE_PATH if None. (default: {None})
+
+    Returns:
+        The path and modification time, or None if the table does not exist.
+    """
+    path = path or TABLE_PATH
+
+    try:
+        return os.path.realpath(path), os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_table(path: str | None = None) -> FrequencyTable | None:
+    """Load a frequency table. The table is read once and kept in memory until the file changes.
+
+    Keyword Arguments:
+        path (str | None): The path of the table, TABLE_PATH if None. (default: {None})
+
+    Returns:
+        The frequency table, or None if it does not exist, is corrupt or has another version.
+    """
+    path = path or TABLE_PATH
+
+    key = table_key(path)
+    if key is None:
+        return None
+
+    # An outdated table is dropped, so only the current table is kept in memory
+    if key not in _tables:
+        data = storage.read_artifact(path)
+        _tables.clear()
+        _tables[key] = None if data is None else table_from_bytes(data)
+
+    return _tables[key]
+
+
+def content_log_frequencies(doc: Doc, table: FrequencyTable) -> FloatArray:
+    """
+    Looks up the log10 relative frequency of the lowercase lemma of each content word of a text.
+
+    Args:
+        doc {Doc} -- The spacy doc of the text.
+        table {FrequencyTable} -- The frequency table.
+
+    Returns:
+        np.ndarray: The log10 relative frequency of each content word, the floor of the table for unknown lemmas.
+    """
+
+    values = doc.to_array([LEMMA, IS_ALPHA, IS_STOP])
+    lemmas = lowercase_lemmas(doc, values[(values[:, 1] == 1) & (values[:, 2] == 0), 0].astype(np.uint64))
+
+    if not len(table.ids):
+        return np.full(len(lemmas), table.floor)
+
+    positions = np.minimum(np.searchsorted(table.ids, lemmas), len(table.ids) - 1)
+    found = table.ids[positions] == lemmas
+
+    log_frequencies: FloatArray = np.where(found, table.log_frequencies[positions], table.floor)
+    return log_frequencies
+
+
+def lexical_sophistication(doc: Doc) -> float:
+    """
+    Calculates the mean negative log10 relative frequency of the lemmas of the content words of a text.
+
+    Args:
+        doc {Doc} -- The spacy doc for which the sophistication should be calculated.
+
+    Returns:
+        float: The sophistication, higher for rarer words, NaN if there is no frequency table or no content words.
+    """
+
+    table = load_table()
+    if table is None:
+        return math.nan
+
+    log_frequencies = content_log_frequencies(doc, table)
+    return -float(log_frequencies.mean()) if len(log_frequencies) else math.nan
+
+
+def rare_word_ratio(doc: Doc) -> float:
+    """
+    Calculates the fraction of the content words of a text of which the lemma is rare, see RARE_FREQUENCY.
+
+    Args:
+        doc {Doc} -- The spacy doc for which the ratio should be calculated.
+
+    Returns:
+        float: The ratio, NaN if there is no frequency table or no content words.
+    """
+
+    table = load_table()
+    if table is None:
+        return math.nan
+
+    log_frequencies = content_log_frequencies(doc, table)
+    return float((log_frequencies < math.log10(RARE_FREQUENCY)).mean()) if len(log_frequencies) else math.nan
@@ -0,0 +1,288 @@
+"""
+This module contains the cache of the intermediate results of the processing stages.
+
+Processing a program consists of stages, for example extracting the raw text from the pdf, removing the slogans,
+cleaning the text and creating the spacy doc. The output of every stage is stored as a separate layer in the cache.
+Each layer is keyed by the hash of the input of the stage and the fingerprint of the stage. The fingerprint covers
+the code, configuration and model that produce the output, so changing one stage recomputes that stage and, because
+its output changes, the stages after it. The stages before it are loaded from the cache.
+
+The hash of the output of a layer is stored in the metadata of the artifact, see the storage module. Therefore, the
+keys of all layers can be determined without reading the intermediate layers, and only the last layer is read.
+
+How to use:
+
+    raw = Stage("raw", fingerprint(extract_pages), "json")
+    clean = Stage("clean", fingerprint(clean_text), "txt")
+
+    cache = StageCache(directory)
+    text = cache.run_chain([(raw, extract), (clean, clean_text)], input_hash=pdf_hash)
+
+"""
+
+import hashlib
+import inspect
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+from src import storage
+
+
+@dataclass(frozen=True, slots=True)
+class Stage:
+    """A data class to represent a processing stage.
+
+    Attributes:
+        name (str): The name of the stage, also the name of the folder of the layer.
+        fingerprint (str): The fingerprint of the code, configuration and model that produce the output of the stage.
+        extension (str): The extension of the files in the layer.
+
+    """
+
+    name: str
+    fingerprint: str
+    extension: str
+
+
+class ChainResult(NamedTuple):
+    """The result of running a chain of stages."""
+
+    data: bytes
+    """The output of the last stage"""
+
+    input_hash: str
+    """The hash of the input of the last stage, which locates its output in the cache"""
+
+    output_hash: str
+    """The hash of the output of the last stage"""
+
+
+def fingerprint(*parts: object) -> str:
+    """Create a fingerprint of the parts that determine the output of a stage. Functions are fingerprinted by their
+    source code, compiled regex patterns by their pattern and flags, and other objects by their representation.
+
+    Args:
+        *parts (object): The functions, patterns, versions and settings that determine the output of a stage.
+
+    Returns:
+        str: The fingerprint.
+    """
+    digest = hashlib.sha256()
+
+    for part in parts:
+        if inspect.isfunction(part) or inspect.ismethod(part):
+            try:
+                representation = inspect.getsource(part)
+            except OSError:
+                # The source is not available, for example in a frozen application, fall back to the bytecode
+                representation = f"{part.__qualname__}:{part.__code__.co_code.hex()}"
+        elif isinstance(part, re.Pattern):
+            representation = f"{part.pattern!r}/{part.flags}"
+        else:
+            representation = repr(part)
+
+        digest.update(representation.encode("utf-8"))
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+class StageCache:
+    """The cache of the layers of the processing stages.
+
+    Attributes:
+        directory (str): The folder in which the layers are stored, one subfolder per stage.
+
+    """
+
+    def __init__(self, directory: str):
+        """The cache of the layers of the processing stages
+
+        Arguments:
+            directory (str): The folder in which the layers are stored, created if it does not exist.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(stage: Stage, input_hash: str) -> str:
+        """Return the key of the output of a stage for an input.
+
+        Arguments:
+            stage (Stage): The stage.
+            input_hash (str): The hash of the input of the stage.
+
+        Returns:
+            The key of the output.
+        """
+        return hashlib.sha256(f"{stage.name}\0{stage.fingerprint}\0{input_hash}".encode("utf-8")).hexdigest()
+
+    def path(self, stage: Stage, input_hash: str) -> str:
+        """Return the path to the output of a stage for an input. The layers are split in subfolders by the first
+        characters of the key, to keep the folders small.
+
+        Arguments:
+            stage (Stage): The stage.
+            input_hash (str): The hash of the input of the stage.
+
+        Returns:
+            The path to the output.
+        """
+        key = self.key(stage, input_hash)
+        return os.path.join(self.directory, stage.name, key[:2], f"{key}.{stage.extension}")
+
+    def output_hash(self, stage: Stage, input_hash: str) -> str | None:
+        """Return the hash of the output of a stage for an input, without reading the output.
+
+        Arguments:
+            stage (Stage): The stage.
+            input_hash (str): The hash of the input of the stage.
+
+        Returns:
+            The sha256 hash of the output, or None if the output is not cached.
+        """
+        path = self.path(stage, input_hash)
+        metadata: storage.ArtifactMetadata | None = storage.read_metadata(path)
+
+        if metadata is None or not storage.has_artifact(path):
+            return None
+
+        return str(metadata["sha256"])
+
+    def load(self, stage: Stage, input_hash: str) -> bytes | None:
+        """Load the output of a stage for an input.
+
+        Arguments:
+            stage (Stage): The stage.
+            input_hash (str): The hash of the input of the stage.
+
+        Returns:
+            The output, or None if the output is not cached or corrupt.
+        """
+        data: bytes | None = storage.read_artifact(self.path(stage, input_hash))
+        return data
+
+    def store(self, stage: Stage, input_hash: str, output: bytes) -> str:
+        """Store the output of a stage for an input.
+
+        Arguments:
+            stage (Stage): The stage.
+            input_hash (str): The hash of the input of the stage.
+            output (bytes): The output of the stage.
+
+        Returns:
+            The sha256 hash of the output, which is the input hash of the next stage.
+        """
+        path = self.path(stage, input_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        return str(storage.write_artifact(path, output)["sha256"])
+
+    def chain_hashes(self, stages: list[Stage], input_hash: str) -> list[str | None]:
+        """Follow a chain of stages through the metadata of the cached layers.
+
+        Arguments:
+            stages (list[Stage]): The stages, in processing order.
+            input_hash (str): The hash of the input of the first stage.
+
+        Returns:
+            The hash of the output of each stage, None for the stages whose output is not cached for the
+            current input.
+        """
+        hashes: list[str | None] = []
+        current: str | None = input_hash
+
+        for stage in stages:
+            current = None if current is None else self.output_hash(stage, current)
+            hashes.append(current)
+
+        return hashes
+
+    def run_chain(
+        self,
+        stages: list[tuple[Stage, Callable[[bytes], bytes]]],
+        input_hash: str,
+        source: bytes = b"",
+        refresh: bool = False,
+    ) -> ChainResult:
+        """Run a chain of stages, loading the output of the last cached stage and computing only the stages after it.
+
+        Arguments:
+            stages (list[tuple[Stage, Callable[[bytes], bytes]]]): The stages and the functions that compute the
+                output of each stage from its input, in processing order.
+            input_hash (str): The hash of the input of the first stage.
+
+        Keyword Arguments:
+            source (bytes): The input of the first stage, when its function does not read the input itself.
+                (default: {b""})
+            refresh (bool): Compute all stages, even when their output is cached. (default: {False})
+
+        Returns:
+            The output of the last stage, the hash of its input and the hash of its output.
+
+        Raises:
+            AssertionError: If no stages are given.
+        """
+        assert stages, "At least one stage is necessary."
+
+        # The input hash of every stage, the last item is the output hash of the last stage
+        hashes = self.chain_hashes([stage for stage, _ in stages], input_hash)
+        inputs: list[str | None] = [input_hash, *hashes]
+
+        # Find the last stage of which the output can be loaded
+        start, data = 0, source
+        for i in range(len(stages) - 1 if not refresh else -1, -1, -1):
+            stage_input = inputs[i]
+            if stage_input is None or hashes[i] is None:
+                continue
+
+            loaded = self.load(stages[i][0], stage_input)
+            if loaded is not None:
+                start, data = i + 1, loaded
+                break
+
+        # Compute the remaining stages and store their output, the output hash is the input hash of the next stage
+        for i in range(start, len(stages)):
+            stage, compute = stages[i]
+            stage_input = inputs[i]
+            assert stage_input is not None
+
+            data = compute(data)
+            inputs[i + 1] = self.store(stage, stage_input, data)
+
+        last_input, output = inputs[-2], inputs[-1]
+        assert last_input is not None and output is not None
+
+        return ChainResult(data, last_input, output)
+
+    def publish(self, stage: Stage, input_hash: str, path: str) -> None:
+        """Make the cached output of a stage available at another path, for example the path of the program. The
+        output is hard linked when possible, so it does not take extra space.
+
+        Arguments:
+            stage (Stage): The stage.
+            input_hash (str): The hash of the input of the stage.
+            path (str): The path at which the output should be available.
+        """
+        source = self.path(stage, input_hash)
+
+        # The artifact is published before its metadata, like storage.write_artifact()
+        for source_file, target_file in (
+            (source, path),
+            (source + storage.METADATA_SUFFIX, path + storage.METADATA_SUFFIX),
+        ):
+            temporary = f"{target_file}.{uuid.uuid4().hex}.tmp"
+
+            try:
+                os.link(source_file, temporary)
+            except OSError:
+                # Hard links are not supported by every file system
+                with open(source_file, "rb") as f:
+                    data = f.read()
+                with open(temporary, "wb") as f:
+                    f.write(data)
+
+            os.replace(temporary, target_file)
@@ -0,0 +1,245 @@
+"""
+This module contains the functions to store processing artifacts safely on disk.
+
+Artifacts are written atomically, see utils.write_file_atomic(). Next to each artifact, a metadata file with the
+size and sha256 hash of the artifact is written. When an artifact is read, it is verified against its metadata, so
+truncated or otherwise corrupt artifacts are detected. A corrupt artifact is removed, which makes the caller
+rebuild it.
+
+The RunJournal records the progress of a processing run, so an interrupted run can be resumed where it stopped.
+
+How to use:
+
+    write_artifact(path, text)
+
+    data = read_artifact(path)
+    if data is None:
+        # The artifact does not exist or is corrupt, rebuild it
+        ...
+
+"""
+
+import hashlib
+import json
+import os
+from typing import TypedDict
+
+from src import utils
+from src.project_logger import Logger
+
+logger = Logger(__name__)
+
+METADATA_SUFFIX = ".meta"
+"""The suffix of the metadata file that is stored next to each artifact"""
+
+
+class ArtifactMetadata(TypedDict):
+    """A type hint for the metadata of an artifact."""
+
+    size: int
+    sha256: str
+
+
+def _metadata_path(path: str) -> str:
+    """Return the path of the metadata file of an artifact."""
+    return path + METADATA_SUFFIX
+
+
+def read_metadata(path: str) -> ArtifactMetadata | None:
+    """Read the metadata of an artifact, without reading or verifying the artifact itself.
+
+    Args:
+        path (str): The path to the artifact.
+
+    Returns:
+        The metadata, or None if the metadata does not exist or cannot be read.
+    """
+    try:
+        with open(_metadata_path(path), "r", encoding="utf-8") as f:
+            metadata: ArtifactMetadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(metadata, dict) or not {"size", "sha256"} <= metadata.keys():
+        return None
+
+    return metadata
+
+
+def write_artifact(path: str, data: str | bytes) -> ArtifactMetadata:
+    """Write an artifact and its metadata atomically.
+
+    The artifact is written before the metadata. When the process is killed in between, the metadata is missing or
+    does not match the artifact, so the artifact is rebuilt on the next read.
+
+    Args:
+        path (str): The path to the artifact.
+        data (str | bytes): The content of the artifact, strings are encoded as utf-8.
+
+    Returns:
+        The metadata of the artifact.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    metadata: ArtifactMetadata = {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+    utils.write_file_atomic(path, data)
+    utils.write_file_atomic(_metadata_path(path), json.dumps(metadata))
+
+    return metadata
+
+
+def has_artifact(path: str) -> bool:
+    """Cheaply check whether an artifact exists, by comparing its size to its metadata. The content is only
+    verified when the artifact is read.
+
+    Args:
+        path (str): The path to the artifact.
+
+    Returns:
+        True if the artifact and its metadata exist and the size matches, False otherwise.
+    """
+    metadata = read_metadata(path)
+    if metadata is None:
+        return False
+
+    try:
+        return os.path.getsize(path) == metadata["size"]
+    except OSError:
+        return False
+
+
+def remove_artifact(path: str) -> None:
+    """Remove an artifact and its metadata, if they exist.
+
+    Args:
+        path (str): The path to the artifact.
+    """
+    for file in (path, _metadata_path(path)):
+        try:
+            os.remove(file)
+        except FileNotFoundError:
+            pass
+
+
+def read_artifact(path: str) -> bytes | None:
+    """Read an artifact and verify it against its metadata. A corrupt artifact is removed.
+
+    Args:
+        path (str): The path to the artifact.
+
+    Returns:
+        The content of the artifact, or None if the artifact does not exist or is corrupt.
+    """
+    if not os.path.exists(path):
+        return None
+
+    metadata = read_metadata(path)
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if metadata is None or len(data) != metadata["size"] or hashlib.sha256(data).hexdigest() != metadata["sha256"]:
+        logger.warning(f"Artifact {path} is corrupt or incomplete, it will be rebuilt")
+        remove_artifact(path)
+        return None
+
+    return data
+
+
+class RunJournal:
+    """A journal of a processing run, used to resume an interrupted run where it stopped.
+
+    The journal is a file with one json record per line. The first record contains the order in which the
+    programs are processed, each following record contains the reference of a program that has been processed.
+    Every record is flushed to disk before processing continues. When the run finishes, the journal is removed.
+
+    Attributes:
+        path (str): The path to the journal.
+        order (list[str]): The references of the programs in the order in which they are processed.
+        done (set[str]): The references of the programs that have been processed.
+        resumed (bool): True if the journal continues an interrupted run, False otherwise.
+
+    """
+
+    def __init__(self, path: str):
+        """A journal of a processing run
+
+        Arguments:
+            path (str): The path to the journal.
+        """
+        self.path = path
+        self.order: list[str] = []
+        self.done: set[str] = set()
+        self.resumed = False
+
+    def start(self, references: list[str]) -> list[str]:
+        """Start a run, or resume the interrupted run when it processed the same programs.
+
+        Arguments:
+            references (list[str]): The references of the programs, in the order of a new run.
+
+        Returns:
+            The references in the order in which they should be processed.
+        """
+        order, done = self._load()
+
+        if order is not None and set(order) == set(references):
+            self.order, self.done, self.resumed = order, done, True
+
+            # Rewrite the journal without a possibly incomplete last record, so new records start on a new line
+            records = [json.dumps({"order": self.order})] + [json.dumps({"done": reference}) for reference in done]
+            utils.write_file_atomic(self.path, "\n".join(records) + "\n")
+            return self.order
+
+        self.order, self.done, self.resumed = list(references), set(), False
+        utils.write_file_atomic(self.path, json.dumps({"order": self.order}) + "\n")
+        return self.order
+
+    def _load(self) -> tuple[list[str] | None, set[str]]:
+        """Load the journal of an interrupted run.
+
+        Returns:
+            The order and the processed references, the order is None when there is no (valid) journal.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None, set()
+
+        try:
+            order = json.loads(lines[0])["order"]
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None, set()
+
+        done = set()
+        for line in lines[1:]:
+            # The last record is incomplete when the process was killed while writing it
+            try:
+                done.add(json.loads(line)["done"])
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        return order, done
+
+    def record_done(self, reference: str) -> None:
+        """Record that a program has been processed.
+
+        Arguments:
+            reference (str): The reference of the program.
+        """
+        self.done.add(reference)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"done": reference}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def finish(self) -> None:
+        """Finish the run by removing the journal."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
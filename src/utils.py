@@ -4,11 +4,19 @@ Utility functions that are used in the project.
 Functions:
   - progress: Prints a progress bar to the console.
   - calculate_remaining_processing_time: Calculates the remaining processing time for the remaining programs.
+  - write_file_atomic: Writes a file by writing a temporary file and renaming it to the target.
+  - sha256: Calculates the sha256 hash of a string or bytes.
+  - file_sha256: Calculates the sha256 hash of a file.
+  - current_rss: Returns the resident set size of the process.
+  - MemoryTracker: Tracks the peak resident set size during a run and enforces a memory ceiling and limit.
 
 """
 
+import gc
+import hashlib
 import os
 import sys
+import uuid
 from typing import Self, TextIO
 
 _run_times = []
@@ -95,6 +103,208 @@ def get_pdf_files_recursive(target: str) -> set[str]:
     return file_locations
 
 
+def write_file_atomic(path: str, data: str | bytes) -> None:
+    """Write a file atomically. The data is written to a temporary file in the same directory, which is renamed
+    to the target afterward. Readers, also on other hosts, never see a partially written file.
+
+    Args:
+        path (str): The path to the file.
+        data (str | bytes): The data to write, strings are encoded as utf-8.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    # The temporary file must be on the same file system as the target for the rename to be atomic
+    temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+
+    try:
+        with open(temporary, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def sha256(data: str | bytes) -> str:
+    """Calculate the sha256 hash of a string or bytes.
+
+    Args:
+        data (str | bytes): The data to hash, strings are encoded as utf-8.
+
+    Returns:
+        The hexadecimal sha256 hash.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    """Calculate the sha256 hash of a file, without reading the whole file in memory.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        The hexadecimal sha256 hash.
+    """
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _max_rss(children: bool = False) -> int | None:
+    """Return the maximum resident set size in bytes, as reported by getrusage.
+
+    Keyword Arguments:
+        children (bool): Report the largest terminated child process instead of this process. (default: {False})
+
+    Returns:
+        The maximum resident set size in bytes, or None if getrusage is not available, like on Windows.
+    """
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports bytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def current_rss() -> int | None:
+    """Return the current resident set size of the process in bytes. Falls back to the maximum resident set size
+    when the current size is not available on the platform.
+
+    Returns:
+        The resident set size in bytes, or None if neither is available, like on Windows.
+    """
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError, AttributeError):
+        return _max_rss()
+
+
+class MemoryTracker:
+    """
+    A class that tracks the peak resident set size (RSS) of a run and enforces a memory ceiling and limit.
+
+    The ceiling is soft: exceeded() tells the run to release memory. Freed memory is often not returned to the
+    operating system right away, so the RSS can stay above the ceiling for a while after a release. The limit is
+    hard: check() raises when the RSS exceeds it.
+
+    The RSS is sampled when exceeded() or check() is called. Peaks in between samples are found with getrusage: when
+    the maximum RSS of the process has grown during the run, the run has set the peak. On platforms where the RSS
+    cannot be read, the ceiling and limit are not enforced and the peak is reported as unavailable.
+
+    Example:
+        tracker = MemoryTracker(ceiling=2 * 1024**3, limit=3 * 1024**3)
+
+        for p in programs:
+            process(p)
+            if tracker.exceeded():
+                release_memory()
+            else:
+                tracker.check()
+
+        print(tracker.report())
+    """
+
+    def __init__(self, ceiling: int | None = None, limit: int | None = None) -> None:
+        """Initializes the class.
+
+        Args:
+            ceiling (int | None): The RSS in bytes above which memory should be released, None for no ceiling.
+                (default: {None})
+            limit (int | None): The maximum RSS in bytes, None for no limit. (default: {None})
+        """
+        self.ceiling = ceiling
+        self.limit = limit
+        self._start_max_rss = _max_rss()
+        self._start_max_rss_children = _max_rss(children=True)
+        self._sampled_peak = current_rss()
+
+    def sample(self) -> int | None:
+        """Samples the current RSS.
+
+        Returns:
+            The current RSS in bytes, or None if it is not available.
+        """
+        rss = current_rss()
+        if rss is not None:
+            self._sampled_peak = max(self._sampled_peak or 0, rss)
+        return rss
+
+    def _above(self, threshold: int | None) -> bool:
+        """Returns True if the current RSS exceeds the threshold, False otherwise or if the RSS is not available."""
+        if threshold is None:
+            return False
+
+        rss = self.sample()
+        return rss is not None and rss > threshold
+
+    def exceeded(self) -> bool:
+        """Returns True if the current RSS exceeds the ceiling, False otherwise or if the RSS is not available."""
+        return self._above(self.ceiling)
+
+    def check(self) -> None:
+        """Enforces the limit, after collecting garbage.
+
+        Raises:
+            MemoryError: If the current RSS exceeds the limit.
+        """
+        if not self._above(self.limit):
+            return
+
+        gc.collect()
+
+        if self._above(self.limit):
+            raise MemoryError(
+                f"Memory use of {(self.sample() or 0) / 1024**2:.0f} MB exceeds the limit of "
+                f"{(self.limit or 0) / 1024**2:.0f} MB"
+            )
+
+    @property
+    def peak(self) -> int | None:
+        """The peak RSS of the run in bytes, None if it is not available."""
+        max_rss = _max_rss()
+        if max_rss is None or self._start_max_rss is None:
+            return self._sampled_peak
+        return max_rss if max_rss > self._start_max_rss else self._sampled_peak
+
+    @property
+    def peak_children(self) -> int | None:
+        """The largest peak RSS in bytes of a worker process that terminated during the run, None if no worker
+        process set a new peak or if it is not available."""
+        max_rss = _max_rss(children=True)
+        if max_rss is None or self._start_max_rss_children is None:
+            return None
+        return max_rss if max_rss > self._start_max_rss_children else None
+
+    def report(self) -> str:
+        """Returns a description of the peak memory use."""
+        if self.peak is None:
+            return "Peak memory: unavailable"
+
+        report = f"Peak memory: {self.peak / 1024**2:.0f} MB"
+
+        if self.peak_children is not None:
+            report += f", largest worker process: {self.peak_children / 1024**2:.0f} MB"
+
+        return report
+
+
 def progress(count: int, total: int, suffix: object | str = None) -> None:
     """
     Prints a progress bar to the console. Pycharm does not support this out of the box, so
@@ -0,0 +1,308 @@
+"""
+This module contains a work queue that lets several processes, possibly on different hosts, split the processing
+of the programs between them. The only thing the processes share is a directory, for example the processed folder
+on a network mount, so no coordination service is necessary.
+
+Before a worker processes an item, it claims a lease on the item by atomically creating a lease file in the shared
+directory: the lease is written to a temporary file first, which is then hard linked to the lease file. The link fails
+when the lease file exists, so the lease file is never seen without its content. The lease file records the owner and
+the moment the lease expires. While the worker processes the item, the lease is renewed in the background. When the
+worker crashes, the lease is no longer renewed and expires, after which another worker takes it over.
+
+The clocks of the hosts are used to determine whether a lease has expired, so they should be roughly in sync. Taking
+over an expired lease is not strictly exclusive in every interleaving, so in rare cases two workers can process the
+same item. The outputs should therefore be published atomically, which makes duplicate work harmless.
+
+How to use:
+
+    queue = LeaseQueue("/mnt/shared/processed/leases", lease_seconds=600)
+
+    failures = run_cooperatively(programs, queue, key=lambda p: p.reference("lease"), is_done=..., work=...)
+
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypedDict, TypeVar
+
+T = TypeVar("T")
+
+
+class Lease(TypedDict):
+    """A type hint for the content of a lease file."""
+
+    owner: str
+    token: str
+    expires: float
+
+
+class LeaseQueue:
+    """A queue of leases stored as files in a shared directory.
+
+    Attributes:
+        directory (str): The shared directory where the lease files are stored.
+        lease_seconds (float): The number of seconds a lease is valid without being renewed.
+        owner (str): The identification of this worker, unique across hosts and processes.
+
+    """
+
+    def __init__(self, directory: str, lease_seconds: float = 600.0, owner: str | None = None):
+        """A queue of leases stored as files in a shared directory.
+
+        Arguments:
+            directory (str): The shared directory where the lease files are stored, created if it does not exist.
+
+        Keyword Arguments:
+            lease_seconds (float): The number of seconds a lease is valid without being renewed. (default: {600.0})
+            owner (str | None): The identification of this worker, generated if None. (default: {None})
+
+        Raises:
+            AssertionError: If lease_seconds is not positive.
+        """
+        assert lease_seconds > 0, "Lease seconds must be positive."
+
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        # The tokens of the leases held by this worker, by key
+        self._tokens: dict[str, str] = {}
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        """Return the path of the lease file for a key."""
+        return os.path.join(self.directory, f"{key}.lease")
+
+    def _new_lease(self) -> Lease:
+        """Return a new lease for this worker."""
+        return {"owner": self.owner, "token": uuid.uuid4().hex, "expires": time.time() + self.lease_seconds}
+
+    def _read(self, path: str) -> Lease | None:
+        """Read a lease file.
+
+        Arguments:
+            path (str): The path to the lease file.
+
+        Returns:
+            The lease, or None if the lease file does not exist. An unreadable lease file is returned as a lease that
+            expires lease_seconds after the file was last modified, so it is only taken over when it is not renewed.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lease: Lease = json.load(f)
+                return lease
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError):
+            pass
+
+        try:
+            return {"owner": "", "token": "", "expires": os.stat(path).st_mtime + self.lease_seconds}
+        except FileNotFoundError:
+            return None
+
+    def _create(self, path: str) -> Lease | None:
+        """Atomically create a lease file, fails if the lease file already exists. The lease is written to a
+        temporary file that is hard linked to the lease file, so other workers never read a partial lease.
+
+        Arguments:
+            path (str): The path to the lease file.
+
+        Returns:
+            The created lease, or None if the lease file already exists.
+        """
+        lease = self._new_lease()
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(lease, f)
+
+        try:
+            os.link(temporary, path)
+        except FileExistsError:
+            return None
+        finally:
+            os.remove(temporary)
+
+        return lease
+
+    def try_claim(self, key: str) -> bool:
+        """Try to claim the lease for a key. A lease that has expired is taken over.
+
+        Arguments:
+            key (str): The key of the item, for example the reference of a program.
+
+        Returns:
+            True if this worker holds the lease now, False if another worker holds it.
+        """
+        path = self._path(key)
+
+        lease = self._create(path)
+
+        if lease is None:
+            current = self._read(path)
+
+            # The lease is held by another worker which has not expired yet
+            if current is not None and current["expires"] > time.time():
+                return False
+
+            # Move the expired lease out of the way. Only one worker can rename the file, the others fail. A lease
+            # that has been released since is not renamed, the file may be a lease another worker just created.
+            if current is not None:
+                tombstone = f"{path}.{uuid.uuid4().hex}.expired"
+                try:
+                    os.rename(path, tombstone)
+                except FileNotFoundError:
+                    pass
+                else:
+                    # Another worker may have replaced the expired lease between reading and renaming it. In that
+                    # case, restore its lease without overwriting a lease that has been created in the meantime.
+                    moved = self._read(tombstone)
+                    if moved is not None and moved["token"] != current["token"]:
+                        try:
+                            os.link(tombstone, path)
+                        except FileExistsError:
+                            pass
+                        os.remove(tombstone)
+                        return False
+
+                    os.remove(tombstone)
+
+            lease = self._create(path)
+            if lease is None:
+                return False
+
+        self._tokens[key] = lease["token"]
+        return True
+
+    def holds(self, key: str) -> bool:
+        """Return True if this worker holds the lease for a key, False otherwise."""
+        if key not in self._tokens:
+            return False
+
+        current = self._read(self._path(key))
+        return current is not None and current["token"] == self._tokens[key]
+
+    def renew(self, key: str) -> bool:
+        """Extend the lease for a key that is held by this worker.
+
+        Arguments:
+            key (str): The key of the item.
+
+        Returns:
+            True if the lease has been renewed, False if this worker no longer holds the lease.
+        """
+        if not self.holds(key):
+            return False
+
+        # Write the renewed lease next to the lease file and replace the lease file with it atomically
+        lease: Lease = {**self._new_lease(), "token": self._tokens[key]}
+        temporary = f"{self._path(key)}.{uuid.uuid4().hex}.tmp"
+
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(lease, f)
+
+        os.replace(temporary, self._path(key))
+        return True
+
+    def release(self, key: str) -> None:
+        """Release the lease for a key, if it is held by this worker.
+
+        Arguments:
+            key (str): The key of the item.
+        """
+        if self.holds(key):
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+        self._tokens.pop(key, None)
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        """Context manager that renews a claimed lease in the background and releases it afterward.
+
+        Arguments:
+            key (str): The key of the item, which must have been claimed with try_claim().
+        """
+        stop = threading.Event()
+
+        def heartbeat() -> None:
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.renew(key):
+                    return
+
+        thread = threading.Thread(target=heartbeat, name=f"lease-{key}", daemon=True)
+        thread.start()
+
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+            self.release(key)
+
+
+def run_cooperatively(
+    items: list[T],
+    queue: LeaseQueue,
+    *,
+    key: Callable[[T], str],
+    is_done: Callable[[T], bool],
+    work: Callable[[T], None],
+    poll_seconds: float = 5.0,
+) -> list[tuple[T, Exception]]:
+    """Process the items together with the other workers that use the same lease directory. Each item is processed
+    by the worker that claims its lease. Items claimed by another worker are revisited until they are done, so
+    items of a crashed worker are picked up when their lease expires.
+
+    Arguments:
+        items (list[T]): The items to process.
+        queue (LeaseQueue): The queue used to claim the items.
+
+    Keyword Arguments:
+        key (Callable[[T], str]): Returns the key of an item, which must be the same on every worker.
+        is_done (Callable[[T], bool]): Returns True if the outputs of an item have been published.
+        work (Callable[[T], None]): Processes an item and publishes its outputs.
+        poll_seconds (float): The time to wait before revisiting items claimed by other workers. (default: {5.0})
+
+    Returns:
+        The items that this worker could not process, together with the exception that was raised.
+    """
+    failures: list[tuple[T, Exception]] = []
+    pending = list(items)
+
+    while pending:
+        waiting = []
+
+        for item in pending:
+            if is_done(item):
+                continue
+
+            if not queue.try_claim(key(item)):
+                waiting.append(item)
+                continue
+
+            with queue.hold(key(item)):
+                # Another worker may have finished the item just before the lease was claimed
+                if is_done(item):
+                    continue
+
+                try:
+                    work(item)
+                except Exception as exception:  # pylint: disable=broad-exception-caught
+                    failures.append((item, exception))
+
+        pending = waiting
+
+        if pending:
+            time.sleep(poll_seconds)
+
+    return failures
@@ -0,0 +1,15 @@
+"""Fixtures shared by the tests."""
+
+import pytest
+import spacy
+from spacy.language import Language
+from spacy_syllables import SpacySyllables  # pylint: disable=unused-import # import is necessary for the pipe
+
+
+@pytest.fixture(scope="session", name="nlp")
+def fixture_nlp() -> Language:
+    """A small Dutch pipeline that splits sentences and counts syllables, without the large model."""
+    nlp = spacy.blank("nl")
+    nlp.add_pipe("sentencizer")
+    nlp.add_pipe("syllables")
+    return nlp
@@ -0,0 +1,61 @@
+"""Tests of the command-line interface of the cli module, on the programs in the data folder."""
+
+import pytest
+
+from src import cli
+from src.preflight import NotExtractableError
+
+
+def test_filters_are_shared_by_the_subcommands():
+    """Every subcommand accepts the filters."""
+    parser = cli.build_parser()
+
+    args = parser.parse_args(["metrics", "--election-type", "GR", "--region", "Utrecht", "--tag", "Concept"])
+    assert (args.election_type, args.region, args.tags, args.joined_issue) == ("GR", "Utrecht", ["Concept"], None)
+
+    args = parser.parse_args(["keyness", "--party", "VVD", "--not-joined", "--against-region", "Zeist"])
+    assert (args.party, args.joined_issue, args.against_region) == ("VVD", False, "Zeist")
+
+
+def test_memory_ceiling_and_limit():
+    """The memory ceiling and limit are given in MB."""
+    parser = cli.build_parser()
+
+    args = parser.parse_args(["process", "--max-memory", "2", "--memory-limit", "3"])
+    assert (cli.memory_ceiling(args), cli.memory_limit(args)) == (2 * 1024**2, 3 * 1024**2)
+
+    args = parser.parse_args(["process"])
+    assert cli.memory_ceiling(args) is None and cli.memory_limit(args) is None
+
+
+@pytest.mark.parametrize("option", [["--stream"], ["--max-memory", "2048"], ["--memory-limit", "2048"]])
+def test_cooperative_processing_rejects_the_memory_options(option, capsys):
+    """The memory options do not apply to cooperative processing, combining them is an error."""
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["process", "--cooperative", *option])
+
+    assert exit_info.value.code == 2 and "--cooperative cannot be combined" in capsys.readouterr().err
+
+
+def test_skipped_programs_are_not_failures(capsys):
+    """Programs without a usable text layer are reported, but only other exceptions fail the command."""
+    assert cli.report_failures([]) == cli.EXIT_OK
+    assert cli.report_failures([("scan", NotExtractableError("scan looks scanned"))]) == cli.EXIT_OK
+    assert cli.report_failures([("program", ValueError("broken"))]) == cli.EXIT_FAILURE
+
+    errors = capsys.readouterr().err
+    assert "scan looks scanned" in errors and "program: ValueError('broken')" in errors
+
+
+def test_no_matching_programs(capsys):
+    """A selection without programs exits with its own status."""
+    assert cli.main(["status", "--party", "Partij die niet bestaat"]) == cli.EXIT_NO_PROGRAMS
+    assert "No program matches" in capsys.readouterr().err
+
+
+def test_dry_run_lists_the_selection(capsys):
+    """A dry run lists the selected programs without processing them."""
+    assert cli.main(["process", "--dry-run", "--party", "GroenLinks-PvdA", "--election-date", "2023-11"]) == cli.EXIT_OK
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1 and lines[0].endswith("\tTK - GroenLinks-PvdA - 2023-11")
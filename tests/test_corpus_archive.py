@@ -0,0 +1,67 @@
+"""Tests of the packed archive of the cleaned texts of the corpus_archive module."""
+
+import os
+
+import pytest
+
+from src import corpus_archive, storage
+
+TEXTS = {
+    "TK-VVD-2023-11.txt": "Wij kiezen voor een veilig land. " * 50,
+    "TK-SP-2023-11.txt": "Eerst de mensen.",
+    "TK-D66-2023-11.txt": "Nieuwe energie voor één land. " * 20,
+}
+"""The texts that are packed, a short one is not smaller compressed"""
+
+
+def write_texts(tmp_path) -> str:
+    """Write the texts to a folder in the layout of processed/text, with the metadata of each text, and return it."""
+    directory = tmp_path / "text"
+    directory.mkdir()
+
+    for name, text in TEXTS.items():
+        storage.write_artifact(str(directory / name), text)
+
+    return str(directory)
+
+
+def test_pack_and_unpack(tmp_path):
+    """The texts are packed without their metadata and unpacked to the same texts, with their metadata."""
+    path = str(tmp_path / "corpus.ptar")
+
+    assert corpus_archive.pack_directory(write_texts(tmp_path), path) == len(TEXTS)
+
+    with corpus_archive.CorpusArchive(path) as archive:
+        assert sorted(archive) == sorted(TEXTS) and len(archive) == len(TEXTS)
+        assert all(archive.read_text(name) == text for name, text in TEXTS.items())
+        assert archive.index["TK-VVD-2023-11.txt"]["compressed"]
+        assert not archive.index["TK-SP-2023-11.txt"]["compressed"]
+
+    unpacked = str(tmp_path / "unpacked")
+    assert corpus_archive.unpack_archive(path, unpacked) == len(TEXTS)
+    assert all(storage.read_artifact(os.path.join(unpacked, name)) == text.encode() for name, text in TEXTS.items())
+
+
+def test_corrupt_archives(tmp_path):
+    """Files that are not archives are refused, a damaged entry is detected when it is read."""
+    path = str(tmp_path / "corpus.ptar")
+    corpus_archive.pack_directory(write_texts(tmp_path), path, compress=False)
+
+    with open(path, "r+b") as f:
+        data = f.read()
+        f.seek(data.index(b"Eerst"))
+        f.write(b"Laatst")
+
+    with corpus_archive.CorpusArchive(path) as archive:
+        assert archive.read_text("TK-VVD-2023-11.txt") == TEXTS["TK-VVD-2023-11.txt"]
+        with pytest.raises(ValueError):
+            archive.read("TK-SP-2023-11.txt")
+
+    with open(path, "r+b") as f:
+        f.truncate(len(data) // 2)
+    with pytest.raises(ValueError):
+        corpus_archive.CorpusArchive(path)
+
+    with pytest.raises(ValueError):
+        corpus_archive.write_archive(path, [("a.txt", b"a"), ("a.txt", b"b")])
+    assert sorted(os.listdir(tmp_path)) == ["corpus.ptar", "text"]
@@ -0,0 +1,100 @@
+"""Tests of the discovery of the pdf files of the programs of the discovery module."""
+
+import os
+
+import pytest
+
+from src import discovery
+
+
+@pytest.fixture(name="manifests")
+def fixture_manifests(tmp_path, monkeypatch):
+    """A manifests folder with programs of national and municipal elections, of which the folders were last modified
+    long enough ago to be cached. The cached listings in memory start empty."""
+    monkeypatch.setattr(discovery, "_listings", {})
+
+    root = tmp_path / "manifests"
+    for path in [
+        "TK/2023-11/VVD.pdf",
+        "TK/2023-11/SP #Concept.pdf",
+        "GR/2022-03/Utrecht/D66.pdf",
+        "GR/2022-03/Zeist/CDA.pdf",
+    ]:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_bytes(b"%PDF-1.4\n")
+
+    (root / "TK" / "2023-11" / "notes.txt").write_text("not a program")
+    (root / "TK" / ".hidden").mkdir()
+    (root / "TK" / ".hidden" / "VVD.pdf").write_bytes(b"%PDF-1.4\n")
+
+    age(root)
+    return root
+
+
+def age(root) -> None:
+    """Set the modification time of the folders an hour back, so their listings are not racy."""
+    for folder, _, _ in os.walk(root):
+        stat = os.stat(folder)
+        os.utime(folder, ns=(stat.st_atime_ns, stat.st_mtime_ns - 3600 * 10**9))
+
+
+def relative(root, paths: list[str]) -> list[str]:
+    """The paths relative to the manifests folder."""
+    return [os.path.relpath(path, root) for path in paths]
+
+
+def test_scan_finds_the_pdf_files(manifests):
+    """Only the visible pdf files are found, in all subfolders, sorted."""
+    assert relative(manifests, discovery.scan_pdf_files(str(manifests), workers=2)) == [
+        "GR/2022-03/Utrecht/D66.pdf",
+        "GR/2022-03/Zeist/CDA.pdf",
+        "TK/2023-11/SP #Concept.pdf",
+        "TK/2023-11/VVD.pdf",
+    ]
+
+
+def test_only_changed_folders_are_listed_again(manifests, tmp_path, monkeypatch):
+    """A scan lists only the folders that changed since the last scan, also after a restart with the cache file."""
+    cache_path = str(tmp_path / "discovery.json")
+    first = discovery.scan_pdf_files(str(manifests), cache_path)
+
+    listed: list[str] = []
+    list_folder = discovery.list_folder
+
+    def record(path: str) -> discovery.FolderListing:
+        listed.append(os.path.relpath(path, manifests))
+        return list_folder(path)
+
+    monkeypatch.setattr(discovery, "list_folder", record)
+    monkeypatch.setattr(discovery, "_listings", {})
+
+    assert discovery.scan_pdf_files(str(manifests), cache_path) == first and not listed
+
+    # Adding a file and removing a folder changes the modification time of the folder they are in
+    (manifests / "TK" / "2023-11" / "CDA.pdf").write_bytes(b"%PDF-1.4\n")
+    (manifests / "GR" / "2022-03" / "Zeist" / "CDA.pdf").unlink()
+    (manifests / "GR" / "2022-03" / "Zeist").rmdir()
+
+    paths = relative(manifests, discovery.scan_pdf_files(str(manifests), cache_path))
+
+    assert sorted(listed) == ["GR/2022-03", "TK/2023-11"]
+    assert "TK/2023-11/CDA.pdf" in paths and "GR/2022-03/Zeist/CDA.pdf" not in paths
+
+    # The folders were modified just now, so they are listed again until they are older than RACY_SECONDS
+    listed.clear()
+    discovery.scan_pdf_files(str(manifests), cache_path)
+    assert sorted(listed) == ["GR/2022-03", "TK/2023-11"]
+
+
+def test_invalid_cache_is_ignored(manifests, tmp_path):
+    """A cache file that is damaged or of another version is ignored."""
+    cache_path = tmp_path / "discovery.json"
+
+    for content in ["{", '{"version": 0, "folders": {"x": 1}}']:
+        cache_path.write_text(content)
+        discovery._listings.clear()  # pylint: disable=protected-access
+
+        assert len(discovery.scan_pdf_files(str(manifests), str(cache_path))) == 4
+
+    with pytest.raises(FileNotFoundError):
+        discovery.scan_pdf_files(str(tmp_path / "missing"))
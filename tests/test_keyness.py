@@ -0,0 +1,77 @@
+"""Tests of the keyness of words between groups of programs of the keyness module."""
+
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+import spacy
+
+from src import keyness
+
+nlp = spacy.blank("nl")
+
+FIRST = "Veiligheid en veiligheid. Meer politie op straat, meer veiligheid en minder belasting. " * 4
+SECOND = "Klimaat en natuur. Meer natuur, een beter klimaat en minder uitstoot voor het klimaat. " * 4
+
+
+def test_term_counts():
+    """Only the alphabetic tokens are counted, in their lowercase form, and the counts survive serialization."""
+    counts = keyness.term_counts(nlp("Meer natuur, meer Natuur en 2024."))
+
+    assert dict(zip(counts.words.tolist(), counts.counts.tolist())) == {"meer": 2, "natuur": 2, "en": 1}
+    assert counts.total == 5 and np.all(np.diff(counts.ids.astype(np.float64)) > 0)
+
+    restored = keyness.counts_from_bytes(keyness.counts_to_bytes(counts))
+    assert all(np.array_equal(a, b) for a, b in zip(counts, restored))
+
+
+def test_merge_and_align_counts():
+    """Merged counts are the counts of the texts together, aligned counts follow the vocabulary."""
+    first, second = keyness.term_counts(nlp(FIRST)), keyness.term_counts(nlp(SECOND))
+    merged = keyness.merge_counts([first, second])
+
+    expected = Counter(token.lower_ for token in nlp(FIRST + SECOND) if token.is_alpha)
+    assert dict(zip(merged.words.tolist(), merged.counts.tolist())) == expected
+    assert keyness.merge_counts([]).total == 0
+
+    aligned = keyness.align_counts(merged.ids, first)
+    assert aligned.sum() == first.total
+    assert aligned[merged.words.tolist().index("klimaat")] == 0
+    assert keyness.align_counts(first.ids[:0], second).tolist() == []
+
+
+@pytest.mark.parametrize("method", list(keyness.METHODS))
+def test_keyness_ranks_the_characteristic_words(method):
+    """The words of a group are characteristic for it, the words both groups use equally are in between."""
+    first, second = keyness.term_counts(nlp(FIRST)), keyness.term_counts(nlp(SECOND))
+
+    terms = keyness.keyness(first, second, method=method)
+    words = [term.word for term in terms]
+
+    assert words[0] == "veiligheid" and words[-1] == "klimaat"
+    assert all(term.score > 0 for term in terms if term.second_count == 0)
+    assert all(term.score < 0 for term in terms if term.first_count == 0)
+    assert all(term.first_count + term.second_count >= keyness.MIN_COUNT for term in terms)
+    assert "politie" not in words and "politie" in [t.word for t in keyness.keyness(first, second, min_count=1)]
+
+    minder = next(term for term in terms if term.word == "minder")
+    assert abs(minder.score) < min(abs(terms[0].score), abs(terms[-1].score))
+
+    limited = keyness.keyness(first, second, method=method, limit=2)
+    assert [term.word for term in limited] == words[:2] + words[-2:]
+
+
+def test_log_likelihood():
+    """The G2 of a word equals its definition, its sign shows the group in which the word is relatively more
+    frequent."""
+    first, second = np.array([10, 5, 0]), np.array([2, 5, 3])
+    scores = keyness.log_likelihood(first, second, np.ones(3))
+
+    total = first.sum() + second.sum()
+    expected = 2 * (10 * math.log(10 / (15 * 12 / total)) + 2 * math.log(2 / (10 * 12 / total)))
+    assert scores[0] == pytest.approx(expected)
+    assert scores[2] < 0
+
+    with pytest.raises(ValueError):
+        keyness.keyness(keyness.term_counts(nlp(FIRST)), keyness.term_counts(nlp("2024")))
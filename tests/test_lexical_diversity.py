@@ -0,0 +1,78 @@
+"""Tests of the measures of lexical diversity of the lexical_diversity module, against straightforward
+implementations of their definitions."""
+
+import math
+
+import numpy as np
+import pytest
+import spacy
+from spacy.attrs import ORTH
+
+from src import lexical_diversity
+
+IDS = np.random.default_rng(7).zipf(1.5, 300).astype(np.int64) % 80
+"""The ids of a text of 300 words with a skewed frequency distribution"""
+
+
+def reference_mtld_factors(words: list[int], threshold: float) -> float:
+    """The number of sequences of MTLD, with the type-token ratio of each sequence counted from scratch."""
+    factors, sequence = 0.0, []
+
+    for word in words:
+        sequence.append(word)
+        if len(set(sequence)) / len(sequence) <= threshold:
+            factors += 1
+            sequence = []
+
+    if sequence:
+        factors += (1 - len(set(sequence)) / len(sequence)) / (1 - threshold)
+
+    return factors
+
+
+def reference_mtld(words: list[int], threshold: float = lexical_diversity.MTLD_THRESHOLD) -> float:
+    """MTLD as the mean of the forward and the backward pass."""
+    lengths = [len(words) / reference_mtld_factors(d, threshold) for d in (words, words[::-1])]
+    return sum(lengths) / 2
+
+
+def reference_mattr(words: list[int], window: int) -> float:
+    """MATTR as the mean of the type-token ratio of each window, counted from scratch."""
+    ratios = [len(set(words[i : i + window])) / window for i in range(len(words) - window + 1)]
+    return sum(ratios) / len(ratios)
+
+
+def reference_hdd(words: list[int], sample_size: int) -> float:
+    """HD-D from the hypergeometric probability that a type occurs at least once in the sample."""
+    count = len(words)
+    absent = [math.comb(count - words.count(word), sample_size) / math.comb(count, sample_size) for word in set(words)]
+    return sum(1 - p for p in absent) / sample_size
+
+
+def test_word_ids():
+    """Only the alphabetic tokens are words, and words that only differ in case get the same id by default."""
+    doc = spacy.blank("nl")("De zorg, de Zorg en 2024.")
+
+    ids = lexical_diversity.word_ids(doc).tolist()
+    assert len(ids) == 5 and ids[0] == ids[2] and ids[1] == ids[3] and sorted(set(ids)) == [0, 1, 2]
+    assert len(set(lexical_diversity.word_ids(doc, ORTH).tolist())) == 5
+
+
+def test_measures_equal_their_definitions():
+    """MTLD, MATTR and HD-D equal the straightforward implementations of their definitions."""
+    words = IDS.tolist()
+
+    assert lexical_diversity.mtld(IDS) == pytest.approx(reference_mtld(words))
+    assert lexical_diversity.mattr(IDS, 50) == pytest.approx(reference_mattr(words, 50))
+    assert lexical_diversity.mattr(IDS, 7) == pytest.approx(reference_mattr(words, 7))
+    assert lexical_diversity.hdd(IDS, 42) == pytest.approx(reference_hdd(words, 42))
+
+
+def test_short_texts():
+    """Without words the measures are NaN, a text shorter than the window of MATTR gets its type-token ratio."""
+    empty = np.array([], dtype=np.int64)
+
+    assert math.isnan(lexical_diversity.mtld(empty))
+    assert math.isnan(lexical_diversity.mattr(empty))
+    assert math.isnan(lexical_diversity.hdd(np.arange(10)))
+    assert lexical_diversity.mattr(np.array([0, 1, 1, 2])) == 0.75
@@ -0,0 +1,37 @@
+"""Tests of the registry of the metrics of the metrics module."""
+
+import math
+
+import pytest
+
+from src import metrics, readability, sophistication
+
+TEXT = (
+    "De partij wil betere zorg voor ouderen en jongeren. Iedereen verdient een betaalbare woning in een veilige "
+    "buurt. Daarom bouwen we meer huizen, investeren we in het onderwijs en verlagen we de belasting op arbeid. "
+    "Het klimaat vraagt om schone energie, zodat onze kinderen later ook in een leefbaar land kunnen wonen."
+)
+"""A text that is long enough for every metric"""
+
+
+def test_compute_all_metrics(nlp, tmp_path, monkeypatch):
+    """Every registered metric is computed, the metrics that need the frequency table are NaN without it."""
+    monkeypatch.setattr(sophistication, "TABLE_PATH", str(tmp_path / "lemmas.npz"))
+
+    values = metrics.compute_metrics(nlp(TEXT))
+
+    assert list(values) == list(metrics.PROGRAM_METRICS)
+    assert all(isinstance(value, float) for value in values.values())
+    assert all(math.isnan(values[name]) == (name in sophistication.TABLE_METRICS) for name in values)
+
+
+def test_compute_selected_metrics(nlp):
+    """Only the selected metrics are computed, with the functions they are registered with."""
+    doc = nlp(TEXT)
+
+    assert metrics.compute_metrics(doc, ["average_sentence_length"]) == {
+        "average_sentence_length": readability.average_sentence_length(doc)
+    }
+
+    with pytest.raises(KeyError):
+        metrics.compute_metrics(doc, ["unknown"])
@@ -0,0 +1,162 @@
+"""Tests of the pdf extraction backends of the pdf_backends module, on small generated pdf files."""
+
+import pytest
+
+from src import compare_backends, pdf_backends
+
+
+def write_pdf(path, pages: list[list[tuple[float, str]]]) -> None:
+    """Write a pdf file with a line of text at each given height of each page, 0 is the bottom and 792 the top."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+
+    for i, lines in enumerate(pages):
+        content = "\n".join(f"BT /F1 12 Tf 72 {y} Td ({text}) Tj ET" for y, text in lines)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+
+    data, offsets = b"%PDF-1.4\n", []
+    for number, content in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{content}\nendobj\n".encode("latin-1")
+
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+
+    path.write_bytes(data)
+
+
+@pytest.fixture(name="pdf_path")
+def fixture_pdf_path(tmp_path):
+    """A pdf file of three pages with a line of text each."""
+    path = tmp_path / "program.pdf"
+    write_pdf(path, [[(400, f"Hoofdstuk {i}")] for i in range(1, 4)])
+    return str(path)
+
+
+@pytest.mark.parametrize("name", list(pdf_backends.BACKENDS))
+def test_backends_extract_each_page(pdf_path, name):
+    """Every backend extracts the text of each page, also of a range of pages."""
+    if not pdf_backends.BACKENDS[name].is_available():
+        pytest.skip(f"The package of the {name} backend is not installed")
+
+    backend = pdf_backends.get_backend(name)
+
+    assert backend.page_count(pdf_path) == 3
+    assert [page.strip() for page in backend.extract_pages(pdf_path)] == ["Hoofdstuk 1", "Hoofdstuk 2", "Hoofdstuk 3"]
+    assert [page.strip() for page in backend.extract_pages(pdf_path, 1, 2)] == ["Hoofdstuk 2"]
+
+
+def test_get_backend(monkeypatch):
+    """Unknown backends and backends of which the package is not installed are reported."""
+    with pytest.raises(ValueError):
+        pdf_backends.get_backend("unknown")
+
+    monkeypatch.setattr(pdf_backends.PdfiumBackend, "is_available", classmethod(lambda cls: False))
+    with pytest.raises(ImportError):
+        pdf_backends.get_backend("pdfium")
+
+
+def test_backend_for_tags():
+    """The tags of a program select its backend, other tags are ignored."""
+    assert pdf_backends.backend_for_tags(["Concept"], "pypdf") == "pypdf"
+    assert pdf_backends.backend_for_tags(["Concept", "Pdfium"], "pypdf") == "pdfium"
+
+    with pytest.raises(ValueError):
+        pdf_backends.backend_for_tags(["Pdfium", "Mupdf"], "pypdf")
+
+
+def test_fingerprints_differ_per_backend():
+    """The fingerprint of a backend distinguishes the backends, so their texts are cached separately."""
+    parts = [backend().fingerprint_parts() for backend in pdf_backends.BACKENDS.values() if backend.is_available()]
+    assert len(set(map(repr, parts))) == len(parts)
+
+
+def test_word_overlap():
+    """The overlap ignores whitespace and the order of the words, and is relative to the longest text."""
+    assert compare_backends.word_overlap("Wij  kiezen\nvoor zorg", "voor zorg wij kiezen") == 0.75
+    assert compare_backends.word_overlap("a b", "a b c d") == 0.5
+    assert compare_backends.word_overlap("", " ") == 1.0
+
+
+def test_compare_backends(pdf_path, tmp_path):
+    """Every file is extracted with each backend and compared to the reference, failures are counted."""
+    missing = str(tmp_path / "missing.pdf")
+
+    reports, rows = compare_backends.compare([pdf_path, missing], ["layout", "pypdf"], "pypdf")
+
+    assert [report.backend for report in reports] == ["pypdf", "layout"]
+    assert all(report.files == 2 and report.failures == 1 and report.pages == 3 for report in reports)
+    assert all(report.mean_overlap == 1.0 for report in reports)
+    assert len(rows) == 4 and rows[-1][0] == missing and rows[-1][-1]
+
+
+def test_shard_ranges_cover_the_pages():
+    """The ranges are contiguous, cover every page once and are not smaller than MIN_PAGES_PER_SHARD."""
+    for page_count, workers in [(60, 2), (61, 4), (500, 3), (1000, 64)]:
+        ranges = pdf_backends.shard_ranges(page_count, workers)
+
+        assert ranges[0][0] == 0 and ranges[-1][1] == page_count
+        assert all(stop == start for (_, stop), (start, _) in zip(ranges, ranges[1:]))
+        assert len(ranges) <= workers * pdf_backends.SHARDS_PER_WORKER
+        assert min(stop - start for start, stop in ranges) >= pdf_backends.MIN_PAGES_PER_SHARD
+
+
+def test_sharded_extraction_equals_serial(tmp_path):
+    """Extracting the pages of a large file in ranges in several processes gives the same text as serial extraction,
+    also for a backend that cannot be sharded."""
+    path = tmp_path / "large.pdf"
+    write_pdf(path, [[(700, f"Pagina {i}"), (400, f"Tekst van pagina {i}")] for i in range(75)])
+
+    for name in ("pypdf", "layout"):
+        backend = pdf_backends.get_backend(name)
+        serial = backend.extract_pages(str(path))
+
+        assert len(serial) == 75
+        assert pdf_backends.extract_pages_sharded(backend, str(path), workers=3) == serial
+
+
+def test_layout_drops_repeating_margins(tmp_path):
+    """Running headers and page numbers in the margins are dropped, text in the body is kept even when it repeats,
+    and text in the margins that does not repeat is kept."""
+    path = tmp_path / "program.pdf"
+    write_pdf(
+        path,
+        [
+            [(760, "Verkiezingsprogramma 2023"), (400, "Samen vooruit"), (400, f"Hoofdstuk {i}"), (30, f"{i + 1}")]
+            for i in range(5)
+        ]
+        + [[(760, "Bijlage"), (400, "Samen vooruit")]],
+    )
+
+    pages = pdf_backends.get_backend("layout").extract_pages(str(path))
+
+    assert len(pages) == 6
+    assert not any("Verkiezingsprogramma" in page for page in pages)
+    assert all("Samen vooruit" in page for page in pages)
+    assert "Hoofdstuk 3" in pages[3] and "4" not in pages[3]
+    assert "Bijlage" in pages[5]
+
+
+def test_strip_repeating_margins_needs_enough_repeats():
+    """A fragment in a margin is only dropped when it repeats on enough pages, in the same band."""
+    fragment = pdf_backends.MarginFragment
+
+    pages = [[fragment("Kop", "top"), fragment("Tekst", None)] for _ in range(2)]
+    assert pdf_backends.strip_repeating_margins(pages) == ["KopTekst", "KopTekst"]
+
+    pages = [[fragment("Kop", "top" if i % 2 else "bottom"), fragment("Tekst", None)] for i in range(4)]
+    assert pdf_backends.strip_repeating_margins(pages) == ["KopTekst"] * 4
+
+    pages = [[fragment("Kop", "top"), fragment(f"Pagina {i}", "bottom")] for i in range(4)]
+    assert pdf_backends.strip_repeating_margins(pages) == [""] * 4
@@ -0,0 +1,58 @@
+"""Tests of the probe of the preflight module that detects pdf files without a usable text layer."""
+
+import pytest
+
+from src import preflight
+from src.pdf_backends import PdfBackend
+
+TEXT_PAGE = "Wij kiezen voor betaalbare zorg, goed onderwijs en een veilig land voor iedereen. " * 5
+"""The text of a page with a usable text layer"""
+
+
+class PagesBackend(PdfBackend):
+    """A backend that returns the given text for each page, instead of reading a pdf file."""
+
+    name = "pages"
+    package = "pytest"
+
+    def __init__(self, pages: list[str]) -> None:
+        self.pages = pages
+        self.extracted: list[int] = []
+
+    def page_count(self, path: str) -> int:
+        return len(self.pages)
+
+    def extract_pages(self, path: str, start: int = 0, stop: int | None = None) -> list[str]:
+        self.extracted.extend(range(start, len(self.pages) if stop is None else stop))
+        return self.pages[start:stop]
+
+
+def test_sample_pages():
+    """The sampled pages are spread over the file and include the first and the last page."""
+    assert preflight.sample_pages(3) == [0, 1, 2]
+    assert preflight.sample_pages(101) == [0, 25, 50, 75, 100]
+    assert preflight.sample_pages(6, 3) == [0, 2, 5]
+
+
+def test_measure_text():
+    """Whitespace is not counted, characters outside words of two or more letters are garbage."""
+    assert preflight.measure_text("De zorg  gaat\nvoor, 2024!") == (20, 6)
+
+
+@pytest.mark.parametrize(
+    "pages, verdict",
+    [
+        ([TEXT_PAGE] * 40, "text"),
+        (["", "3", ""] + [TEXT_PAGE] * 2, "scanned"),
+        (["\x01\x02 \x03 %$ & a " * 30] * 10, "garbled"),
+    ],
+)
+def test_probe(pages, verdict):
+    """The probe only extracts the sampled pages and classifies the file by their text."""
+    backend = PagesBackend(pages)
+
+    result = preflight.probe("program.pdf", backend)
+
+    assert result.verdict == verdict and result.extractable == (verdict == "text")
+    assert result.pages == len(pages) and backend.extracted == preflight.sample_pages(len(pages))
+    assert verdict in str(result)
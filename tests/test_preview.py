@@ -0,0 +1,66 @@
+"""Tests of the preview of the readability from a stratified sample of the sentences of the preview module."""
+
+import numpy as np
+import pytest
+
+from src import preview, readability
+
+SENTENCES = [
+    "Wij willen betere zorg.",
+    "Iedereen verdient een betaalbare woning in een veilige buurt!",
+    "Daarom bouwen we meer huizen.",
+    "Het klimaat vraagt om schone energie en om een eerlijke verdeling van de lasten?",
+    "Onderwijs is de basis.",
+]
+"""Sentences of different lengths, repeated to make a text"""
+
+TEXT = " ".join(SENTENCES[i % len(SENTENCES)] for i in range(300))
+
+
+def test_split_sentences():
+    """A text is split after the punctuation that ends a sentence."""
+    assert preview.split_sentences(" ".join(SENTENCES) + "\n ") == SENTENCES
+
+
+def test_stratified_sample():
+    """Every stratum gets a share of the sample in proportion to its size, drawn from its own sentences."""
+    samples = preview.stratified_sample(1000, 100, 8, np.random.default_rng(0))
+
+    assert len(samples) == 8 and sum(size for size, _ in samples) == 1000
+    assert all(abs(len(sample) - 100 * size / 1000) <= 1 for size, sample in samples)
+
+    start = 0
+    for size, sample in samples:
+        assert len(set(sample.tolist())) == len(sample) and start <= sample.min() and sample.max() < start + size
+        start += size
+
+    assert [len(sample) for _, sample in preview.stratified_sample(5, 100, 10, np.random.default_rng(0))] == [1] * 5
+
+
+def test_sample_of_the_whole_text_is_exact(nlp):
+    """When every sentence is sampled, the estimate is the statistic of the text and has no error."""
+    doc = nlp(TEXT)
+
+    estimates = preview.preview_text(TEXT, nlp, sample_size=1000, resamples=50)
+
+    assert [e.statistic for e in estimates] == [
+        "flesch_douma_index",
+        "average_sentence_length",
+        "average_syllables_per_word",
+    ]
+    assert estimates[0].estimate == pytest.approx(readability.flesch_douma_index(doc))
+    assert estimates[1].estimate == pytest.approx(readability.average_sentence_length(doc))
+    assert all(e.standard_error == 0 and e.sampled_sentences == e.sentences == 300 for e in estimates)
+
+
+def test_sample_estimates_the_statistic(nlp):
+    """The estimate from a sample is close to the statistic of the text, which lies within the confidence interval."""
+    exact = readability.average_sentence_length(nlp(TEXT))
+
+    (estimate,) = preview.preview_text(TEXT, nlp, statistics=["average_sentence_length"], sample_size=60, seed=3)
+
+    assert estimate.sampled_sentences == 60 and estimate.standard_error > 0
+    assert estimate.ci_low <= exact <= estimate.ci_high
+
+    with pytest.raises(ValueError):
+        preview.preview_text("  ", nlp)
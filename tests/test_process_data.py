@@ -0,0 +1,176 @@
+"""Tests of the programs and the snapshots of the corpus of the process_data module, on the programs in the data
+folder."""
+
+import threading
+import time
+
+import pytest
+
+from src import process_data
+from src.preflight import NotExtractableError
+
+
+def refresh(monkeypatch, tmp_path, failures=lambda programs: [], seconds: float = 0.0):
+    """Refresh the corpus in the background without processing the programs, the given failures are reported by the
+    processing. The snapshot of the corpus is restored after the test."""
+    monkeypatch.setattr(process_data, "_snapshot", process_data.current_snapshot())
+    monkeypatch.setattr(process_data, "_processed_journal_path", str(tmp_path / "run.journal"))
+
+    def process_programs(programs, **_kwargs):
+        time.sleep(seconds)
+        return failures(programs)
+
+    monkeypatch.setattr(process_data, "process_programs", process_programs)
+    return process_data.refresh_in_background()
+
+
+def test_readers_see_complete_snapshots(monkeypatch, tmp_path):
+    """While a refresh runs, readers see the current snapshot, then the refreshed snapshot as a whole. The programs
+    of which the pdf file did not change are taken over."""
+    before = process_data.current_snapshot()
+    seen: list[tuple[process_data.CorpusSnapshot, int]] = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            snapshot = process_data.current_snapshot()
+            seen.append((snapshot, len(snapshot.select(election_type="TK", joined_issue=None))))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+
+    try:
+        after = refresh(monkeypatch, tmp_path, seconds=0.2).result(timeout=60)
+    finally:
+        stop.set()
+        reader.join()
+
+    assert after is process_data.current_snapshot()
+    assert after.processed and after.version == before.version + 1
+    assert seen[0][0] is before and all(snapshot is before or snapshot is after for snapshot, _ in seen)
+    assert all(selected == len(snapshot.programs) for snapshot, selected in seen)
+    assert set(map(id, after.programs)) == set(map(id, before.programs))
+
+
+def test_failed_refresh_keeps_the_snapshot(monkeypatch, tmp_path):
+    """A refresh of which a program fails does not publish a snapshot, programs without a usable text layer are
+    left out of the refreshed snapshot."""
+    before = process_data.current_snapshot()
+
+    future = refresh(monkeypatch, tmp_path, lambda programs: [(programs[0], ValueError("broken"))])
+    assert isinstance(future.exception(timeout=60), RuntimeError)
+    assert process_data.current_snapshot() is before
+
+    scanned = []
+
+    def skip(programs):
+        scanned.append(programs[0])
+        return [(programs[0], NotExtractableError(f"{programs[0]} looks scanned"))]
+
+    after = refresh(monkeypatch, tmp_path, skip).result(timeout=60)
+    assert len(after.programs) == len(before.programs) - 1 and scanned[0] not in after.programs
+
+
+def test_select_uses_the_indexes():
+    """A selection through the indexes equals a selection over all programs."""
+    snapshot = process_data.current_snapshot()
+    programs = [p for p in snapshot.programs if p.election_date == "2023-11" and not p.joined_issue]
+
+    assert snapshot.select(election_date="2023-11") == programs
+    assert snapshot.select(election_date="2023-11", party="SP") == [p for p in programs if p.party == "SP"]
+    assert snapshot.select(election_type="TK", region="Utrecht") == []
+
+
+def test_corpus_is_identified_on_first_use(tmp_path, monkeypatch):
+    """The programs are identified when the corpus is first used, the listings of the folders are only written to a
+    file when it is passed."""
+    cache_path = tmp_path / "discovery.json"
+    monkeypatch.setattr(process_data, "_snapshot", None)
+
+    snapshot = process_data.current_snapshot()
+    assert snapshot.programs and not snapshot.processed
+    assert process_data.load_corpus(str(cache_path)) is snapshot and not cache_path.exists()
+
+    monkeypatch.setattr(process_data, "_snapshot", None)
+    programs = process_data.load_corpus(str(cache_path)).programs
+    assert [p.reference("pdf") for p in programs] == [p.reference("pdf") for p in snapshot.programs]
+    assert cache_path.exists()
+
+
+def test_programs_of_regional_elections(tmp_path):
+    """The programs of municipal and provincial elections get the region of their folder, which distinguishes their
+    references and can be selected."""
+    for path in ["TK/2023-11/VVD.pdf", "GR/2022-03/Utrecht/VVD #Concept.pdf", "GR/2022-03/Zeist/VVD.pdf"]:
+        (tmp_path / "manifests" / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "manifests" / path).write_bytes(b"%PDF-1.4\n")
+
+    programs = process_data.identify_programs(str(tmp_path / "manifests"))
+
+    assert [(p.election_type, p.region, p.tags) for p in programs] == [
+        ("GR", "Utrecht", ["Concept"]),
+        ("GR", "Zeist", []),
+        ("TK", None, []),
+    ]
+    assert len({p.reference("txt") for p in programs}) == 3
+
+    snapshot = process_data.CorpusSnapshot(tuple(programs))
+    assert snapshot.select(party="VVD", region="Zeist") == [programs[1]]
+    assert snapshot.select(party="VVD", election_type="GR") == programs[:2]
+
+
+def test_released_programs_are_reloaded(monkeypatch):
+    """A released program drops its text and doc, which are reloaded from the cache when they are accessed."""
+    program = process_data.Program("TK", "VVD", "2023-11", [], "VVD.pdf")
+    program.text = "De tekst."
+
+    loads = []
+
+    def retrieve_text_from_pdf(self):
+        loads.append(self)
+        self.text = "De tekst."
+
+    monkeypatch.setattr(process_data.Program, "retrieve_text_from_pdf", retrieve_text_from_pdf)
+
+    assert program.text == "De tekst." and not loads
+
+    program.release()
+    assert program.text == "De tekst." and loads == [program]
+    assert program.text == "De tekst." and len(loads) == 1
+
+
+def test_memory_ceiling_and_limit(monkeypatch, capsys):
+    """Crossing the memory ceiling releases the processed programs and the run finishes in streaming mode, crossing
+    the memory limit stops the run."""
+    programs = [process_data.Program("TK", party, "2023-11", [], f"{party}.pdf") for party in ["VVD", "SP", "D66"]]
+    processed = []
+
+    def retrieve_text_from_pdf(self):
+        processed.append(self)
+        self.text = "De tekst."
+
+    monkeypatch.setattr(process_data.Program, "retrieve_text_from_pdf", retrieve_text_from_pdf)
+    monkeypatch.setattr(process_data.Program, "create_doc_from_text", lambda self: None)
+    monkeypatch.setattr(process_data, "_is_published", lambda program: False)
+
+    assert process_data.process_programs(programs, memory_ceiling=1) == []
+    assert processed == programs
+    assert "Memory ceiling exceeded, releasing the 1 processed programs" in capsys.readouterr().out
+
+    with pytest.raises(MemoryError):
+        process_data.process_programs(programs, memory_ceiling=1, memory_limit=1)
+
+
+def test_duplicate_groups(tmp_path):
+    """Programs with identical pdf files are grouped, the hash of a file is computed again when the file changes."""
+    for path in ["TK/2021-03/VVD.pdf", "TK/2023-11/VVD.pdf", "TK/2023-11/SP.pdf", "TK/2025-10/VVD.pdf"]:
+        (tmp_path / "manifests" / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "manifests" / path).write_bytes(b"%PDF-1.4\nVVD\n")
+    (tmp_path / "manifests" / "TK/2023-11/SP.pdf").write_bytes(b"%PDF-1.4\nSP\n")
+
+    programs = process_data.identify_programs(str(tmp_path / "manifests"))
+    vvd = [p for p in programs if p.party == "VVD"]
+
+    assert process_data.duplicate_groups(programs) == [vvd]
+
+    (tmp_path / "manifests" / "TK/2025-10/VVD.pdf").write_bytes(b"%PDF-1.4\nVVD 2025\n")
+    assert process_data.duplicate_groups(programs) == [[p for p in vvd if p.election_date != "2025-10"]]
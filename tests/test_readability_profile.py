@@ -0,0 +1,77 @@
+"""Tests of the rolling readability profiles of the readability_profile module."""
+
+import numpy as np
+import pytest
+
+from src import readability, readability_profile
+from src.readability import SentenceArrays
+
+TEXT = (
+    "De partij wil betere zorg. Iedereen verdient een betaalbare woning in een veilige buurt. Wij bouwen huizen. "
+    "Het klimaat vraagt om schone energie voor onze kinderen. Onderwijs is belangrijk. De belasting op arbeid gaat "
+    "omlaag, zodat werken loont."
+)
+"""A text of six sentences of different lengths"""
+
+
+def make_arrays(words: list[int]) -> SentenceArrays:
+    """Sentence arrays with the given number of words per sentence, one punctuation token and two syllables a word."""
+    words_array = np.array(words, dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(words_array * 10)[:-1]]).astype(np.int64)
+    return SentenceArrays(words_array + 1, words_array, 2 * words_array, starts)
+
+
+def test_window_bounds():
+    """Windows in sentences have a fixed number of sentences, windows in words end at the sentence at which they
+    have enough words. Windows that would run past the end are left out."""
+    arrays = make_arrays([3, 5, 2, 4, 6])
+
+    starts, ends = readability_profile.window_bounds(arrays, 2)
+    assert starts.tolist() == [0, 1, 2, 3] and ends.tolist() == [2, 3, 4, 5]
+
+    starts, ends = readability_profile.window_bounds(arrays, 3, step=2)
+    assert starts.tolist() == [0, 2] and ends.tolist() == [3, 5]
+
+    starts, ends = readability_profile.window_bounds(arrays, 8, unit="words")
+    assert starts.tolist() == [0, 1, 2, 3] and ends.tolist() == [2, 4, 5, 5]
+
+    with pytest.raises(ValueError):
+        readability_profile.window_bounds(arrays, 2, unit="pages")
+
+
+def test_profile_equals_the_readability_of_each_window(nlp):
+    """The readability of a window is the readability of the text of its sentences."""
+    doc = nlp(TEXT)
+    sentences = list(doc.sents)
+
+    profile = readability_profile.rolling_profile(readability.sentence_arrays(doc), 3)
+
+    assert len(profile.start_sentence) == len(sentences) - 2
+    for i, (start, end) in enumerate(zip(profile.start_sentence, profile.end_sentence)):
+        window = nlp(" ".join(sentence.text for sentence in sentences[start:end]))
+
+        assert profile.start_offset[i] == sentences[start].start_char
+        assert profile.average_sentence_length[i] == pytest.approx(readability.average_sentence_length(window))
+        assert profile.flesch_douma_index[i] == pytest.approx(readability.flesch_douma_index(window))
+
+
+def test_pages_of_the_windows():
+    """Each window is on the page of its first sentence, or on page -1 without page offsets."""
+    arrays = make_arrays([3, 5, 2, 4])
+
+    profile = readability_profile.rolling_profile(arrays, 1, page_offsets=[0, 50, 100])
+    assert profile.start_offset.tolist() == [0, 30, 80, 100] and profile.page.tolist() == [0, 0, 1, 2]
+
+    assert readability_profile.rolling_profile(arrays, 1).page.tolist() == [-1] * 4
+    assert len(readability_profile.rolling_profile(arrays, 5).page) == 0
+
+
+def test_export_round_trip(tmp_path):
+    """An exported profile is loaded back unchanged."""
+    profile = readability_profile.rolling_profile(make_arrays([3, 5, 2, 4, 6]), 2)
+    path = str(tmp_path / "profile.npz")
+
+    readability_profile.export_profile(profile, path)
+    loaded = readability_profile.load_profile(path)
+
+    assert all(np.array_equal(a, b) for a, b in zip(profile, loaded))
@@ -0,0 +1,104 @@
+"""Tests of the detection of reused sentences of the reuse module."""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from src import reuse
+
+SOURCE = [
+    "Wij investeren in goed onderwijs voor alle kinderen in het hele land.",
+    "De zorg moet betaalbaar blijven voor iedereen die haar nodig heeft.",
+    "Daarom bouwen wij de komende jaren honderdduizend nieuwe betaalbare woningen.",
+    "Het openbaar vervoer wordt goedkoper zodat meer mensen de auto laten staan.",
+    "Boeren krijgen een eerlijke prijs voor hun producten en steun bij de omschakeling.",
+    "De belasting op arbeid gaat omlaag zodat werken weer loont voor iedereen.",
+]
+"""The sentences of the source program"""
+
+OTHER = [
+    "Defensie krijgt meer geld om de veiligheid van ons land te garanderen.",
+    "Ondernemers worden minder lastig gevallen met regels en formulieren van de overheid.",
+]
+"""Sentences of another source program"""
+
+
+def fingerprints(nlp, sentences: list[str]) -> reuse.SentenceFingerprints:
+    """The fingerprints of a text of the sentences."""
+    return reuse.sentence_fingerprints(nlp(" ".join(sentences)))
+
+
+def test_exact_and_near_matches(nlp):
+    """Sentences are matched regardless of case and punctuation, sentences with a changed word nearly match,
+    short sentences are not matched, and consecutive matches form a passage."""
+    program = [
+        "Wij willen dat Nederland een land blijft waar iedereen zich thuis voelt en mee kan doen.",
+        "Kort.",
+        "De zorg moet betaalbaar blijven, voor iedereen die haar nodig heeft!",
+        "daarom bouwen wij de komende jaren honderdduizend nieuwe betaalbare woningen.",
+        "Het openbaar vervoer wordt veel goedkoper zodat meer mensen de auto laten staan.",
+        "De belasting op arbeid gaat omlaag zodat werken weer loont voor iedereen.",
+    ]
+
+    report = reuse.compare_fingerprints(fingerprints(nlp, program), fingerprints(nlp, SOURCE))
+
+    assert report.matches.tolist() == [-1, -1, 1, 2, 3, 5]
+    assert (report.sentences, report.exact, report.near) == (5, 3, 1)
+    assert report.reused_ratio == 0.8
+    assert report.passages == [reuse.Passage(2, 1, 3)]
+
+    exact_only = reuse.compare_fingerprints(fingerprints(nlp, program), fingerprints(nlp, SOURCE), None)
+    assert exact_only.matches.tolist() == [-1, -1, 1, 2, -1, 5] and exact_only.near == 0
+
+
+def test_aligned_passages():
+    """A passage continues while the matches are consecutive, and is left out when it is too short."""
+    matches = np.array([-1, 4, 5, 6, 2, 3, -1, 8, 0])
+
+    assert reuse.aligned_passages(matches) == [reuse.Passage(1, 4, 3), reuse.Passage(4, 2, 2)]
+    assert reuse.aligned_passages(matches, 1)[-2:] == [reuse.Passage(7, 8, 1), reuse.Passage(8, 0, 1)]
+    assert reuse.aligned_passages(np.array([], dtype=np.int64)) == []
+
+
+def test_attribute_sentences(nlp):
+    """The sentences of a joined program are attributed to the member program they are taken from."""
+    program = [SOURCE[0], OTHER[1], "Een geheel nieuwe zin over de toekomst van het land en haar bewoners.", OTHER[0]]
+
+    attributed = reuse.attribute_sentences(
+        fingerprints(nlp, program), [fingerprints(nlp, SOURCE), fingerprints(nlp, OTHER)]
+    )
+
+    assert attributed.tolist() == [0, 1, -1, 1]
+
+
+def test_fingerprints_round_trip(nlp):
+    """The fingerprints are restored unchanged after serialization."""
+    original = fingerprints(nlp, SOURCE)
+    restored = reuse.fingerprints_from_bytes(reuse.fingerprints_to_bytes(original))
+
+    assert all(np.array_equal(a, b) for a, b in zip(original, restored))
+
+
+def test_source_programs():
+    """The sources are the latest earlier programs of the members of the party, in the same region, without tags
+    when possible."""
+
+    def program(party: str, date: str, region: str | None = None, tags: list[str] | None = None) -> SimpleNamespace:
+        return SimpleNamespace(
+            election_type="TK", election_date=date, region=region, party=SimpleNamespace(name=party), tags=tags or []
+        )
+
+    joined = program("GL+PvdA", "2023-11")
+    candidates = [
+        program("PvdA", "2017-03"),
+        program("PvdA", "2021-03", tags=["Concept"]),
+        program("PvdA", "2021-03"),
+        program("GL", "2021-03"),
+        program("GL", "2021-03", region="Utrecht"),
+        program("GL", "2025-10"),
+        joined,
+    ]
+
+    assert reuse.source_programs(joined, candidates) == [candidates[3], candidates[2]]
+    assert reuse.source_programs(program("GL", "2023-11", "Utrecht"), candidates) == [candidates[4]]
+    assert reuse.source_programs(program("GL", "2017-03"), candidates) == []
@@ -0,0 +1,127 @@
+"""Tests of the local analysis service of the service module, on the programs in the data folder."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+
+from src import service
+from src.preflight import NotExtractableError
+
+
+@pytest.fixture(scope="module", name="server")
+def fixture_server():
+    """The analysis service, served on a free port in a background thread."""
+    server = service.AnalysisServer(("127.0.0.1", 0), service.AnalysisService(cache_size=8))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, path: str, body: dict | None = None) -> tuple[int, object]:
+    """Send a request to the service and return the status and the json response."""
+    url = f"http://127.0.0.1:{server.server_port}{path}"
+    data = None if body is None else json.dumps(body).encode("utf-8")
+
+    try:
+        with urllib.request.urlopen(url, data) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def test_response_cache():
+    """The least recently used response is removed when the cache is full, a cache of size 0 keeps nothing."""
+    cache = service.ResponseCache(2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+
+    cache.put("c", b"3")
+    assert cache.get("b") is None and cache.get("a") == b"1" and cache.get("c") == b"3"
+
+    disabled = service.ResponseCache(0)
+    disabled.put("a", b"1")
+    assert disabled.get("a") is None
+
+
+def test_stats():
+    """Requests, errors and cache hits are counted per endpoint."""
+    stats = service.ServiceStats()
+    stats.record("/metrics", 0.2)
+    stats.record("/metrics", 0.1, cached=True)
+    stats.record("/analyze", 0.3, error=True)
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["requests"] == 3
+    assert snapshot["endpoints"]["/metrics"]["cache_hits"] == 1
+    assert snapshot["endpoints"]["/analyze"]["errors"] == 1
+    assert snapshot["endpoints"]["/metrics"]["latency_ms"]["max"] == pytest.approx(200)
+
+
+def test_model_is_only_locked_to_create_the_doc():
+    """The text of a program is retrieved without holding the lock of the model, the doc is created with it."""
+    analysis = service.AnalysisService(cache_size=0)
+    nlp_lock = analysis._nlp_lock  # pylint: disable=protected-access
+    locked: list[tuple[str, bool]] = []
+
+    program = SimpleNamespace(
+        reference=lambda extension: "TK-Partij-2023-11.pdf",
+        retrieve_text_from_pdf=lambda: locked.append(("text", nlp_lock.locked())),
+        create_doc_from_text=lambda: locked.append(("doc", nlp_lock.locked())),
+        doc="doc",
+    )
+
+    assert analysis._load(program) == "doc"  # pylint: disable=protected-access
+    assert locked == [("text", False), ("doc", True)]
+
+
+def test_programs_and_errors(server):
+    """Programs are selected with the filters, invalid requests are answered with their status."""
+    status, programs = request(server, "/programs?party=GroenLinks-PvdA&election_date=2023-11")
+    assert status == 200 and [p["reference"] for p in programs] == ["TK-GroenLinks-PvdA-2023-11.pdf"]
+
+    assert request(server, "/programs?joined=maybe")[0] == 400
+    assert request(server, "/metrics?metric=unknown")[0] == 400
+    assert request(server, "/unknown")[0] == 404
+    assert request(server, "/health")[1]["status"] == "ok"
+
+
+def test_analyze_is_cached(server):
+    """An ad-hoc text is analyzed, the same request is answered from the cache."""
+    body = {"text": "Dit is een zin. Dit is nog een zin.", "metrics": ["average_sentence_length"]}
+
+    status, result = request(server, "/analyze", body)
+    assert status == 200 and result["sentences"] == 2
+    assert request(server, "/analyze", body)[1] == result
+    assert request(server, "/analyze", {"metrics": []})[0] == 400
+
+    assert server.service.stats.snapshot()["endpoints"]["/analyze"]["cache_hits"] == 1
+
+
+def test_scanned_programs_do_not_fail_the_request(server, monkeypatch):
+    """A program without a usable text layer is reported with an error, the other programs with their metrics."""
+
+    def program_metrics(program, names):
+        if program.party.name == "SP":
+            raise NotExtractableError(f"{program} looks scanned")
+        return {name: 1.0 for name in names}
+
+    monkeypatch.setattr(server.service, "program_metrics", program_metrics)
+
+    status, results = request(server, "/metrics?election_date=2023-11&metric=flesch_douma_index&tag=unused")
+    assert status == 200 and results == []
+
+    status, results = request(server, "/metrics?election_type=TK&election_date=2023-11&metric=flesch_douma_index")
+    assert status == 200 and results
+    assert all(("error" in r) == (r["party"] == "SP") for r in results)
+    assert sum("error" in r for r in results) == 1
+    assert all(r["metrics"] == {"flesch_douma_index": 1.0} for r in results if "error" not in r)
@@ -0,0 +1,109 @@
+"""Tests of the vectorized permutation test and bootstrap of the significance module, against reference loops."""
+
+import time
+
+import numpy as np
+import pytest
+
+from src import readability, significance
+
+
+def sentences(rng: np.random.Generator, count: int, mean_tokens: float) -> readability.SentenceArrays:
+    """Return the counts of random sentences."""
+    tokens = rng.poisson(mean_tokens, count) + 1
+    words = np.maximum(tokens - rng.integers(0, 3, count), 1)
+    syllables = words + rng.poisson(0.6 * words)
+    return readability.SentenceArrays(tokens, words, syllables, np.arange(count))
+
+
+def test_permutation_groups_have_the_sizes_of_the_programs():
+    """Every split puts exactly as many distinct sentences in the first group as the first program has."""
+    # The tokens are distinct powers of two, so the sum identifies the selected sentences
+    pooled = np.column_stack([np.ones(40), 2.0 ** np.arange(40), np.ones(40), np.ones(40)])
+    first_sums, second_sums = significance.permutation_sums(pooled[:15], pooled[15:], 500, np.random.default_rng(0))
+
+    assert (first_sums[:, 0] == 15).all()
+    assert [bin(int(total)).count("1") for total in first_sums[:, 1]] == [15] * 500
+    assert np.allclose(first_sums + second_sums, pooled.sum(axis=0))
+
+    # Only the smaller group is drawn, the larger first group is the rest of the sentences
+    first_sums, second_sums = significance.permutation_sums(pooled[:25], pooled[25:], 500, np.random.default_rng(0))
+    assert (first_sums[:, 0] == 25).all() and (second_sums[:, 0] == 15).all()
+    assert [bin(int(total)).count("1") for total in first_sums[:, 1]] == [25] * 500
+
+
+def test_permutation_matches_reference_loop():
+    """The null distribution of the vectorized splits matches shuffling the pooled sentences one split at a time."""
+    rng = np.random.default_rng(1)
+    first = significance.sentence_matrix(sentences(rng, 60, 12))
+    second = significance.sentence_matrix(sentences(rng, 90, 14))
+    pooled = np.concatenate([first, second])
+    statistic = significance.STATISTICS["average_sentence_length"]
+
+    first_sums, second_sums = significance.permutation_sums(first, second, 4000, np.random.default_rng(2))
+    vectorized = statistic(first_sums) - statistic(second_sums)
+
+    reference_rng = np.random.default_rng(3)
+    reference = []
+    for _ in range(4000):
+        order = reference_rng.permutation(len(pooled))
+        reference.append(statistic(pooled[order[:60]].sum(axis=0)) - statistic(pooled[order[60:]].sum(axis=0)))
+
+    assert np.mean(vectorized) == pytest.approx(np.mean(reference), abs=0.05)
+    assert np.std(vectorized) == pytest.approx(np.std(reference), rel=0.05)
+
+
+def test_bootstrap_matches_reference_loop():
+    """The vectorized bootstrap matches resampling the sentences one resample at a time."""
+    matrix = significance.sentence_matrix(sentences(np.random.default_rng(4), 80, 12))
+    statistic = significance.STATISTICS["flesch_douma_index"]
+
+    sums = significance.bootstrap_sums(matrix, 4000, np.random.default_rng(5))
+    assert (sums[:, 0] == len(matrix)).all()
+
+    reference_rng = np.random.default_rng(6)
+    reference = [
+        statistic(matrix[reference_rng.integers(0, len(matrix), len(matrix))].sum(axis=0)) for _ in range(4000)
+    ]
+
+    assert np.percentile(statistic(sums), [2.5, 97.5]) == pytest.approx(np.percentile(reference, [2.5, 97.5]), rel=0.02)
+
+
+def test_chunks_cover_the_resamples(monkeypatch):
+    """Drawing the resamples in chunks gives as many resamples as requested."""
+    monkeypatch.setattr(significance, "CHUNK_ELEMENTS", 1000)
+    matrix = significance.sentence_matrix(sentences(np.random.default_rng(7), 300, 10))
+
+    first_sums, _ = significance.permutation_sums(matrix[:100], matrix[100:], 25, np.random.default_rng(8))
+    assert first_sums.shape == (25, 4)
+    assert significance.bootstrap_sums(matrix, 25, np.random.default_rng(9)).shape == (25, 4)
+
+
+def test_compare_sentences():
+    """Different programs are significantly different, a program is not different from itself, and the comparison
+    is reproducible with the same seed."""
+    rng = np.random.default_rng(10)
+    short, long = sentences(rng, 200, 8), sentences(rng, 200, 20)
+
+    different = significance.compare_sentences(short, long, statistics=["average_sentence_length"], resamples=500)[0]
+    assert different.p_value == pytest.approx(1 / 501)
+    assert different.ci_low < different.difference < different.ci_high < 0
+
+    same = significance.compare_sentences(short, short, resamples=500)
+    assert all(c.difference == 0 and c.p_value == 1 for c in same)
+
+    assert significance.compare_sentences(short, long, seed=3) == significance.compare_sentences(short, long, seed=3)
+
+    with pytest.raises(ValueError):
+        significance.compare_sentences(short, sentences(rng, 0, 8))
+
+
+def test_comparison_cost():
+    """A comparison of programs of 6000 and 8000 sentences with the default 2000 resamples takes about 0.6 seconds,
+    the bound leaves room for slower machines."""
+    rng = np.random.default_rng(11)
+    first, second = sentences(rng, 6000, 15), sentences(rng, 8000, 17)
+
+    start = time.perf_counter()
+    significance.compare_sentences(first, second)
+    assert time.perf_counter() - start < 2
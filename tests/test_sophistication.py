@@ -0,0 +1,98 @@
+"""Tests of the lemma frequency table and the lexical sophistication metrics of the sophistication module."""
+
+import io
+import math
+
+import numpy as np
+import pytest
+import spacy
+from spacy.tokens import Doc
+
+from src import sophistication
+
+nlp = spacy.blank("nl")
+
+
+def make_doc(lemmas: list[str]) -> Doc:
+    """Return a doc of which the words are the lemmas."""
+    return Doc(nlp.vocab, words=lemmas, lemmas=lemmas)
+
+
+@pytest.fixture(name="table_path")
+def fixture_table_path(tmp_path, monkeypatch):
+    """Use a frequency table in a temporary folder instead of the table of the corpus."""
+    path = str(tmp_path / "lemmas.npz")
+    monkeypatch.setattr(sophistication, "TABLE_PATH", path)
+    monkeypatch.setattr(sophistication, "_tables", {})
+    return path
+
+
+def test_lemma_counts_are_lowercase():
+    """A capitalised lemma is counted together with the same lemma in lowercase, punctuation is not counted."""
+    counts = sophistication.lemma_counts(make_doc(["Partij", "wil", "partij", "."]))
+
+    assert dict(zip(counts.words.tolist(), counts.counts.tolist())) == {"partij": 2, "wil": 1}
+    assert (np.diff(counts.ids.astype(np.float64)) > 0).all()
+
+
+def test_capitalised_lemmas_are_found_in_a_word_list_table(tmp_path):
+    """A table built from a lowercased word list finds the lemmas of capitalised words, for example at the start of
+    a sentence."""
+    word_list = tmp_path / "words.txt"
+    word_list.write_text("Verkiezing 10\nprogramma 30\n\nprogramma 60\n", encoding="utf-8")
+
+    table = sophistication.build_table([sophistication.word_list_counts(str(word_list))])
+    frequencies = sophistication.content_log_frequencies(make_doc(["Verkiezing", "Programma", "onbekend"]), table)
+
+    assert frequencies.tolist() == pytest.approx([math.log10(10 / 100), math.log10(90 / 100), math.log10(1 / 100)])
+
+
+def test_word_list_with_invalid_line(tmp_path):
+    """A line without a word and a count is reported with its number."""
+    word_list = tmp_path / "words.txt"
+    word_list.write_text("woord 3\nwoord\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="Line 2"):
+        sophistication.word_list_counts(str(word_list))
+
+
+def test_metrics_match_the_table(table_path):
+    """The metrics are the mean negative log10 frequency and the fraction of rare lemmas of the content words, stop
+    words are ignored."""
+    corpus = make_doc(["belasting"] * 999_995 + ["zorg"] * 5)
+    sophistication.write_table(sophistication.build_table([sophistication.lemma_counts(corpus)]), table_path)
+
+    doc = make_doc(["De", "Belasting", "en", "de", "zorg", "."])
+    expected = [-math.log10(999_995 / 1_000_000), -math.log10(5 / 1_000_000)]
+
+    assert sophistication.lexical_sophistication(doc) == pytest.approx(np.mean(expected))
+    assert sophistication.rare_word_ratio(doc) == 0.5
+
+
+def test_metrics_without_table(table_path):
+    """The metrics are NaN without a table or without content words."""
+    assert sophistication.load_table() is None
+    assert math.isnan(sophistication.lexical_sophistication(make_doc(["zorg"])))
+
+    sophistication.write_table(sophistication.build_table([sophistication.lemma_counts(make_doc(["zorg"]))]))
+    assert math.isnan(sophistication.rare_word_ratio(make_doc(["de", "."])))
+
+
+def test_rebuilt_table_is_loaded_again(table_path):
+    """The table is kept in memory until the file changes, a table of another version is ignored."""
+    first = sophistication.build_table([sophistication.lemma_counts(make_doc(["zorg"]))])
+    sophistication.write_table(first, table_path)
+    key = sophistication.table_key()
+
+    assert sophistication.load_table() is sophistication.load_table()
+
+    second = sophistication.build_table([sophistication.lemma_counts(make_doc(["zorg", "wonen"]))])
+    sophistication.write_table(second, table_path)
+
+    assert sophistication.table_key() != key
+    assert len(sophistication.load_table().ids) == 2
+
+    # A table without a version was built with case-sensitive lemmas
+    buffer = io.BytesIO()
+    np.savez(buffer, ids=second.ids, log_frequencies=second.log_frequencies, floor=np.float64(second.floor))
+    assert sophistication.table_from_bytes(buffer.getvalue()) is None
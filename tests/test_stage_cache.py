@@ -0,0 +1,88 @@
+"""Tests of the layered cache of the processing stages of the stage_cache module."""
+
+import hashlib
+import re
+
+from src.stage_cache import Stage, StageCache, fingerprint
+
+
+def upper(data: bytes) -> bytes:
+    """The first stage of the test chain."""
+    return data.upper()
+
+
+def reverse(data: bytes) -> bytes:
+    """The second stage of the test chain."""
+    return data[::-1]
+
+
+def reverse_again(data: bytes) -> bytes:
+    """Another implementation of the second stage."""
+    return bytes(reversed(data))
+
+
+class Recorder:
+    """Records the stages that are computed."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def __call__(self, name, function):
+        def compute(data: bytes) -> bytes:
+            self.calls.append(name)
+            return function(data)
+
+        return compute
+
+
+def test_fingerprint():
+    """Functions are fingerprinted by their source, patterns by their pattern and flags."""
+    assert fingerprint(upper, 1) == fingerprint(upper, 1)
+    assert fingerprint(reverse) != fingerprint(reverse_again)
+    assert fingerprint(upper, 1) != fingerprint(upper, 2)
+    assert fingerprint(re.compile("a")) != fingerprint(re.compile("a", re.I))
+
+
+def test_only_the_changed_stages_are_computed(tmp_path):
+    """The output of the last cached stage is loaded, only the stages after it are computed."""
+    cache, record = StageCache(str(tmp_path)), Recorder()
+    first, second = Stage("upper", fingerprint(upper), "txt"), Stage("reverse", fingerprint(reverse), "txt")
+    source = b"verkiezingen"
+    input_hash = hashlib.sha256(source).hexdigest()
+
+    result = cache.run_chain(
+        [(first, record("upper", upper)), (second, record("reverse", reverse))], input_hash, source
+    )
+    assert result.data == b"NEGNIZEIKREV" and record.calls == ["upper", "reverse"]
+    assert result.output_hash == hashlib.sha256(b"NEGNIZEIKREV").hexdigest()
+
+    # Everything is cached, the chain is followed through the metadata and only the last layer is read
+    record.calls.clear()
+    assert cache.run_chain([(first, record("upper", upper)), (second, record("reverse", reverse))], input_hash).data
+    assert not record.calls
+
+    # A new version of the second stage reuses the output of the first stage
+    changed = Stage("reverse", fingerprint(reverse_again), "txt")
+    result = cache.run_chain([(first, record("upper", upper)), (changed, record("again", reverse_again))], input_hash)
+    assert result.data == b"NEGNIZEIKREV" and record.calls == ["again"]
+
+    # A refresh computes every stage
+    record.calls.clear()
+    cache.run_chain([(first, record("upper", upper)), (second, record("reverse", reverse))], input_hash, source, True)
+    assert record.calls == ["upper", "reverse"]
+
+
+def test_corrupt_layer_is_computed_again(tmp_path):
+    """A corrupt layer is rebuilt from the layer before it."""
+    cache, record = StageCache(str(tmp_path)), Recorder()
+    first, second = Stage("upper", fingerprint(upper), "txt"), Stage("reverse", fingerprint(reverse), "txt")
+    chain = [(first, record("upper", upper)), (second, record("reverse", reverse))]
+
+    cache.run_chain(chain, "input", b"abc")
+    with open(cache.path(second, cache.chain_hashes([first], "input")[0]), "wb") as f:
+        f.write(b"xyz")
+
+    record.calls.clear()
+    assert cache.run_chain(chain, "input", b"abc").data == b"CBA"
+    assert record.calls == ["reverse"]
+    assert cache.chain_hashes([first, second], "other") == [None, None]
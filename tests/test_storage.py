@@ -0,0 +1,75 @@
+"""Tests of the verified artifacts and the run journal of the storage module."""
+
+import os
+
+from src import storage
+
+
+def test_artifact_round_trip(tmp_path):
+    """An artifact is read back as it was written, text is stored as utf-8."""
+    path = str(tmp_path / "program.txt")
+
+    assert storage.read_artifact(path) is None and not storage.has_artifact(path)
+
+    metadata = storage.write_artifact(path, "Wij kiezen voor één land")
+
+    assert storage.has_artifact(path)
+    assert storage.read_metadata(path) == metadata
+    assert storage.read_artifact(path) == "Wij kiezen voor één land".encode("utf-8")
+
+
+def test_corrupt_artifacts_are_removed(tmp_path):
+    """A truncated or changed artifact, or an artifact without metadata, is removed when it is read."""
+    path = str(tmp_path / "program.txt")
+
+    storage.write_artifact(path, b"0123456789")
+    with open(path, "wb") as f:
+        f.write(b"01234")
+    assert not storage.has_artifact(path)
+    assert storage.read_artifact(path) is None
+    assert not os.path.exists(path) and not os.path.exists(path + storage.METADATA_SUFFIX)
+
+    # Same size, other content: only detected when the content is verified
+    storage.write_artifact(path, b"0123456789")
+    with open(path, "wb") as f:
+        f.write(b"9876543210")
+    assert storage.has_artifact(path)
+    assert storage.read_artifact(path) is None
+
+    storage.write_artifact(path, b"0123456789")
+    os.remove(path + storage.METADATA_SUFFIX)
+    assert storage.read_artifact(path) is None
+
+
+def test_journal_resumes_an_interrupted_run(tmp_path):
+    """An interrupted run is resumed in the same order, without the programs that were done."""
+    path = str(tmp_path / "run.journal")
+
+    journal = storage.RunJournal(path)
+    assert journal.start(["b", "a", "c"]) == ["b", "a", "c"] and not journal.resumed
+    journal.record_done("b")
+
+    # The process was killed while writing a record
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"done": "a')
+
+    resumed = storage.RunJournal(path)
+    assert resumed.start(["a", "b", "c"]) == ["b", "a", "c"]
+    assert resumed.resumed and resumed.done == {"b"}
+
+    resumed.record_done("a")
+    assert storage.RunJournal(path).start(["c", "b", "a"]) == ["b", "a", "c"]
+
+    resumed.finish()
+    assert not os.path.exists(path)
+
+
+def test_journal_of_other_programs_is_not_resumed(tmp_path):
+    """A journal of a run of other programs starts a new run."""
+    path = str(tmp_path / "run.journal")
+
+    storage.RunJournal(path).start(["a", "b"])
+    journal = storage.RunJournal(path)
+
+    assert journal.start(["a", "c"]) == ["a", "c"]
+    assert not journal.resumed and not journal.done
@@ -0,0 +1,49 @@
+"""Tests of the memory tracking of the utils module."""
+
+import os
+import sys
+
+import pytest
+
+from src import utils
+
+
+def test_memory_tracker():
+    """The ceiling and the limit are only enforced when they are set, only the limit raises. The peak is at least the
+    current memory use."""
+    rss = utils.current_rss()
+    assert rss > 0
+
+    tracker = utils.MemoryTracker()
+    assert not tracker.exceeded()
+    tracker.check()
+
+    assert tracker.peak >= min(rss, tracker.sample())
+    assert tracker.report().startswith("Peak memory: ")
+
+    tracker = utils.MemoryTracker(ceiling=1024)
+    assert tracker.exceeded()
+    tracker.check()
+
+    tracker = utils.MemoryTracker(limit=1024)
+    assert not tracker.exceeded()
+    with pytest.raises(MemoryError):
+        tracker.check()
+
+    assert not utils.MemoryTracker(ceiling=100 * rss).exceeded()
+
+
+def test_memory_unavailable(monkeypatch):
+    """Without getrusage and /proc, like on Windows, the ceiling and the limit are not enforced and the peak is
+    unavailable."""
+    monkeypatch.setitem(sys.modules, "resource", None)
+    monkeypatch.delattr(os, "sysconf")
+
+    assert utils.current_rss() is None
+
+    tracker = utils.MemoryTracker(ceiling=1024, limit=1024)
+    assert not tracker.exceeded()
+    tracker.check()
+
+    assert tracker.peak is None and tracker.peak_children is None
+    assert tracker.report() == "Peak memory: unavailable"
@@ -0,0 +1,127 @@
+"""Tests of the lease queue of the work_queue module, including workers in separate processes."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from src.work_queue import LeaseQueue, run_cooperatively
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Each worker claims every item it can. While it holds an item, it creates a marker file that fails when another
+# worker holds the item at the same time, and it publishes the item by creating the done file, which fails when
+# the item was already processed.
+WORKER = """
+import os, sys, time
+from src.work_queue import LeaseQueue, run_cooperatively
+
+leases, output, items = sys.argv[1], sys.argv[2], int(sys.argv[3])
+queue = LeaseQueue(leases, lease_seconds=60)
+
+def work(item):
+    marker = os.path.join(output, f"{item}.held")
+    os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    time.sleep(0.001)
+    os.close(os.open(os.path.join(output, f"{item}.done"), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    os.remove(marker)
+
+failures = run_cooperatively(
+    list(range(items)),
+    queue,
+    key=str,
+    is_done=lambda item: os.path.exists(os.path.join(output, f"{item}.done")),
+    work=work,
+    poll_seconds=0.01,
+)
+sys.exit(1 if failures else 0)
+"""
+
+
+def test_claim_and_release(tmp_path):
+    """A lease is held by one worker until it is released."""
+    first, second = LeaseQueue(str(tmp_path)), LeaseQueue(str(tmp_path))
+
+    assert first.try_claim("item")
+    assert not second.try_claim("item")
+    assert first.holds("item") and not second.holds("item")
+
+    first.release("item")
+    assert second.try_claim("item")
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    """A lease that is not renewed is taken over by another worker."""
+    first, second = LeaseQueue(str(tmp_path), lease_seconds=0.05), LeaseQueue(str(tmp_path), lease_seconds=0.05)
+
+    assert first.try_claim("item")
+    time.sleep(0.1)
+
+    assert second.try_claim("item")
+    assert not first.holds("item")
+
+
+def test_unreadable_lease_is_not_taken_over(tmp_path):
+    """A lease file that cannot be parsed is only taken over when it has not been modified for a lease period."""
+    queue = LeaseQueue(str(tmp_path), lease_seconds=60)
+    path = tmp_path / "item.lease"
+    path.write_text("")
+
+    assert not queue.try_claim("item")
+
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    assert queue.try_claim("item")
+    assert json.loads(path.read_text())["owner"] == queue.owner
+
+
+def test_no_temporary_files_are_left(tmp_path):
+    """Creating and renewing a lease leaves only the lease file behind."""
+    first, second = LeaseQueue(str(tmp_path)), LeaseQueue(str(tmp_path))
+
+    assert first.try_claim("item") and not second.try_claim("item")
+    assert first.renew("item")
+
+    assert os.listdir(tmp_path) == ["item.lease"]
+
+
+def test_run_cooperatively_splits_the_items(tmp_path):
+    """Every item is processed once by the worker that claimed it, and the exceptions of failing items are
+    returned."""
+    queue = LeaseQueue(str(tmp_path / "leases"))
+    done: list[int] = []
+
+    def work(item: int) -> None:
+        if item == 3:
+            raise ValueError("failed")
+        done.append(item)
+
+    failures = run_cooperatively(list(range(5)), queue, key=str, is_done=done.__contains__, work=work)
+
+    assert done == [0, 1, 2, 4]
+    assert [(item, str(exception)) for item, exception in failures] == [(3, "failed")]
+    assert not os.listdir(tmp_path / "leases")
+
+
+def test_processes_never_hold_the_same_lease(tmp_path):
+    """Workers in separate processes contend on the same lease directory, no item is held by two workers at the
+    same time and every item is processed exactly once."""
+    leases, output, items = tmp_path / "leases", tmp_path / "output", 200
+    output.mkdir()
+
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, str(leases), str(output), str(items)],
+            cwd=ROOT,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(4)
+    ]
+
+    for worker in workers:
+        _, errors = worker.communicate(timeout=120)
+        assert worker.returncode == 0, errors
+
+    assert sorted(os.listdir(output)) == sorted(f"{item}.done" for item in range(items))
+    assert not os.listdir(leases)